@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
+from app.core import tracing
 from app.core.config import settings
 from app.core.maintenance import is_maintenance_active_now, get_maintenance_message
 from app.db.session import get_db
@@ -23,6 +24,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    with tracing.span("get_current_user"):
+        return _authenticate(db, token)
+
+
+def _authenticate(db: Session, token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -11,6 +11,7 @@ from app.api.v1.routers import (
     citizens,
     permissions,
     feedback,
+    profiles,
 )
 
 api_router = APIRouter()
@@ -24,3 +25,4 @@ api_router.include_router(reports.router)
 api_router.include_router(audit.router)
 api_router.include_router(citizens.router)
 api_router.include_router(feedback.router)
+api_router.include_router(profiles.router)
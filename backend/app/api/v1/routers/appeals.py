@@ -6,12 +6,17 @@ from app.models.user import User
 from app.schemas.appeal import AppealCreate, AppealOut, AppealUpdate
 from app.schemas.executor import ExecutorOut, ExecutorCreate, ExecutorUpdate
 from app.services.appeal import AppealService
+from app.core import report_cache
+from app.core.config import settings
+from app.models.appeal import Appeal
 from app.models.executor import Executor
+from app.repositories.appeal_stats import AppealStatsRepository
 from app.repositories.executor import ExecutorRepository
 from app.db.session import get_db
 from sqlalchemy.orm import Session
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/appeals", tags=["appeals"])
+router = APIRouter(prefix="/appeals", tags=["appeals"], route_class=ProfiledRoute)
 
 
 class AppealsListResponse(BaseModel):
@@ -119,6 +124,32 @@ def get_executor_repo(db: Session = Depends(get_db)) -> ExecutorRepository:
     return ExecutorRepository(db)
 
 
+def _directions_before(db: Session, appeal_id: int) -> set[int] | None:
+    """İcraçı dəyişikliyindən əvvəlki icra istiqamətləri (rollup aktiv deyilsə None)."""
+    if not settings.appeal_rollups_enabled:
+        return None
+    return AppealStatsRepository(db).directions_of(appeal_id)
+
+
+def _apply_executor_rollup(db: Session, appeal_id: int, old_directions: set[int] | None) -> None:
+    """İcraçı dəyişikliyini istiqamət rollup-ına yaz (commit etmir: icraçı ilə eyni tranzaksiyada)."""
+    if old_directions is None:
+        return
+    appeal = db.get(Appeal, appeal_id)
+    if appeal:
+        db.flush()
+        stats = AppealStatsRepository(db)
+        snapshot = stats.snapshot(appeal)
+        stats.apply_directions(snapshot, old_directions, snapshot, stats.directions_of(appeal_id))
+
+
+def _invalidate_appeal_reports(db: Session, appeal_id: int) -> None:
+    """İcraçı dəyişəndə (icra istiqaməti statistikası) həmin müraciətin hesabat keşini təmizlə."""
+    appeal = db.get(Appeal, appeal_id)
+    if appeal:
+        report_cache.invalidate_appeal(appeal.user_section_id, appeal.reg_date)
+
+
 @router.get("/{appeal_id}/executors", response_model=list[ExecutorOut])
 def get_appeal_executors(
     appeal_id: int,
@@ -144,7 +175,6 @@ def add_appeal_executor(
             Executor.appeal_id == appeal_id,
             Executor.is_primary == True
         ).update({Executor.is_primary: False})
-        db.commit()
     
     executor = Executor(
         appeal_id=appeal_id,
@@ -163,7 +193,11 @@ def add_appeal_executor(
         PC=payload.PC,
         PC_Tarixi=payload.PC_Tarixi,
     )
+    old_directions = _directions_before(repo.db, appeal_id)
+    repo.db.add(executor)
+    _apply_executor_rollup(repo.db, appeal_id, old_directions)
     saved_executor = repo.create(executor)
+    _invalidate_appeal_reports(repo.db, appeal_id)
     
     # Refresh to get names from Repo join logic (Wait, repo.create won't join automatically)
     # We should return the result of list_by_appeal for this specific one if we want names
@@ -187,8 +221,11 @@ def remove_appeal_executor(
     if not executor:
         raise HTTPException(status_code=404, detail="Executor assignment not found")
     
+    old_directions = _directions_before(db, appeal_id)
     db.delete(executor)
+    _apply_executor_rollup(db, appeal_id, old_directions)
     db.commit()
+    _invalidate_appeal_reports(db, appeal_id)
     return {"success": True}
 
 
@@ -217,12 +254,16 @@ def update_appeal_executor(
             Executor.is_primary == True
         ).update({Executor.is_primary: False})
     
+    old_directions = _directions_before(repo.db, appeal_id)
+
     # Update fields
     update_data = payload.dict(exclude_unset=True)
     for field, value in update_data.items():
         if hasattr(executor, field):
             setattr(executor, field, value)
     
+    _apply_executor_rollup(repo.db, appeal_id, old_directions)
     repo.db.commit()
     repo.db.refresh(executor)
+    _invalidate_appeal_reports(repo.db, appeal_id)
     return ExecutorOut.from_orm(executor)
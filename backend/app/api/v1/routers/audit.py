@@ -4,14 +4,17 @@ Only admins can view audit logs
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, time, timedelta
+
+from fastapi import APIRouter, Depends, Query
 
 from app.api.deps import get_current_user, require_admin, get_audit_service
 from app.models.user import User
 from app.services.audit import AuditService
-from app.schemas.audit_log import AuditLogListResponse
+from app.schemas.audit_log import AuditChangeListResponse, AuditLogListResponse, AuditLogOut
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/audit-logs", tags=["audit"])
+router = APIRouter(prefix="/audit-logs", tags=["audit"], route_class=ProfiledRoute)
 
 
 @router.get("", response_model=AuditLogListResponse)
@@ -21,7 +24,10 @@ def list_audit_logs(
     entity_id: int | None = None,
     created_by: int | None = None,
     action: str | None = None,
-    limit: int = 50,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = Query(None, description="Əvvəlki cavabın next_cursor dəyəri"),
+    limit: int = Query(50, ge=1, le=1000),
     offset: int = 0,
     service: AuditService = Depends(get_audit_service),
 ):
@@ -32,22 +38,67 @@ def list_audit_logs(
     - entity_id: ID of the affected record
     - created_by: User ID who performed the action
     - action: CREATE, UPDATE, DELETE
+    - start_date / end_date: created_at date range (inclusive)
+
+    Pages: pass `next_cursor` back as `cursor` (keyset, stable while new
+    logs arrive); `offset` still works but gets slower on later pages.
     """
-    items, total = service.list_logs(
+    items, total, next_cursor = service.list_logs(
         entity_type=entity_type,
         entity_id=entity_id,
         created_by=created_by,
         action=action,
         limit=limit,
         offset=offset,
+        start=datetime.combine(start_date, time.min) if start_date else None,
+        end=datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None,
+        cursor=cursor,
+    )
+    return AuditLogListResponse(items=items, total=total, limit=limit, offset=offset, next_cursor=next_cursor)
+
+
+@router.get("/changes", response_model=AuditChangeListResponse)
+def list_audit_changes(
+    admin_user: User = Depends(require_admin),
+    entity_type: str | None = None,
+    entity_id: int | None = None,
+    field: str | None = Query(None, description="Sahə adı, məs. status"),
+    old_value: str | None = None,
+    new_value: str | None = None,
+    created_by: int | None = None,
+    user_section_id: int | None = Query(None, description="Yalnız bu bölmənin müraciətləri"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = Query(None, description="Əvvəlki cavabın next_cursor dəyəri"),
+    limit: int = Query(50, ge=1, le=1000),
+    service: AuditService = Depends(get_audit_service),
+):
+    """Field-level changes - Admin only
+
+    Answers "who changed X": e.g. field=status&entity_type=Appeal&user_section_id=4
+    with last month's start_date / end_date.
+    """
+    items, next_cursor = service.list_changes(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        field=field,
+        old_value=old_value,
+        new_value=new_value,
+        created_by=created_by,
+        user_section_id=user_section_id,
+        start=datetime.combine(start_date, time.min) if start_date else None,
+        end=datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None,
+        limit=limit,
+        cursor=cursor,
     )
-    return AuditLogListResponse(items=items, total=total, limit=limit, offset=offset)
+    return AuditChangeListResponse(items=items, limit=limit, next_cursor=next_cursor)
 
 
 @router.get("/{entity_type}/{entity_id}")
 def get_entity_history(
     entity_type: str,
     entity_id: int,
+    summary: bool = Query(False, description="Yalnız kim/nə vaxt/əməliyyat (dəyərlər olmadan)"),
     admin_user: User = Depends(require_admin),
     service: AuditService = Depends(get_audit_service),
 ):
@@ -55,7 +106,10 @@ def get_entity_history(
     
     Shows all changes made to a record including who made them and when
     """
-    logs = service.get_entity_history(entity_type, entity_id)
+    logs = service.get_entity_history(entity_type, entity_id, summary=summary)
+    if not summary:
+        # old_values / new_values sıxılmış ola bilər: AuditLogOut açır
+        logs = [AuditLogOut.model_validate(log) for log in logs]
     return {
         "entity_type": entity_type,
         "entity_id": entity_id,
@@ -4,8 +4,9 @@ from pydantic import BaseModel
 from app.api.deps import get_auth_service
 from app.schemas.user import TokenOut
 from app.services.auth import AuthService
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=ProfiledRoute)
 
 
 class LoginRequest(BaseModel):
@@ -6,8 +6,9 @@ from app.api import deps
 from app.models.citizen import Citizen
 from app.schemas.citizen import CitizenSchema, CitizenCreate, CitizenUpdate, CitizenListResponse
 from app.models.user import User
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/citizens", tags=["citizens"])
+router = APIRouter(prefix="/citizens", tags=["citizens"], route_class=ProfiledRoute)
 
 
 @router.get("/", response_model=CitizenListResponse)
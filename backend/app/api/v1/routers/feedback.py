@@ -6,9 +6,10 @@ from pydantic import BaseModel, Field
 from app.api.deps import get_current_user, get_audit_service
 from app.models.user import User
 from app.services.audit import AuditService
+from app.core.profiling import ProfiledRoute
 
 
-router = APIRouter(prefix="/feedback", tags=["feedback"])
+router = APIRouter(prefix="/feedback", tags=["feedback"], route_class=ProfiledRoute)
 
 
 class FeedbackCreate(BaseModel):
@@ -1,10 +1,18 @@
 """
 Single router for ALL lookup/reference data tables.
 Each endpoint returns the full list (active records only where applicable).
+
+GET responses are served from the versioned lookup cache (app/core/lookup_cache.py)
+as pre-serialized JSON with ETag / Cache-Control; If-None-Match yields 304.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from functools import lru_cache
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 
 from app.api.deps import get_lookup_repo
+from app.core import lookup_cache
+from app.core.config import settings
 from app.repositories.lookup import LookupRepository
 from app.models.lookup import (
     AccountIndex, ApIndex, ApStatus, ContentType,
@@ -30,109 +38,225 @@ from app.schemas.lookup import (
 )
 from app.models.user import User
 from app.models.appeal import Appeal
+from app.core.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/lookups", tags=["lookups"], route_class=ProfiledRoute)
+
+
+# name -> (model, output schema, active_only)
+LOOKUP_TABLES = {
+    "account-indexes": (AccountIndex, AccountIndexOut, True),
+    "ap-indexes": (ApIndex, ApIndexOut, True),
+    "ap-statuses": (ApStatus, ApStatusOut, True),
+    "content-types": (ContentType, ContentTypeOut, True),
+    "chief-instructions": (ChiefInstruction, ChiefInstructionOut, True),
+    "in-sections": (InSection, InSectionOut, True),
+    "sections": (Section, SectionOut, True),
+    "user-sections": (UserSection, UserSectionOut, False),
+    "who-controls": (WhoControl, WhoControlOut, True),
+    "departments": (Department, DepartmentOut, True),
+    "dep-officials": (DepOfficial, DepOfficialOut, True),
+    "regions": (Region, RegionOut, True),
+    "organs": (Organ, OrganOut, True),
+    "directions": (Direction, DirectionOut, True),
+    "executor-list": (ExecutorList, ExecutorListOut, True),
+    "movzular": (Movzu, MovzuOut, False),
+    "holidays": (Holiday, HolidayOut, True),
+}
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def _serialize(schema, items) -> bytes:
+    adapter = _list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _json_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.lookup_cache_max_age_seconds}, must-revalidate",
+    }
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cached_response(request: Request, entry: lookup_cache.CachedPayload) -> Response:
+    return _json_response(request, entry.body, entry.etag)
+
+
+def _load_table(repo: LookupRepository, name: str) -> lookup_cache.CachedPayload:
+    model, schema, active_only = LOOKUP_TABLES[name]
+    return lookup_cache.get_or_load(
+        model.__tablename__,
+        "all",
+        lambda: _serialize(schema, repo.list_all(model, active_only=active_only)),
+    )
+
+
+def _load_by_field(repo: LookupRepository, name: str, field_name: str, value) -> lookup_cache.CachedPayload:
+    model, schema, _ = LOOKUP_TABLES[name]
+    return lookup_cache.get_or_load(
+        model.__tablename__,
+        f"{field_name}={value}",
+        lambda: _serialize(schema, repo.get_by_field(model, field_name, value)),
+    )
+
+
+_BUNDLE_HASH_LEN = 8
+
+
+@router.get("/bundle")
+def get_lookup_bundle(
+    request: Request,
+    tables: str | None = Query(None, description="Vergüllə ayrılmış cədvəl adları (boşdursa hamısı)"),
+    since_version: str | None = Query(None, description="Əvvəlki cavabın version dəyəri; yalnız dəyişən cədvəllər qaytarılır"),
+    repo: LookupRepository = Depends(get_lookup_repo),
+):
+    """
+    Bir neçə lookup cədvəlini tək cavabda qaytarır.
+
+    Cavab: {"version": "...", "tables": {"departments": [...], ...}}.
+    `version` hər cədvəlin məzmun hash-inin qısa hissələrindən yığılır, ona görə
+    `since_version` ilə hansı cədvəllərin dəyişdiyi serverdə yaddaş saxlamadan müəyyən olunur.
+    """
+    if tables:
+        names = sorted({t.strip() for t in tables.split(",") if t.strip()})
+        unknown = [n for n in names if n not in LOOKUP_TABLES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Naməlum cədvəl(lər): {', '.join(unknown)}")
+    else:
+        names = sorted(LOOKUP_TABLES)
+
+    entries = {name: _load_table(repo, name) for name in names}
+    hashes = [entries[name].etag.strip('"')[:_BUNDLE_HASH_LEN] for name in names]
+    version = "".join(hashes)
+
+    changed = names
+    if since_version and len(since_version) == len(version):
+        previous = [
+            since_version[i:i + _BUNDLE_HASH_LEN] for i in range(0, len(since_version), _BUNDLE_HASH_LEN)
+        ]
+        changed = [name for name, old, new in zip(names, previous, hashes) if old != new]
+
+    body = b'{"version":"' + version.encode() + b'","tables":{'
+    body += b",".join(b'"' + name.encode() + b'":' + entries[name].body for name in changed)
+    body += b"}}"
 
-router = APIRouter(prefix="/lookups", tags=["lookups"])
+    etag = lookup_cache.make_etag(f"{version}|{','.join(changed)}".encode())
+    return _json_response(request, body, etag)
 
 
 @router.get("/account-indexes", response_model=list[AccountIndexOut])
-def get_account_indexes(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(AccountIndex)
+def get_account_indexes(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "account-indexes"))
 
 
 @router.get("/ap-indexes", response_model=list[ApIndexOut])
-def get_ap_indexes(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(ApIndex)
+def get_ap_indexes(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "ap-indexes"))
 
 
 @router.get("/ap-statuses", response_model=list[ApStatusOut])
-def get_ap_statuses(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(ApStatus)
+def get_ap_statuses(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "ap-statuses"))
 
 
 @router.get("/content-types", response_model=list[ContentTypeOut])
-def get_content_types(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(ContentType)
+def get_content_types(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "content-types"))
 
 
 @router.get("/chief-instructions", response_model=list[ChiefInstructionOut])
-def get_chief_instructions(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(ChiefInstruction)
+def get_chief_instructions(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "chief-instructions"))
 
 
 @router.get("/chief-instructions/by-section/{section_id}", response_model=list[ChiefInstructionOut])
-def get_chief_instructions_by_section(section_id: int, repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.get_by_field(ChiefInstruction, "section_id", section_id)
+def get_chief_instructions_by_section(section_id: int, request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_by_field(repo, "chief-instructions", "section_id", section_id))
 
 
 @router.get("/in-sections", response_model=list[InSectionOut])
-def get_in_sections(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(InSection)
+def get_in_sections(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "in-sections"))
 
 
 @router.get("/sections", response_model=list[SectionOut])
-def get_sections(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Section)
+def get_sections(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "sections"))
 
 
 @router.get("/user-sections", response_model=list[UserSectionOut])
-def get_user_sections(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(UserSection, active_only=False)
+def get_user_sections(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "user-sections"))
 
 
 @router.get("/who-controls", response_model=list[WhoControlOut])
-def get_who_controls(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(WhoControl)
+def get_who_controls(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "who-controls"))
 
 
 @router.get("/departments", response_model=list[DepartmentOut])
-def get_departments(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Department)
+def get_departments(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "departments"))
 
 
 @router.get("/dep-officials", response_model=list[DepOfficialOut])
-def get_dep_officials(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(DepOfficial)
+def get_dep_officials(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "dep-officials"))
 
 
 @router.get("/dep-officials/by-dep/{dep_id}", response_model=list[DepOfficialOut])
-def get_dep_officials_by_dep(dep_id: int, repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.get_by_field(DepOfficial, "dep_id", dep_id)
+def get_dep_officials_by_dep(dep_id: int, request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_by_field(repo, "dep-officials", "dep_id", dep_id))
 
 
 @router.get("/regions", response_model=list[RegionOut])
-def get_regions(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Region)
+def get_regions(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "regions"))
 
 
 @router.get("/organs", response_model=list[OrganOut])
-def get_organs(repo: LookupRepository = Depends(get_lookup_repo)):
-    items = repo.list_all(Organ, active_only=False)
-    return [i for i in items if not i.isDeleted]
+def get_organs(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "organs"))
 
 
 @router.get("/directions", response_model=list[DirectionOut])
-def get_directions(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Direction)
+def get_directions(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "directions"))
 
 
 @router.get("/directions/by-section/{section_id}", response_model=list[DirectionOut])
-def get_directions_by_section(section_id: int, repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.get_by_field(Direction, "section_id", section_id)
+def get_directions_by_section(section_id: int, request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_by_field(repo, "directions", "section_id", section_id))
 
 
 @router.get("/executor-list", response_model=list[ExecutorListOut])
-def get_executor_list(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(ExecutorList)
+def get_executor_list(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "executor-list"))
 
 
 @router.get("/executor-list/by-direction/{direction_id}", response_model=list[ExecutorListOut])
-def get_executor_list_by_direction(direction_id: int, repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.get_by_field(ExecutorList, "direction_id", direction_id)
+def get_executor_list_by_direction(direction_id: int, request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_by_field(repo, "executor-list", "direction_id", direction_id))
 
 
 @router.get("/movzular", response_model=list[MovzuOut])
-def get_movzular(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Movzu, active_only=False)
+def get_movzular(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "movzular"))
 
 
 # ============ CREATE/UPDATE/DELETE ENDPOINTS ============
@@ -467,8 +591,8 @@ def delete_user_section(section_id: int, repo: LookupRepository = Depends(get_lo
 
 # ===== Holidays =====
 @router.get("/holidays", response_model=list[HolidayOut])
-def list_holidays(repo: LookupRepository = Depends(get_lookup_repo)):
-    return repo.list_all(Holiday)
+def list_holidays(request: Request, repo: LookupRepository = Depends(get_lookup_repo)):
+    return _cached_response(request, _load_table(repo, "holidays"))
 
 
 @router.post("/holidays", response_model=HolidayOut)
@@ -8,8 +8,9 @@ from app.models.user import User
 from app.repositories.user import UserRepository
 from app.schemas.user import UserOut
 from pydantic import BaseModel
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/me", tags=["me"])
+router = APIRouter(prefix="/me", tags=["me"], route_class=ProfiledRoute)
 
 
 class ChangePasswordBody(BaseModel):
@@ -35,8 +35,9 @@ from app.schemas.permission import (
     PermissionCreate,
     RolePermissionSet,
 )
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/permissions", tags=["permissions"])
+router = APIRouter(prefix="/permissions", tags=["permissions"], route_class=ProfiledRoute)
 
 
 def check_admin(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,34 @@
+"""
+Stored request profiles (X-Profile: 1 / ?__profile=1, see app/core/profiling.py).
+Only admins can list and download them.
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+
+from app.api.deps import require_admin
+from app.core import profiling
+from app.core.profiling import ProfiledRoute
+from app.models.user import User
+from app.schemas.profile import RequestProfileOut
+
+router = APIRouter(prefix="/profiles", tags=["profiles"], route_class=ProfiledRoute)
+
+
+@router.get("", response_model=list[RequestProfileOut])
+def list_request_profiles(current_user: User = Depends(require_admin)):
+    return [
+        RequestProfileOut(
+            **meta,
+            **{f"{kind}_url": f"/api/v1/profiles/{meta['id']}/{kind}" for kind in profiling.PROFILE_FILES},
+        )
+        for meta in profiling.list_profiles()
+    ]
+
+
+@router.get("/{profile_id}/{kind}")
+def download_request_profile(profile_id: str, kind: str, current_user: User = Depends(require_admin)):
+    """kind: html (summary), pstats (python -m pstats / snakeviz), collapsed (flamegraph)."""
+    path, media_type, filename = profiling.profile_file(profile_id, kind)
+    if kind == "html":
+        return FileResponse(path, media_type=media_type)
+    return FileResponse(path, media_type=media_type, filename=filename)
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import date, datetime
-from app.api.deps import get_report_service, get_current_user
+import os
+from typing import Literal
+from app.api.deps import get_report_service, get_current_user, require_admin
+from app.core import render_cache
+from app.models.lookup import UserSection
 from app.models.user import User
-from app.schemas.report import ReportResponse, ReportParams
-from app.services.report import ReportService
+from app.schemas.report import CrossTabResponse, Forma4Page, ReportResponse, ReportParams, ReportJobCreate, ReportJobOut
+from app.services.report import EXPORT_FORMATS, ReportService, section_scope
+from app.services import report_bundle, report_jobs, report_render
+from app.core.reference_data import reference_data
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/reports", tags=["reports"])
+router = APIRouter(prefix="/reports", tags=["reports"], route_class=ProfiledRoute)
 
 @router.get("/appeals", response_model=ReportResponse)
 def get_appeal_report(
@@ -22,98 +30,229 @@ def get_appeal_report(
     )
     return service.get_appeal_report(params, current_user)
 
+@router.get("/appeals/crosstab", response_model=CrossTabResponse)
+def get_appeal_crosstab(
+    dimensions: list[str] = Query([], description="Ən çoxu 3 ölçü: department, region, status, index, insection, account_index, content_type"),
+    bucket: Literal["day", "week", "month", "quarter", "year"] | None = Query(None, description="Zaman bölgüsü"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(get_current_user),
+    service: ReportService = Depends(get_report_service)
+):
+    """Appeal counts by time bucket and several dimensions, with subtotals (level > 0)."""
+    return service.appeal_crosstab(dimensions, bucket, start_date, end_date, section_scope(current_user))
+
+@router.get("/appeals/crosstab/export/excel")
+def export_appeal_crosstab_excel(
+    dimensions: list[str] = Query([]),
+    bucket: Literal["day", "week", "month", "quarter", "year"] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(get_current_user),
+    service: ReportService = Depends(get_report_service)
+):
+    """Pivot sheet: the last dimension as columns, the others as row headers."""
+    output = service.generate_appeal_crosstab_excel(dimensions, bucket, start_date, end_date, section_scope(current_user))
+    extension, media_type = EXPORT_FORMATS["excel"]
+    return StreamingResponse(
+        report_render.iter_file(output),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=appeal_crosstab_{datetime.now().strftime('%Y%m%d')}.{extension}"}
+    )
+
+def _export_response(
+    request: Request,
+    service: ReportService,
+    kind: str,
+    fmt: str,
+    params: ReportParams,
+    current_user: User,
+):
+    extension, media_type = EXPORT_FORMATS[fmt]
+    filename = f"{kind}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    result = service.render_cached(kind, fmt, params, section_scope(current_user))
+    if isinstance(result, render_cache.CachedFile):
+        # Keşdən: ETag ilə 304, FileResponse Range sorğularını da dəstəkləyir
+        headers = {"ETag": result.etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if result.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(result.path, media_type=media_type, filename=filename, headers=headers)
+    return StreamingResponse(
+        report_render.iter_file(result),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/appeals/export/excel")
 def export_appeal_stats_excel(
+    request: Request,
     group_by: str = Query("department"),
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
     params = ReportParams(group_by=group_by, start_date=start_date, end_date=end_date)
-    output = service.generate_appeal_stats_excel(params, current_user)
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=appeal_stats_{datetime.now().strftime('%Y%m%d')}.xlsx"}
-    )
+    return _export_response(request, service, "appeal_stats", "excel", params, current_user)
 
 @router.get("/appeals/export/pdf")
 def export_appeal_stats_pdf(
+    request: Request,
     group_by: str = Query("department"),
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
     params = ReportParams(group_by=group_by, start_date=start_date, end_date=end_date)
-    output = service.generate_appeal_stats_pdf(params, current_user)
-    return StreamingResponse(
-        output,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=appeal_stats_{datetime.now().strftime('%Y%m%d')}.pdf"}
-    )
+    return _export_response(request, service, "appeal_stats", "pdf", params, current_user)
 
 @router.get("/appeals/export/word")
 def export_appeal_stats_word(
+    request: Request,
     group_by: str = Query("department"),
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
     params = ReportParams(group_by=group_by, start_date=start_date, end_date=end_date)
-    output = service.generate_appeal_stats_word(params, current_user)
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": f"attachment; filename=appeal_stats_{datetime.now().strftime('%Y%m%d')}.docx"}
-    )
+    return _export_response(request, service, "appeal_stats", "word", params, current_user)
 
 @router.get("/forma-4/excel")
 def export_forma_4_excel(
+    request: Request,
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
-    output = service.generate_forma_4_excel(start_date, end_date, current_user)
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=forma_4_{datetime.now().strftime('%Y%m%d')}.xlsx"}
-    )
+    params = ReportParams(start_date=start_date, end_date=end_date)
+    return _export_response(request, service, "forma_4", "excel", params, current_user)
 
 @router.get("/forma-4/word")
 def export_forma_4_word(
+    request: Request,
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
-    output = service.generate_forma_4_word(start_date, end_date, current_user)
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": f"attachment; filename=forma_4_{datetime.now().strftime('%Y%m%d')}.docx"}
-    )
+    params = ReportParams(start_date=start_date, end_date=end_date)
+    return _export_response(request, service, "forma_4", "word", params, current_user)
 
 @router.get("/forma-4/pdf")
 def export_forma_4_pdf(
+    request: Request,
     start_date: date | None = None,
     end_date: date | None = None,
     current_user: User = Depends(get_current_user),
     service: ReportService = Depends(get_report_service)
 ):
-    from fastapi.responses import StreamingResponse
-    output = service.generate_forma_4_pdf(start_date, end_date, current_user)
+    params = ReportParams(start_date=start_date, end_date=end_date)
+    return _export_response(request, service, "forma_4", "pdf", params, current_user)
+
+
+@router.get("/forma-4", response_model=Forma4Page)
+def preview_forma_4(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    status: int | None = None,
+    dep_id: int | None = None,
+    after_id: int | None = Query(None, description="Əvvəlki cavabın next_after_id dəyəri"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    service: ReportService = Depends(get_report_service)
+):
+    """Forma 4 rows as JSON, one keyset page at a time (ordered by appeal id)."""
+    return service.forma_4_preview(
+        start_date, end_date, section_scope(current_user),
+        status=status, dep_id=dep_id, after_id=after_id, limit=limit,
+    )
+
+
+@router.get("/forma-4/bundle")
+def export_forma_4_bundle(
+    sections: list[int] | None = Query(None, description="UserSection id-ləri; boş = bütün bölmələr"),
+    formats: list[Literal["excel", "word", "pdf"]] = Query(["excel"]),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(require_admin),
+    service: ReportService = Depends(get_report_service)
+):
+    """ZIP with one Forma 4 file per section and format, rendered in parallel."""
+    section_ids = service.forma_4_bundle_sections(start_date, end_date, sections)
+    parts = {
+        report_bundle.part_name(section_id, reference_data.label(UserSection, section_id)): section_id
+        for section_id in sorted(section_ids, key=lambda section_id: (section_id is None, section_id or 0))
+    }
     return StreamingResponse(
-        output,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=forma_4_{datetime.now().strftime('%Y%m%d')}.pdf"}
+        report_bundle.iter_bundle(parts, list(dict.fromkeys(formats)), start_date, end_date),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=forma_4_bundle_{datetime.now().strftime('%Y%m%d')}.zip"}
+    )
+
+
+# ===== Background export jobs =====
+
+def _job_out(state: dict) -> ReportJobOut:
+    download_url = None
+    if state["status"] == report_jobs.STATUS_DONE:
+        download_url = f"/api/v1/reports/jobs/{state['id']}/download"
+    return ReportJobOut(**{k: v for k, v in state.items() if k in ReportJobOut.model_fields}, download_url=download_url)
+
+
+def _get_job(job_id: str, current_user: User) -> dict:
+    state = report_jobs.load(job_id)
+    # Başqasının işi mövcud olmayan kimi göstərilir
+    if state is None or (state["user_id"] != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Hesabat tapılmadı")
+    return state
+
+
+@router.post("/jobs", response_model=ReportJobOut, status_code=202)
+def create_report_job(
+    payload: ReportJobCreate,
+    current_user: User = Depends(get_current_user),
+):
+    """Queue an export; poll GET /reports/jobs/{id} and download when status is done."""
+    params = ReportParams(start_date=payload.start_date, end_date=payload.end_date, group_by=payload.group_by)
+    state = report_jobs.submit(
+        payload.report,
+        payload.format,
+        params.model_dump(mode="json"),
+        current_user.id,
+        section_scope(current_user),
+    )
+    return _job_out(state)
+
+
+@router.get("/jobs", response_model=list[ReportJobOut])
+def list_report_jobs(current_user: User = Depends(get_current_user)):
+    report_jobs.sweep()
+    states = [s for s in report_jobs.list_states() if s["user_id"] == current_user.id]
+    states.sort(key=lambda s: s["created_at"], reverse=True)
+    return [_job_out(s) for s in states]
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobOut)
+def get_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return _job_out(_get_job(job_id, current_user))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    state = _get_job(job_id, current_user)
+    if state["status"] != report_jobs.STATUS_DONE:
+        raise HTTPException(status_code=409, detail="Hesabat hələ hazır deyil")
+    path = report_jobs.result_path(state)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Hesabatın saxlanma müddəti bitib")
+    extension, media_type = EXPORT_FORMATS[state["format"]]
+    created = datetime.fromisoformat(state["created_at"])
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=f"{state['report']}_{created.strftime('%Y%m%d')}.{extension}",
     )
@@ -15,8 +15,9 @@ from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UsersListResponse, UserPasswordReset
 from app.services.user import UserService
 from app.services.audit import AuditService
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=ProfiledRoute)
 
 
 def _get_service_with_audit(
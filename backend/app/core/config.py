@@ -28,6 +28,96 @@ class Settings(BaseSettings):
     bootstrap_superadmin_surname: str = "Super"
     bootstrap_superadmin_name: str = "Admin"
 
+    # One-shot startup tasks (app/db/startup_tasks.py): how long a worker waits for
+    # the worker that runs them; the file lock is used on non-MSSQL databases.
+    startup_tasks_lock_timeout_seconds: int = 120
+    startup_tasks_lock_file: str = "startup_tasks.lock"
+
+    # Lookup (reference data) response cache. TTL bounds staleness across workers.
+    lookup_cache_ttl_seconds: int = 300
+    lookup_cache_max_age_seconds: int = 0
+
+    # Report result cache (statistics). Closed periods: None = keep until invalidated.
+    # Every hit is revalidated against the shared ReportDataVersions counters.
+    report_cache_enabled: bool = True
+    report_cache_ttl_seconds: int = 120
+    report_cache_closed_ttl_seconds: int | None = 24 * 60 * 60
+    report_cache_max_entries: int = 512
+
+    # Daily rollup tables for appeal statistics (AppealDailyStats). Enable only
+    # after the tables exist and rebuild_appeal_rollups.py has run once.
+    appeal_rollups_enabled: bool = False
+
+    # Rendered export files (xlsx/docx/pdf) cached on disk, shared by workers
+    report_render_cache_enabled: bool = True
+    report_render_cache_dir: str = "report_render_cache"
+    report_render_cache_max_bytes: int = 512 * 1024 * 1024
+    # Eviction rescans the directory at least this often (files stored by other workers)
+    report_render_cache_scan_interval_seconds: int = 300
+
+    # Forma 4 row preparation: "rows" (projection tuples) or "pandas" (vectorized)
+    report_forma_4_engine: str = "rows"
+
+    # Word exports: "template" (streamed WordprocessingML rows) or "python-docx" (old cell-by-cell path)
+    report_docx_engine: str = "template"
+
+    # Export libraries (pandas, python-docx, reportlab, fonts) load on first export.
+    # true: load them in a background thread at startup instead (first export is not slower)
+    report_export_warmup: bool = False
+
+    # Background report jobs (POST /reports/jobs): process pool, state + result files
+    report_jobs_dir: str = "report_jobs"
+    report_jobs_max_workers: int = 2
+    report_jobs_max_pending: int = 20
+    report_jobs_ttl_seconds: int = 24 * 60 * 60
+
+    # Multi-section Forma 4 bundle (GET /reports/forma-4/bundle): parts rendering at once
+    # across all API workers (slot lock files in a directory they share). None = CPU count
+    report_bundle_max_workers: int | None = None
+    report_bundle_lock_dir: str = "report_bundle_locks"
+
+    # Audit logs are queued and inserted in batches by a background thread.
+    # Rows that cannot be written (DB down, queue full) go to spill files and are replayed later.
+    audit_writer_enabled: bool = True
+    audit_writer_batch_size: int = 200
+    audit_writer_flush_seconds: float = 1.0
+    audit_writer_max_queue: int = 10000
+    audit_writer_spill_dir: str = "audit_spill"
+
+    # Audit old/new values JSON at least this long is stored zlib-compressed ("z:" + base64). None = never
+    audit_diff_compress_min_bytes: int | None = 1024
+
+    # Field-level AuditChanges rows written with every audit log. Enable only after
+    # migrations/add_audit_changes.sql has run; backfill_audit_changes.py fills old logs.
+    audit_changes_enabled: bool = False
+
+    # Audit archive: archive_audit_logs.py moves rows older than the retention
+    # window into gzip JSONL monthly segments; audit endpoints read both.
+    audit_archive_dir: str = "audit_archive"
+    audit_archive_retention_days: int = 180
+    # Matching archived rows kept in memory per worker for paging (raw JSON lines)
+    audit_archive_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Prometheus GET /metrics (needs prometheus-fastapi-instrumentator, see app/core/metrics.py).
+    # Allowed with "Authorization: Bearer <metrics_token>" or from a client address in metrics_allowed_hosts.
+    metrics_enabled: bool = False
+    metrics_token: str | None = None
+    metrics_allowed_hosts: str = "127.0.0.1,::1"
+
+    # OpenTelemetry tracing (app/core/tracing.py). Exporter: "console" (stdout) or "otlp" (HTTP collector).
+    # Sample ratio applies to new traces; requests with a sampled traceparent are always traced.
+    tracing_enabled: bool = False
+    tracing_exporter: str = "console"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_sample_ratio: float = 1.0
+    tracing_service_name: str = "appeals-backend"
+
+    # On-demand request profiling: admins send "X-Profile: 1" or "?__profile=1" (app/core/profiling.py).
+    # Results (pstats, collapsed stacks, HTML) are kept in request_profiles_dir, newest max_count of them.
+    request_profiling_enabled: bool = True
+    request_profiles_dir: str = "request_profiles"
+    request_profiles_max_count: int = 50
+
     model_config = SettingsConfigDict(
         env_file=("env", ".env", "backend/env", "backend/.env"),
         env_prefix="",
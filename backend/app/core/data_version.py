@@ -0,0 +1,135 @@
+"""
+Shared version counters for the report caches (report_cache, render_cache).
+
+Every worker reads and bumps the same ReportDataVersions rows, so a write on
+one worker invalidates cached reports on all of them. Appeal and executor
+writes bump the counters of the appeal's section and of the admin scope
+("all") for the appeal's reg_date month; lookup writes bump "reference".
+
+current() returns the version of a report scope with one query on the
+primary key: the sum of the section's month counters in the date range (a
+sum of counters that only grow changes whenever one of them does) plus the
+reference counter. A reference change made by another worker also reloads
+this worker's reference_data resolver.
+
+Counters are bumped after the data is committed and read before a report is
+computed, so a write that races with a computation only costs a recompute.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+from threading import Lock
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.core.reference_data import reference_data
+from app.db.session import engine
+from app.models.report_data_version import ReportDataVersion
+
+logger = logging.getLogger(__name__)
+
+ALL_SCOPE = "all"
+REFERENCE_SCOPE = "reference"
+# reg_date-i olmayan müraciətlər
+NO_MONTH = 0
+
+_table = ReportDataVersion.__table__
+_seen_reference: int | None = None
+_lock = Lock()
+
+
+def _scope(user_section_id: int | None) -> str:
+    return ALL_SCOPE if user_section_id is None else f"s{user_section_id}"
+
+
+def _month(value: datetime | date | None) -> int:
+    if value is None:
+        return NO_MONTH
+    return value.year * 100 + value.month
+
+
+def ensure_table() -> None:
+    """Create ReportDataVersions if it does not exist (called on startup)."""
+    try:
+        _table.create(engine, checkfirst=True)
+    except SQLAlchemyError as e:
+        logger.warning("ReportDataVersions table unavailable, report caches stay per worker: %s", e)
+
+
+def _bump(keys: set[tuple[str, int]]) -> None:
+    # Sabit sıra: eyni sətirləri yeniləyən iki yazılış bir-birini kilidləməsin
+    ordered = sorted(keys)
+    try:
+        with engine.begin() as conn:
+            missing = [
+                (scope, month) for scope, month in ordered
+                if conn.execute(
+                    update(_table)
+                    .where(_table.c.scope == scope, _table.c.month == month)
+                    .values(version=_table.c.version + 1)
+                ).rowcount == 0
+            ]
+        for scope, month in missing:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(_table.insert().values(scope=scope, month=month, version=1))
+            except IntegrityError:
+                # Başqa worker eyni anda yaratdı
+                with engine.begin() as conn:
+                    conn.execute(
+                        update(_table)
+                        .where(_table.c.scope == scope, _table.c.month == month)
+                        .values(version=_table.c.version + 1)
+                    )
+    except SQLAlchemyError as e:
+        logger.warning("Report data version bump failed for %s: %s", ordered, e)
+
+
+def bump_appeal(user_section_id: int | None, *reg_dates: datetime | date | None) -> None:
+    """Invalidate reports that may include an appeal of `user_section_id` on any of `reg_dates`."""
+    months = {_month(d) for d in reg_dates or (None,)}
+    scopes = {ALL_SCOPE, _scope(user_section_id)}
+    _bump({(scope, month) for scope in scopes for month in months})
+
+
+def bump_reference() -> None:
+    """Invalidate reports after a lookup (reference data) write."""
+    _bump({(REFERENCE_SCOPE, NO_MONTH)})
+
+
+def current(start_date: date | None, end_date: date | None, user_section_id: int | None) -> tuple | None:
+    """
+    Version of the reports of a (section, date range) scope, or None when
+    the table cannot be read (callers then skip caching).
+    """
+    global _seen_reference
+    scope = _scope(user_section_id)
+    if start_date is None and end_date is None:
+        # Tarix filtri olmayan hesabat tarixsiz müraciətləri də əhatə edir
+        low, high = NO_MONTH, 999999
+    else:
+        low = _month(start_date) if start_date is not None else NO_MONTH + 1
+        high = _month(end_date) if end_date is not None else 999999
+    is_appeal = _table.c.scope == scope
+    query = select(
+        func.sum(case((is_appeal, _table.c.version), else_=0)),
+        func.max(case((_table.c.scope == REFERENCE_SCOPE, _table.c.version), else_=0)),
+    ).where(
+        (is_appeal & _table.c.month.between(low, high))
+        | ((_table.c.scope == REFERENCE_SCOPE) & (_table.c.month == NO_MONTH))
+    )
+    try:
+        with engine.connect() as conn:
+            appeals, reference = conn.execute(query).one()
+    except SQLAlchemyError as e:
+        logger.warning("Report data version unavailable, caching skipped: %s", e)
+        return None
+    appeals, reference = int(appeals or 0), int(reference or 0)
+    with _lock:
+        if reference != _seen_reference:
+            # Lookup-u başqa worker dəyişib (və ya ilk oxunuş): adları yenidən oxu
+            reference_data.invalidate()
+            _seen_reference = reference
+    return (appeals, reference)
@@ -0,0 +1,96 @@
+"""
+Versioned in-process cache for lookup/reference data responses.
+
+Each lookup table has a version counter that is bumped whenever the table is
+written through LookupRepository. Cached entries hold the already serialized
+JSON body plus a content-hash ETag, so a hit costs neither a DB query nor a
+Pydantic serialization pass.
+
+The cache is per worker process. Entries also expire after
+`lookup_cache_ttl_seconds`, which bounds staleness when another worker wrote
+the table. ETags are derived from the body, so they match across workers.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    body: bytes
+    etag: str
+    version: int
+    loaded_at: float
+
+
+_versions: dict[str, int] = {}
+_generation = 0
+_entries: dict[str, CachedPayload] = {}
+_stats = {"hits": 0, "misses": 0}
+_lock = Lock()
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def get_version(table: str) -> int:
+    return _versions.get(table, 0)
+
+
+def get_generation() -> int:
+    """Incremented on every bump of any table (for caches derived from lookup names)."""
+    return _generation
+
+
+def bump(table: str) -> int:
+    """Table dəyişdikdə versiyanı artırır və həmin cədvəlin cache-ini atır."""
+    global _generation
+    with _lock:
+        _generation += 1
+        version = _versions.get(table, 0) + 1
+        _versions[table] = version
+        for key in [k for k in _entries if k.split(":", 1)[0] == table]:
+            del _entries[key]
+        return version
+
+
+def get_or_load(table: str, key: str, loader: Callable[[], bytes]) -> CachedPayload:
+    """
+    Return the cached payload for `table:key`, calling `loader` on a miss.
+    `loader` must return the serialized JSON body.
+    """
+    cache_key = f"{table}:{key}"
+    version = get_version(table)
+    entry = _entries.get(cache_key)
+    if (
+        entry is not None
+        and entry.version == version
+        and time.monotonic() - entry.loaded_at < settings.lookup_cache_ttl_seconds
+    ):
+        _stats["hits"] += 1
+        return entry
+
+    _stats["misses"] += 1
+    body = loader()
+    entry = CachedPayload(body=body, etag=make_etag(body), version=version, loaded_at=time.monotonic())
+    with _lock:
+        # Yükləmə zamanı versiya dəyişibsə köhnə nəticəni saxlamırıq
+        if get_version(table) == version:
+            _entries[cache_key] = entry
+    return entry
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def get_stats() -> dict[str, int]:
+    return {"hits": _stats["hits"], "misses": _stats["misses"], "entries": len(_entries)}
@@ -0,0 +1,188 @@
+"""
+Prometheus metrics, exposed as GET /metrics.
+
+Optional: needs prometheus-fastapi-instrumentator (requirements.optional.txt)
+and metrics_enabled=true. Per-route HTTP metrics come from the
+instrumentator, labelled by route template (handler="/api/v1/appeals/{appeal_id}"):
+
+    http_requests_total{handler, method, status}
+    http_request_duration_seconds{handler, method}      histogram
+    http_requests_inprogress{handler, method}
+
+Added here:
+
+    db_statements_per_request{handler}                  histogram of SQL statements per request
+    db_statements_total
+    db_pool_size / _checkedin / _checkedout / _overflow
+    cache_hits_total / cache_misses_total / cache_hit_ratio / cache_entries{cache}
+    audit_writer_queue_depth, audit_writer_rows_total{outcome}, audit_writer_failures_total
+    report_jobs{status}, report_jobs_oldest_queued_seconds
+
+Everything below db_statements_total is read from the modules' get_stats()
+at scrape time, so hot paths are not changed. Access requires
+`Authorization: Bearer <metrics_token>` or a client address listed in
+metrics_allowed_hosts.
+"""
+from __future__ import annotations
+
+import hmac
+import logging
+import os
+from contextvars import ContextVar
+
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Cari sorğuda icra olunan SQL əmrlərinin sayı (threadpool-a kontekst ilə ötürülür)
+_statements: ContextVar[list[int] | None] = ContextVar("metrics_statements", default=None)
+
+_statements_per_request = None
+_statements_total = None
+
+
+class _StatementCountMiddleware:
+    """Counts SQL statements per request and observes them under the matched route template."""
+
+    def __init__(self, app):
+        from prometheus_fastapi_instrumentator.routing import get_route_name
+
+        self.app = app
+        self._route_name = get_route_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        counter = [0]
+        token = _statements.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _statements.reset(token)
+            # Instrumentator-dakı handler etiketi (prefiksli marşrut şablonu); tapılmayan yollar "none":
+            # sonsuz sayda yol etiketi yaranmasın
+            handler = self._route_name(Request(scope), should_include_root_path=False) or "none"
+            if handler != "/metrics":
+                _statements_per_request.labels(handler=handler).observe(counter[0])
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _statements_total.inc()
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class _StatsCollector:
+    """Gauges and counters built from the in-process stats dicts on every scrape."""
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        from app.core import lookup_cache, render_cache, report_cache
+        from app.db.session import engine
+        from app.services import audit_writer, report_jobs
+
+        pool = engine.pool
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            value = getattr(pool, name, None)
+            # SQLite StaticPool / SingletonThreadPool bu metodları dəstəkləmir
+            if callable(value):
+                yield GaugeMetricFamily(f"db_pool_{name}", f"SQLAlchemy connection pool {name}()", value=value())
+
+        hits = CounterMetricFamily("cache_hits", "Cache hits since process start", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses since process start", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "hits / (hits + misses) since process start", labels=["cache"])
+        entries = GaugeMetricFamily("cache_entries", "Entries held by the cache", labels=["cache"])
+        caches = {"report": report_cache.get_stats(), "render": render_cache.get_stats(), "lookup": lookup_cache.get_stats()}
+        for cache, stats in caches.items():
+            hits.add_metric([cache], stats["hits"])
+            misses.add_metric([cache], stats["misses"])
+            lookups = stats["hits"] + stats["misses"]
+            ratio.add_metric([cache], stats["hits"] / lookups if lookups else 0.0)
+            if "entries" in stats:
+                entries.add_metric([cache], stats["entries"])
+        yield from (hits, misses, ratio, entries)
+
+        audit = audit_writer.get_stats()
+        yield GaugeMetricFamily("audit_writer_queue_depth", "Audit rows waiting to be inserted", value=audit["queued"])
+        rows = CounterMetricFamily("audit_writer_rows", "Audit rows by outcome", labels=["outcome"])
+        for outcome in ("enqueued", "written", "spilled", "replayed", "rejected"):
+            rows.add_metric([outcome], audit[outcome])
+        yield rows
+        yield CounterMetricFamily("audit_writer_failures", "Failed audit batch inserts", value=audit["failures"])
+
+        jobs = report_jobs.get_stats()
+        by_status = GaugeMetricFamily("report_jobs", "Report jobs by status", labels=["status"])
+        for status, count in jobs["jobs"].items():
+            by_status.add_metric([status], count)
+        yield by_status
+        yield GaugeMetricFamily(
+            "report_jobs_oldest_queued_seconds", "Age of the oldest queued report job",
+            value=jobs["oldest_queued_seconds"],
+        )
+
+
+def _check_access(request: Request) -> None:
+    token = settings.metrics_token
+    if token and hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        return
+    hosts = {host.strip() for host in settings.metrics_allowed_hosts.split(",") if host.strip()}
+    if request.client is not None and request.client.host in hosts:
+        return
+    raise HTTPException(status_code=403, detail="Metriklərə giriş qadağandır")
+
+
+def setup(app: FastAPI) -> bool:
+    """Instrument `app` and add GET /metrics; False when disabled or the packages are missing."""
+    global _statements_per_request, _statements_total
+    if not settings.metrics_enabled:
+        return False
+    try:
+        from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+        from prometheus_fastapi_instrumentator import Instrumentator
+    except ImportError:
+        logger.warning("metrics_enabled=true, but prometheus-fastapi-instrumentator is not installed; /metrics disabled")
+        return False
+
+    from sqlalchemy import event
+
+    from app.db.session import engine
+
+    if _statements_total is None:
+        _statements_per_request = Histogram(
+            "db_statements_per_request", "SQL statements executed while handling a request",
+            ["handler"], buckets=STATEMENT_BUCKETS,
+        )
+        _statements_total = Counter("db_statements", "SQL statements executed")
+        event.listen(engine, "before_cursor_execute", _count_statement)
+        if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+            REGISTRY.register(_StatsCollector())
+
+    Instrumentator(
+        should_group_status_codes=False,
+        should_instrument_requests_inprogress=True,
+        inprogress_labels=True,
+        excluded_handlers=["/metrics"],
+    ).instrument(app)
+    app.add_middleware(_StatementCountMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        _check_access(request)
+        registry = REGISTRY
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # Bir neçə worker: sayğaclar bütün proseslər üzrə toplanır, get_stats() göstəriciləri cavab verən worker-indir
+            from prometheus_client import multiprocess
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            registry.register(_StatsCollector())
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+    return True
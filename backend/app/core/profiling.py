@@ -0,0 +1,319 @@
+"""
+On-demand profiling of a single request (admins only).
+
+A request sent with `X-Profile: 1` or `?__profile=1` by an admin runs its
+endpoint under cProfile and a stack sampler (the flag is ignored for anyone
+else), and the results are stored in settings.request_profiles_dir:
+
+    <id>.prof       pstats (python -m pstats, snakeviz)
+    <id>.collapsed  sampled stacks, "frame;frame;frame count" (flamegraph.pl, speedscope)
+    <id>.html       request summary and the top functions by cumulative / own time
+    <id>.json       request metadata
+
+The response carries an X-Profile-Id header; GET /api/v1/profiles lists the
+stored profiles (newest request_profiles_max_count are kept). Endpoints are
+wrapped by ProfiledRoute (the route_class of the API routers), so profiling
+runs in the thread that executes the endpoint: sync endpoints run in the
+threadpool, which a middleware-level profiler would not see. Dependencies
+(authentication, DB session) are not part of the profile. One request per
+process is profiled at a time.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from html import escape
+from threading import Lock
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+SAMPLE_INTERVAL_SECONDS = 0.002
+HTML_TOP_FUNCTIONS = 40
+
+# kind -> (fayl uzantısı, media type)
+PROFILE_FILES = {
+    "html": ("html", "text/html; charset=utf-8"),
+    "pstats": ("prof", "application/octet-stream"),
+    "collapsed": ("collapsed", "text/plain; charset=utf-8"),
+}
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_session: ContextVar["_ProfileSession | None"] = ContextVar("request_profile", default=None)
+_lock = Lock()
+
+
+def profiles_dir() -> str:
+    path = os.path.abspath(settings.request_profiles_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _path(profile_id: str, extension: str) -> str:
+    return os.path.join(profiles_dir(), f"{profile_id}.{extension}")
+
+
+class _Sampler(threading.Thread):
+    """Records the stack of one thread every SAMPLE_INTERVAL_SECONDS as collapsed stack counts."""
+
+    def __init__(self, thread_id: int):
+        super().__init__(name="request-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.stacks: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class _ProfileSession:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.profile = cProfile.Profile()
+        self.stacks: Counter[str] = Counter()
+        self.endpoint_seconds = 0.0
+
+    def _start(self) -> _Sampler:
+        sampler = _Sampler(threading.get_ident())
+        sampler.start()
+        self.profile.enable()
+        return sampler
+
+    def _stop(self, sampler: _Sampler, started: float) -> None:
+        self.profile.disable()
+        self.endpoint_seconds += time.perf_counter() - started
+        sampler.stop()
+        self.stacks.update(sampler.stacks)
+
+    def run(self, func, args, kwargs):
+        started = time.perf_counter()
+        sampler = self._start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._stop(sampler, started)
+
+    async def run_async(self, func, args, kwargs):
+        # Event loop thread-i: eyni anda işləyən digər sorğuların korutinləri də profilə düşə bilər
+        started = time.perf_counter()
+        sampler = self._start()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._stop(sampler, started)
+
+    def save(self, meta: dict) -> None:
+        self.profile.dump_stats(_path(self.id, "prof"))
+        with open(_path(self.id, "collapsed"), "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        with open(_path(self.id, "html"), "w", encoding="utf-8") as f:
+            f.write(self._html(meta))
+        with open(_path(self.id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        _prune()
+
+    def _stats_text(self, sort: str) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(HTML_TOP_FUNCTIONS)
+        return stream.getvalue()
+
+    def _html(self, meta: dict) -> str:
+        rows = "".join(f"<tr><th>{escape(str(k))}</th><td>{escape(str(v))}</td></tr>" for k, v in meta.items())
+        return (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>Profil {escape(meta['method'])} {escape(meta['path'])}</title>"
+            "<style>body{font-family:sans-serif}pre{font-size:12px}th{text-align:left;padding-right:1em}</style>"
+            f"</head><body><h2>{escape(meta['method'])} {escape(meta['path'])}</h2><table>{rows}</table>"
+            f"<h3>Cumulative time</h3><pre>{escape(self._stats_text('cumulative'))}</pre>"
+            f"<h3>Own time</h3><pre>{escape(self._stats_text('tottime'))}</pre>"
+            "</body></html>"
+        )
+
+
+def _prune() -> None:
+    """Keep the newest request_profiles_max_count profiles."""
+    metas = sorted(
+        (name for name in os.listdir(profiles_dir()) if name.endswith(".json")),
+        key=lambda name: os.path.getmtime(os.path.join(profiles_dir(), name)),
+        reverse=True,
+    )
+    for name in metas[settings.request_profiles_max_count:]:
+        profile_id = name[:-5]
+        for extension in ("json", *(ext for ext, _ in PROFILE_FILES.values())):
+            try:
+                os.remove(_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> list[dict]:
+    profiles = []
+    for name in os.listdir(profiles_dir()):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(profiles_dir(), name), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_file(profile_id: str, kind: str) -> tuple[str, str, str]:
+    """(path, media type, download file name) of a stored profile file; 404 if missing."""
+    if kind not in PROFILE_FILES or not _PROFILE_ID.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profil tapılmadı")
+    extension, media_type = PROFILE_FILES[kind]
+    path = _path(profile_id, extension)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profil tapılmadı")
+    return path, media_type, f"profile_{profile_id}.{extension}"
+
+
+def wrap_endpoint(endpoint):
+    """Endpoint that runs under the current request's profile session, if there is one."""
+    if getattr(endpoint, "__profiled__", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            return await session.run_async(endpoint, args, kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return endpoint(*args, **kwargs)
+            return session.run(endpoint, args, kwargs)
+
+    # Köhnə FastAPI versiyaları annotasiyaları wrapper-in modulunda həll edir (from __future__ import annotations)
+    try:
+        wrapper.__signature__ = inspect.signature(endpoint, eval_str=True)
+    except Exception:
+        pass
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint can be profiled per request (see RequestProfilingMiddleware)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, wrap_endpoint(endpoint), **kwargs)
+
+
+def _requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.strip() == b"1"
+    return parse_qs(scope["query_string"].decode("latin-1")).get("__profile") == ["1"]
+
+
+def _admin_username(authorization: str) -> str | None:
+    """Username of the admin sending the request; None for anyone else (the flag is then ignored)."""
+    from app.api.deps import _authenticate
+    from app.db.session import SessionLocal
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    db = SessionLocal()
+    try:
+        user = _authenticate(db, token)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+    return user.username if user.is_admin else None
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        username = await run_in_threadpool(_admin_username, headers.get(b"authorization", b"").decode("latin-1"))
+        if username is None:
+            # Admin olmayanlar üçün bayraq nəzərə alınmır: sorğu adi qaydada işlənir
+            await self.app(scope, receive, send)
+            return
+        if not _lock.acquire(blocking=False):
+            response = JSONResponse({"detail": "Hazırda başqa sorğu profil edilir. Bir az sonra yenidən cəhd edin."}, status_code=429)
+            await response(scope, receive, send)
+            return
+
+        session = _ProfileSession()
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", session.id)
+            await send(message)
+
+        started = time.perf_counter()
+        token = _session.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _session.reset(token)
+            meta = {
+                "id": session.id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "status": status,
+                "username": username,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "endpoint_ms": round(session.endpoint_seconds * 1000, 1),
+                "samples": sum(session.stacks.values()),
+            }
+            try:
+                await run_in_threadpool(session.save, meta)
+            finally:
+                _lock.release()
@@ -0,0 +1,136 @@
+"""
+In-process resolver for small reference (lookup) tables.
+
+Keeps id -> record snapshots of every lookup model so that reports and
+serializers can resolve names without joining lookup tables. Values that are
+written to the database (e.g. the reg_num parts) are read from the tables.
+A table is reloaded when its version in app.core.lookup_cache changes (any
+write through LookupRepository) or when lookup_cache_ttl_seconds has passed,
+which also picks up writes made by other workers.
+
+Deleted lookup rows are kept on purpose: old appeals still reference them.
+"""
+from __future__ import annotations
+
+import time
+from collections import namedtuple
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import select
+
+from app.core import lookup_cache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.department import Department, DepOfficial
+from app.models.executor import Direction, ExecutorList
+from app.models.lookup import (
+    AccountIndex, ApIndex, ApStatus, ContentType,
+    ChiefInstruction, InSection, Section, UserSection,
+    WhoControl, Movzu, Holiday,
+)
+from app.models.organ import Organ
+from app.models.region import Region
+
+
+REFERENCE_MODELS = (
+    AccountIndex, ApIndex, ApStatus, ContentType,
+    ChiefInstruction, InSection, Section, UserSection,
+    WhoControl, Movzu, Holiday,
+    Department, DepOfficial, Region, Organ,
+    Direction, ExecutorList,
+)
+
+# Model -> sütun ki, adı (label) kimi göstərilir
+LABEL_FIELDS = {
+    AccountIndex: "account_index",
+    ApIndex: "ap_index",
+    ApStatus: "status",
+    ContentType: "content_type",
+    ChiefInstruction: "instructions",
+    InSection: "section",
+    Section: "section",
+    UserSection: "user_section",
+    WhoControl: "chief",
+    Movzu: "Movzu",
+    Holiday: "name",
+    Department: "department",
+    DepOfficial: "official",
+    Region: "region",
+    Organ: "Orqan",
+    Direction: "direction",
+    ExecutorList: "executor",
+}
+
+
+class _Table:
+    __slots__ = ("records", "version", "loaded_at")
+
+    def __init__(self, records: dict[int, Any], version: int, loaded_at: float):
+        self.records = records
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+class ReferenceDataResolver:
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._tables: dict[type, _Table] = {}
+        self._record_types = {
+            model: namedtuple(f"{model.__name__}Record", model.__mapper__.column_attrs.keys())
+            for model in REFERENCE_MODELS
+        }
+        self._lock = Lock()
+
+    def _is_fresh(self, model, table: _Table | None) -> bool:
+        return (
+            table is not None
+            and table.version == lookup_cache.get_version(model.__tablename__)
+            and time.monotonic() - table.loaded_at < settings.lookup_cache_ttl_seconds
+        )
+
+    def _load(self, model) -> _Table:
+        version = lookup_cache.get_version(model.__tablename__)
+        record_type = self._record_types[model]
+        columns = [getattr(model, key) for key in record_type._fields]
+        db = self._session_factory()
+        try:
+            rows = db.execute(select(*columns)).all()
+        finally:
+            db.close()
+        records = {row.id: record_type(*row) for row in rows}
+        return _Table(records, version, time.monotonic())
+
+    def table(self, model, force: bool = False) -> dict[int, Any]:
+        """Return the id -> record dictionary for a lookup model."""
+        table = self._tables.get(model)
+        if force or not self._is_fresh(model, table):
+            with self._lock:
+                table = self._tables.get(model)
+                if force or not self._is_fresh(model, table):
+                    table = self._load(model)
+                    self._tables[model] = table
+        return table.records
+
+    def get(self, model, id: int | None, refresh_on_miss: bool = False):
+        """Record for `id` or None. `refresh_on_miss` reloads once for rows created by another worker."""
+        if id is None:
+            return None
+        record = self.table(model).get(id)
+        if record is None and refresh_on_miss:
+            record = self.table(model, force=True).get(id)
+        return record
+
+    def label(self, model, id: int | None) -> str | None:
+        record = self.get(model, id)
+        return getattr(record, LABEL_FIELDS[model]) if record is not None else None
+
+    def invalidate(self, model=None) -> None:
+        with self._lock:
+            if model is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(model, None)
+
+
+reference_data = ReferenceDataResolver()
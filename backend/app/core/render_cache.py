@@ -0,0 +1,204 @@
+"""
+On-disk, content-addressed cache for rendered report files (xlsx/docx/pdf).
+
+The key is a hash of (report kind, format, normalized parameters, section
+scope, shared data version of the scope). The version comes from
+app.core.data_version and is read before rendering starts, so any appeal,
+executor or lookup write from any worker produces a new key, and a write that
+lands while a file is being rendered leaves that file under the old key,
+where it is never served again. Stale files are not deleted explicitly: they
+age out through eviction.
+
+Each entry is two files in a per-section subdirectory of
+settings.report_render_cache_dir ("section_<id>", or "all" for the admin
+scope): <key>.<ext> (the rendered file) and <key>.json (scope metadata,
+written last so a partly stored entry is never served). The directory is
+shared by all workers; a hit touches the file's mtime and eviction removes
+the least recently used entries above report_render_cache_max_bytes.
+Eviction scans the directory only when the size seen at the last scan plus
+the bytes this worker stored since then exceeds the budget, or when
+report_render_cache_scan_interval_seconds has passed (stores of other
+workers).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from threading import Lock
+from typing import BinaryIO
+
+from app.core.config import settings
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "scans": 0}
+_lock = Lock()
+# Son tam skanda ölçülən həcm, ondan sonra bu worker-in yazdığı baytlar və skan vaxtı
+_scanned_bytes: int | None = None
+_stored_since_scan = 0
+_scanned_at = 0.0
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    path: str
+    etag: str
+    size: int
+
+
+def cache_dir() -> str:
+    path = os.path.abspath(settings.report_render_cache_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def make_key(kind: str, fmt: str, params: tuple, user_section_id: int | None, data_version: tuple) -> str:
+    raw = json.dumps([kind, fmt, list(params), user_section_id, list(data_version)], default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _shard(user_section_id: int | None) -> str:
+    return "all" if user_section_id is None else f"section_{user_section_id}"
+
+
+def _shard_dir(user_section_id: int | None) -> str:
+    path = os.path.join(cache_dir(), _shard(user_section_id))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(key: str, extension: str, user_section_id: int | None) -> tuple[str, str]:
+    base = os.path.join(_shard_dir(user_section_id), key)
+    return f"{base}.{extension}", f"{base}.json"
+
+
+def _etag(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+def get(key: str, extension: str, user_section_id: int | None) -> CachedFile | None:
+    path, meta_path = _paths(key, extension, user_section_id)
+    # Meta faylı olmayan entry etibarsızdır (put onu sonda yazır, eviction əvvəlcə silir)
+    if not os.path.exists(meta_path):
+        _stats["misses"] += 1
+        return None
+    try:
+        os.utime(path)
+        size = os.path.getsize(path)
+    except OSError:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return CachedFile(path=path, etag=_etag(key), size=size)
+
+
+def put(
+    key: str,
+    extension: str,
+    fileobj: BinaryIO,
+    user_section_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> CachedFile | None:
+    """
+    Store a rendered file (read from its current position). Returns None and
+    leaves `fileobj` untouched when it is larger than the whole cache budget.
+    """
+    start = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell() - start
+    fileobj.seek(start)
+    if size > settings.report_render_cache_max_bytes:
+        return None
+
+    path, meta_path = _paths(key, extension, user_section_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        shutil.copyfileobj(fileobj, f)
+    os.replace(tmp_path, path)
+    meta = {
+        "user_section_id": user_section_id,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "extension": extension,
+        "stored_at": datetime.utcnow().isoformat(),
+    }
+    with open(f"{meta_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+    _stats["stores"] += 1
+
+    _maybe_evict(size, keep=path)
+    return CachedFile(path=path, etag=_etag(key), size=size)
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            # Windows-da hazırda göndərilən fayl silinmir; meta artıq silinibsə entry etibarsızdır
+            pass
+
+
+def _maybe_evict(stored: int, keep: str | None = None) -> int:
+    """Count `stored` bytes and run _evict() only when the budget may be exceeded (see module docstring)."""
+    global _stored_since_scan
+    with _lock:
+        _stored_since_scan += stored
+        due = (
+            _scanned_bytes is None
+            or _scanned_bytes + _stored_since_scan > settings.report_render_cache_max_bytes
+            or time.monotonic() - _scanned_at >= settings.report_render_cache_scan_interval_seconds
+        )
+    return _evict(keep) if due else 0
+
+
+def _evict(keep: str | None = None) -> int:
+    """Drop least recently used files until the directory fits the size budget."""
+    global _scanned_bytes, _stored_since_scan, _scanned_at
+    with _lock:
+        _stats["scans"] += 1
+        files = []
+        total = 0
+        for shard in os.scandir(cache_dir()):
+            if not shard.is_dir():
+                # Köhnə (bölməsiz) yerləşmədən qalan fayllar
+                _remove(shard.path)
+                continue
+            for entry in os.scandir(shard.path):
+                name = entry.name
+                if name.endswith((".json", ".tmp")):
+                    continue
+                stat = entry.stat()
+                key = name.split(".", 1)[0]
+                total += stat.st_size
+                files.append((stat.st_mtime, entry.path, os.path.join(shard.path, f"{key}.json")))
+
+        removed = 0
+        files.sort()
+        for _, path, meta_path in files:
+            if total <= settings.report_render_cache_max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= os.path.getsize(path)
+            _remove(meta_path, path)
+            removed += 1
+        _stats["evictions"] += removed
+        _scanned_bytes, _stored_since_scan, _scanned_at = total, 0, time.monotonic()
+        return removed
+
+
+def clear() -> None:
+    global _scanned_bytes, _stored_since_scan
+    with _lock:
+        shutil.rmtree(cache_dir(), ignore_errors=True)
+        _scanned_bytes, _stored_since_scan = 0, 0
+
+
+def get_stats() -> dict[str, int]:
+    return dict(_stats)
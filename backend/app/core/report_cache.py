@@ -0,0 +1,157 @@
+"""
+In-process cache for computed report results (appeal statistics).
+
+Entries are keyed by normalized report parameters plus the section scope and
+remember which section / reg_date range they cover. Appeal writes call
+`invalidate_appeal()` so only entries that could contain that appeal are
+dropped. Periods that ended before today are kept for
+`report_cache_closed_ttl_seconds` (None = indefinitely), open periods for
+`report_cache_ttl_seconds`.
+
+The cache is per worker process, so every entry also stores the caller's
+`data_version()` (app.core.data_version: counters in the database that
+invalidate_appeal() and lookup writes bump, shared by all workers) and a hit
+is only served while it is unchanged.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+from app.core import lookup_cache
+from app.core.config import settings
+from app.core.data_version import bump_appeal
+
+
+@dataclass
+class _Entry:
+    value: Any
+    user_section_id: int | None
+    start_date: date | None
+    end_date: date | None
+    expires_at: float | None
+    version: tuple | None = None
+
+
+_entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_lock = Lock()
+
+
+def _is_closed(end_date: date | None) -> bool:
+    return end_date is not None and end_date < date.today()
+
+
+def _ttl_for(end_date: date | None) -> float | None:
+    if _is_closed(end_date):
+        return settings.report_cache_closed_ttl_seconds
+    return settings.report_cache_ttl_seconds
+
+
+def get_or_compute(
+    kind: str,
+    params: tuple,
+    user_section_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+    compute: Callable[[], Any],
+    data_version: Callable[[], tuple | None] | None = None,
+) -> Any:
+    """
+    Return the cached result for (kind, params, scope) or compute and store it.
+    `user_section_id` None means "all sections" (admin scope). `data_version`
+    returns the shared version of the data in scope; entries are only served
+    while it is unchanged (writes made on other workers). When it returns
+    None (version unavailable) the result is computed and not cached.
+    """
+    if not settings.report_cache_enabled:
+        return compute()
+
+    # Lookup adları dəyişəndə köhnə adlar keşdə qalmasın
+    key = (kind, params, user_section_id, start_date, end_date, lookup_cache.get_generation())
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+            entry = None
+    # Versiya hesablamadan əvvəl oxunur: hesablama zamanı gələn yazılış növbəti oxunuşda görünür
+    version = data_version() if data_version is not None else None
+    if data_version is not None and version is None:
+        return compute()
+    if entry is not None and entry.version == version:
+        with _lock:
+            if key in _entries:
+                _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry.value
+
+    _stats["misses"] += 1
+    value = compute()
+    ttl = _ttl_for(end_date)
+    with _lock:
+        _entries[key] = _Entry(
+            value=value,
+            user_section_id=user_section_id,
+            start_date=start_date,
+            end_date=end_date,
+            expires_at=None if ttl is None else now + ttl,
+            version=version,
+        )
+        _entries.move_to_end(key)
+        while len(_entries) > settings.report_cache_max_entries:
+            _entries.popitem(last=False)
+    return value
+
+
+def covers(
+    scope_section_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+    user_section_id: int | None,
+    reg_date: datetime | date | None,
+) -> bool:
+    """Whether a report scoped to (section, start, end) can include an appeal of `user_section_id` on `reg_date`."""
+    if scope_section_id is not None and scope_section_id != user_section_id:
+        return False
+    if reg_date is None:
+        # reg_date-i olmayan müraciətlər yalnız tarix filtri olmayan hesabatlara düşür
+        return start_date is None and end_date is None
+    day = reg_date.date() if isinstance(reg_date, datetime) else reg_date
+    if start_date is not None and day < start_date:
+        return False
+    if end_date is not None and day > end_date:
+        return False
+    return True
+
+
+def invalidate_appeal(user_section_id: int | None, *reg_dates: datetime | date | None) -> int:
+    """
+    Drop entries that may include an appeal of `user_section_id` registered on
+    any of `reg_dates` (pass both old and new values on update) in this
+    worker, and bump the shared data version so the other workers and the
+    on-disk render_cache (keyed on it) stop serving them too.
+    """
+    dates = reg_dates or (None,)
+    with _lock:
+        stale = [
+            key for key, entry in _entries.items()
+            if any(covers(entry.user_section_id, entry.start_date, entry.end_date, user_section_id, d) for d in dates)
+        ]
+        for key in stale:
+            del _entries[key]
+        _stats["invalidations"] += len(stale)
+    bump_appeal(user_section_id, *reg_dates)
+    return len(stale)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def get_stats() -> dict[str, int]:
+    return {**_stats, "entries": len(_entries)}
@@ -0,0 +1,263 @@
+"""
+OpenTelemetry tracing.
+
+Optional: needs opentelemetry-sdk (+ opentelemetry-instrumentation-fastapi
+for route spans, opentelemetry-exporter-otlp-proto-http for OTLP; see
+requirements.optional.txt) and tracing_enabled=true. setup() then records:
+
+    route spans          "GET /api/v1/appeals/{appeal_id}" (FastAPIInstrumentor)
+    get_current_user     token check + user lookup (app/api/deps.py)
+    service/repository   "AppealService.create", "AppealRepository.get_by_id", ...:
+                         public methods of every *Service / *Repository class in
+                         app.services / app.repositories, wrapped at setup time
+    SQL                  "SQL SELECT" with db.statement, one per cursor execute
+    report phases        report.render (with fetch/prepare/render milliseconds of
+                         the streamed row pipeline as attributes), report.save
+
+Nothing is wrapped when tracing is disabled; span() is then a no-op context
+manager. Generator methods (iter_*) are not wrapped: the statements they run
+still appear as SQL spans under the calling span.
+"""
+from __future__ import annotations
+
+import functools
+import importlib
+import inspect
+import logging
+import pkgutil
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterable, Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# db.statement atributunun maksimal uzunluğu
+STATEMENT_MAX_LENGTH = 2000
+
+TRACED_PACKAGES = ("app.services", "app.repositories")
+TRACED_CLASS_SUFFIXES = ("Service", "Repository")
+
+_tracer = None
+_phases: ContextVar["_PhaseTimer | None"] = ContextVar("tracing_phases", default=None)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **attributes):
+    """Context manager for a child span of the current one; yields None when tracing is off."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+class _PhaseTimer:
+    """Exclusive time spent in nested iterator stages (an outer stage's clock stops while an inner one runs)."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self._stack: list[str] = []
+        self._since = 0.0
+
+    def _switch(self, enter: str | None) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            current = self._stack[-1]
+            self.seconds[current] = self.seconds.get(current, 0.0) + now - self._since
+        if enter is None:
+            self._stack.pop()
+        else:
+            self._stack.append(enter)
+        self._since = now
+
+    def wrap(self, iterable: Iterable, phase: str) -> Iterator:
+        iterator = iter(iterable)
+        while True:
+            self._switch(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._switch(None)
+            yield item
+
+
+def phase(iterable: Iterable, name: str) -> Iterable:
+    """Count time spent producing `iterable`'s items as phase `name` of the enclosing phased_span()."""
+    timer = _phases.get()
+    return iterable if timer is None else timer.wrap(iterable, name)
+
+
+@contextmanager
+def phased_span(name: str, **attributes):
+    """
+    span() for streamed work: iterators passed through phase() inside it add
+    their exclusive time as "<phase>_ms" attributes; the remainder (the
+    consumer, e.g. the file writer) is "render_ms".
+    """
+    if _tracer is None:
+        yield None
+        return
+    timer = _PhaseTimer()
+    token = _phases.set(timer)
+    started = time.perf_counter()
+    try:
+        with span(name, **attributes) as current:
+            try:
+                yield current
+            finally:
+                total = time.perf_counter() - started
+                for phase_name, seconds in timer.seconds.items():
+                    current.set_attribute(f"{phase_name}_ms", round(seconds * 1000, 1))
+                current.set_attribute("render_ms", round((total - sum(timer.seconds.values())) * 1000, 1))
+    finally:
+        _phases.reset(token)
+
+
+def _traced(func, span_name: str):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _tracer.start_as_current_span(span_name):
+            return func(*args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def _instrument_class(cls) -> int:
+    wrapped = 0
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        kind = type(attr) if isinstance(attr, (staticmethod, classmethod)) else None
+        func = attr.__func__ if kind else attr
+        if not inspect.isfunction(func) or getattr(func, "__traced__", False):
+            continue
+        if inspect.isgeneratorfunction(func) or inspect.iscoroutinefunction(func):
+            continue
+        wrapper = _traced(func, f"{cls.__name__}.{name}")
+        setattr(cls, name, kind(wrapper) if kind else wrapper)
+        wrapped += 1
+    return wrapped
+
+
+def _instrument_layers() -> int:
+    wrapped = 0
+    for package_name in TRACED_PACKAGES:
+        package = importlib.import_module(package_name)
+        for module_info in pkgutil.iter_modules(package.__path__):
+            module = importlib.import_module(f"{package_name}.{module_info.name}")
+            for _, cls in inspect.getmembers(module, inspect.isclass):
+                if cls.__module__ == module.__name__ and cls.__name__.endswith(TRACED_CLASS_SUFFIXES):
+                    wrapped += _instrument_class(cls)
+    return wrapped
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    from opentelemetry.trace import SpanKind
+
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._otel_span = _tracer.start_span(
+        f"SQL {operation}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:STATEMENT_MAX_LENGTH],
+            "db.executemany": bool(executemany),
+        },
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(context, "_otel_span", None)
+    if current is not None:
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            current.set_attribute("db.rowcount", cursor.rowcount)
+        current.end()
+        context._otel_span = None
+
+
+def _handle_error(exception_context):
+    from opentelemetry.trace import Status, StatusCode
+
+    context = exception_context.execution_context
+    current = getattr(context, "_otel_span", None) if context is not None else None
+    if current is not None:
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        context._otel_span = None
+
+
+def _exporter():
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    return ConsoleSpanExporter()
+
+
+def setup(app) -> bool:
+    """Configure the tracer provider and instrument `app`; False when disabled or the SDK is missing."""
+    global _tracer
+    if not settings.tracing_enabled:
+        return False
+    if _tracer is not None:
+        return True
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        exporter = _exporter()
+    except ImportError as e:
+        logger.warning("tracing_enabled=true, but OpenTelemetry is not installed (%s); tracing disabled", e)
+        return False
+
+    from sqlalchemy import event
+
+    from app.db.session import engine
+
+    # Yuxarı xidmətdən gələn qərara (traceparent) əməl olunur, yeni trace-lər nisbətlə seçilir
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("app")
+
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    except ImportError:
+        logger.warning("opentelemetry-instrumentation-fastapi is not installed; no route spans")
+    else:
+        FastAPIInstrumentor.instrument_app(app, tracer_provider=provider, excluded_urls="/metrics,/health")
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    wrapped = _instrument_layers()
+    logger.info("Tracing enabled: %s exporter, sample ratio %s, %d methods wrapped",
+                settings.tracing_exporter, settings.tracing_sample_ratio, wrapped)
+    return True
+
+
+def shutdown() -> None:
+    """Export spans still buffered in the batch processor (app shutdown)."""
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
@@ -19,20 +19,21 @@ from app.models.user import User
 logger = logging.getLogger(__name__)
 
 
-def run_bootstrap_superadmin() -> None:
+def run_bootstrap_superadmin() -> bool:
+    """False yalnız DB xətasında (startup_tasks növbəti başlanğıcda təkrarlayır)."""
     if not settings.bootstrap_superadmin_enabled:
-        return
+        return True
 
     username = (settings.bootstrap_superadmin_username or "superadmin").strip()
     if not username:
-        return
+        return True
 
     password_plain = settings.bootstrap_superadmin_password or settings.bootstrap_admin_password
     if not password_plain:
         logger.warning(
             "BOOTSTRAP_SUPERADMIN_PASSWORD / BOOTSTRAP_ADMIN_PASSWORD boşdur — env superadmin sinxronu atlanır."
         )
-        return
+        return True
 
     db = SessionLocal()
     try:
@@ -49,7 +50,7 @@ def run_bootstrap_superadmin() -> None:
             existing.password = hashed
             db.commit()
             logger.info("Env superadmin yeniləndi (şifrə + admin bayraqları): %s", username)
-            return
+            return True
 
         db.add(
             User(
@@ -64,11 +65,13 @@ def run_bootstrap_superadmin() -> None:
         )
         db.commit()
         logger.info("Env superadmin yaradıldı: %s", username)
+        return True
     except Exception as e:
         logger.warning("Bootstrap superadmin alınmadı (DB və ya sxema): %s", e)
         try:
             db.rollback()
         except Exception:
             pass
+        return False
     finally:
         db.close()
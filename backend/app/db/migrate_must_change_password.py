@@ -12,8 +12,8 @@ from app.db.session import engine
 logger = logging.getLogger(__name__)
 
 
-def run_migrate_must_change_password() -> None:
-    """Add Users.must_change_password column if it does not exist."""
+def run_migrate_must_change_password() -> bool:
+    """Add Users.must_change_password column if it does not exist. False if the migration failed."""
     try:
         url = str(engine.url)
         if "mssql" in url or "sqlserver" in url:
@@ -22,6 +22,8 @@ def run_migrate_must_change_password() -> None:
             _migrate_sqlite()
     except SQLAlchemyError as e:
         logger.warning("Migration must_change_password skipped or failed: %s", e)
+        return False
+    return True
 
 
 def _migrate_mssql() -> None:
@@ -55,3 +57,16 @@ def _migrate_mssql() -> None:
         conn.execute(text(f"ALTER TABLE [{schema}].[Users] ADD must_change_password BIT NOT NULL DEFAULT 0"))
         conn.commit()
         logger.info("Added column %s.Users.must_change_password", schema)
+
+
+def _migrate_sqlite() -> None:
+    with engine.connect() as conn:
+        columns = conn.execute(text("PRAGMA table_info(Users)")).all()
+        if not columns:
+            logger.warning("Users table not found in DB; migration skipped")
+            return
+        if any(column[1] == "must_change_password" for column in columns):
+            return
+        conn.execute(text("ALTER TABLE Users ADD COLUMN must_change_password BOOLEAN NOT NULL DEFAULT 0"))
+        conn.commit()
+        logger.info("Added column Users.must_change_password")
@@ -10,10 +10,15 @@ connect_args = {}
 if settings.database_url.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+engine_kwargs = {}
+if "mssql" in settings.database_url:
+    # pyodbc-only option; other dialects reject it
+    engine_kwargs["fast_executemany"] = True
+
 engine = create_engine(
     settings.database_url,
     connect_args=connect_args,
-    fast_executemany=True if "mssql" in settings.database_url else False,
+    **engine_kwargs,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,187 @@
+"""
+One-shot startup tasks for multi-worker deployments.
+
+Every API worker calls run_startup_tasks() on boot. A task runs only when
+its current version is not yet recorded in the StartupTasks table, and only
+in the worker that holds the startup lock: sp_getapplock on MSSQL (the lock
+lives as long as that worker's connection), an OS file lock otherwise.
+Workers that boot while another one is running the tasks wait for the lock,
+then find the versions recorded and skip; when everything is recorded no
+lock is taken at all.
+
+A task's version should change whenever it has to run again (e.g. the
+superadmin task hashes its env settings).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, NamedTuple
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.startup_task import StartupTask
+
+logger = logging.getLogger(__name__)
+
+LOCK_RESOURCE = "vmeq_startup_tasks"
+
+
+class Task(NamedTuple):
+    name: str
+    version: Callable[[], str]
+    run: Callable[[], bool | None]  # False = failed, retried on the next boot
+
+
+def _superadmin_version() -> str:
+    # Env dəyişəndə (parol, ad) tapşırıq yenidən işləyir
+    password = settings.bootstrap_superadmin_password or settings.bootstrap_admin_password or ""
+    raw = "\x1f".join([
+        str(settings.bootstrap_superadmin_enabled),
+        settings.bootstrap_superadmin_username or "",
+        hashlib.sha256(password.encode("utf-8")).hexdigest(),
+        settings.bootstrap_superadmin_surname or "",
+        settings.bootstrap_superadmin_name or "",
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _tasks() -> list[Task]:
+    from app.db.bootstrap_superadmin import run_bootstrap_superadmin
+    from app.db.migrate_must_change_password import run_migrate_must_change_password
+
+    return [
+        Task("migrate_must_change_password", lambda: "1", run_migrate_must_change_password),
+        Task("bootstrap_superadmin", _superadmin_version, run_bootstrap_superadmin),
+    ]
+
+
+def _is_mssql() -> bool:
+    return engine.dialect.name == "mssql"
+
+
+def _completed() -> dict[str, str]:
+    with engine.connect() as conn:
+        return {row.name: row.version for row in conn.execute(select(StartupTask.name, StartupTask.version))}
+
+
+def _record(name: str, version: str) -> None:
+    table = StartupTask.__table__
+    with engine.begin() as conn:
+        conn.execute(table.delete().where(table.c.name == name))
+        conn.execute(table.insert().values(name=name, version=version, completed_at=datetime.utcnow()))
+
+
+@contextmanager
+def _mssql_lock(timeout: float) -> Iterator[bool]:
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(
+                "DECLARE @r INT; "
+                "EXEC @r = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive', "
+                "@LockOwner = 'Session', @LockTimeout = :timeout; "
+                "SELECT @r"
+            ),
+            {"resource": LOCK_RESOURCE, "timeout": int(timeout * 1000)},
+        ).scalar()
+        acquired = result is not None and result >= 0
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(
+                    text("EXEC sp_releaseapplock @Resource = :resource, @LockOwner = 'Session'"),
+                    {"resource": LOCK_RESOURCE},
+                )
+            conn.commit()
+
+
+@contextmanager
+def _file_lock(timeout: float) -> Iterator[bool]:
+    path = os.path.abspath(settings.startup_tasks_lock_file)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            def try_lock() -> bool:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError:
+                    return False
+
+            def unlock() -> None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            def try_lock() -> bool:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return True
+                except OSError:
+                    return False
+
+            def unlock() -> None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        deadline = time.monotonic() + timeout
+        acquired = try_lock()
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(0.2)
+            acquired = try_lock()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                unlock()
+
+
+def _pending(tasks: list[Task]) -> list[tuple[Task, str]]:
+    done = _completed()
+    return [(task, version) for task in tasks for version in [task.version()] if done.get(task.name) != version]
+
+
+def run_startup_tasks() -> None:
+    """Run the startup tasks whose version is not recorded yet (see module docstring)."""
+    tasks = _tasks()
+    try:
+        StartupTask.__table__.create(engine, checkfirst=True)
+        # Sürətli yol: hamısı artıq icra olunubsa kilid götürülmür
+        if not _pending(tasks):
+            return
+    except SQLAlchemyError as e:
+        # Cədvəl yaradıla bilmirsə (icazə yoxdur) köhnə davranış: hər worker özü icra edir
+        logger.warning("StartupTasks table unavailable, running startup tasks unguarded: %s", e)
+        for task in tasks:
+            task.run()
+        return
+
+    lock = _mssql_lock if _is_mssql() else _file_lock
+    started = time.monotonic()
+    with lock(settings.startup_tasks_lock_timeout_seconds) as acquired:
+        if not acquired:
+            logger.warning("Startup lock not acquired in %ss; startup tasks skipped in this worker",
+                           settings.startup_tasks_lock_timeout_seconds)
+            return
+        # Kilidi gözləyərkən başqa worker tapşırıqları bitirmiş ola bilər
+        for task, version in _pending(tasks):
+            try:
+                ok = task.run()
+            except Exception as e:
+                logger.warning("Startup task %s failed: %s", task.name, e)
+                continue
+            if ok is False:
+                continue
+            _record(task.name, version)
+            logger.info("Startup task %s (version %s) completed", task.name, version)
+    logger.info("Startup tasks checked in %.2fs", time.monotonic() - started)
@@ -1,10 +1,15 @@
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
+from app.core import data_version, metrics, tracing
+from app.core.profiling import RequestProfilingMiddleware
 from app.core.config import settings
-from app.db.bootstrap_superadmin import run_bootstrap_superadmin
-from app.db.migrate_must_change_password import run_migrate_must_change_password
+from app.db.startup_tasks import run_startup_tasks
+from app.services import audit_writer, report_bundle, report_jobs
+from app.services.report import warm_up_exports
 from app import models  # noqa: F401 — ensure all models are loaded
 
 
@@ -13,8 +18,33 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     def _run_startup_migrations():
-        run_migrate_must_change_password()
-        run_bootstrap_superadmin()
+        # Bir worker icra edir, qalanları StartupTasks-da qeydə baxıb keçir
+        run_startup_tasks()
+        # Hesabat keşlərinin ortaq versiya sayğacları (checkfirst: hər worker üçün ucuzdur)
+        data_version.ensure_table()
+
+    @app.on_event("startup")
+    def _warm_up_exports():
+        if settings.report_export_warmup:
+            # Başlanğıcı gecikdirmir: kitabxanalar fonda yüklənir
+            threading.Thread(target=warm_up_exports, name="report-export-warmup", daemon=True).start()
+
+    @app.on_event("shutdown")
+    def _stop_report_pools():
+        report_jobs.shutdown()
+        report_bundle.shutdown()
+
+    @app.on_event("shutdown")
+    def _drain_audit_queue():
+        audit_writer.shutdown()
+
+    @app.on_event("shutdown")
+    def _flush_traces():
+        tracing.shutdown()
+
+    # CORS-dan əvvəl: add_middleware sonuncunu xarici edir, profilin 429 cavabı da CORS başlıqları alsın
+    if settings.request_profiling_enabled:
+        app.add_middleware(RequestProfilingMiddleware)
 
     origins = [o.strip() for o in settings.cors_allow_origins.split(",") if o.strip()]
     if origins:
@@ -28,8 +58,14 @@ def create_app() -> FastAPI:
             allow_credentials=allow_credentials,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Profile-Id"],
         )
 
+    # Prometheus: metrics_enabled=true və prometheus-fastapi-instrumentator quraşdırılıbsa
+    metrics.setup(app)
+    # OpenTelemetry: tracing_enabled=true və opentelemetry-sdk quraşdırılıbsa
+    tracing.setup(app)
+
     @app.get("/health")
     def health():
         return {"status": "ok"}
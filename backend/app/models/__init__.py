@@ -1,5 +1,6 @@
 from app.models.user import User
 from app.models.appeal import Appeal
+from app.models.appeal_stats import AppealDailyStat, AppealDirectionDailyStat
 from app.models.department import Department, DepOfficial
 from app.models.executor import Direction, ExecutorList, Executor
 from app.models.lookup import (
@@ -12,6 +13,9 @@ from app.models.organ import Organ
 from app.models.contact import Contact
 from app.models.citizen import Citizen
 from app.models.audit_log import AuditLog
+from app.models.audit_change import AuditChange
+from app.models.startup_task import StartupTask
+from app.models.report_data_version import ReportDataVersion
 from app.models.permission import (
     Permission, Role, RolePermission, UserRole, UserPermission,
     PermissionGroup, PermissionGroupItem
@@ -19,13 +23,14 @@ from app.models.permission import (
 
 __all__ = [
     "User", "Appeal",
+    "AppealDailyStat", "AppealDirectionDailyStat",
     "Department", "DepOfficial",
     "Direction", "ExecutorList", "Executor",
     "AccountIndex", "ApIndex", "ApStatus", "ContentType",
     "ChiefInstruction", "InSection", "Section", "UserSection",
     "WhoControl", "Movzu", "Holiday",
     "Region", "Organ", "Contact",
-    "AuditLog",
+    "AuditLog", "AuditChange", "StartupTask", "ReportDataVersion",
     "Permission", "Role", "RolePermission", "UserRole", "UserPermission",
     "PermissionGroup", "PermissionGroupItem",
 ]
@@ -0,0 +1,48 @@
+"""
+Maps to rollup tables: AppealDailyStats, AppealDirectionDailyStats
+
+Gündəlik müraciət sayları (statistika hesabatları üçün). Appeal yazılışı zamanı
+inkremental yenilənir, rebuild_appeal_rollups.py ilə yenidən qurulur/tutuşdurulur.
+Eyni ölçülər üçün bir neçə sətir ola bilər (paralel insert) — sorğular həmişə SUM edir.
+"""
+from datetime import date
+
+from sqlalchemy import Date, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AppealDailyStat(Base):
+    __tablename__ = "AppealDailyStats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date | None] = mapped_column(Date)  # reg_date günü
+    user_section_id: Mapped[int | None] = mapped_column(Integer)
+    dep_id: Mapped[int | None] = mapped_column(Integer)
+    region_id: Mapped[int | None] = mapped_column(Integer)
+    status: Mapped[int | None] = mapped_column(Integer)
+    ap_index_id: Mapped[int | None] = mapped_column(Integer)
+    InSection: Mapped[int | None] = mapped_column(Integer)
+    account_index_id: Mapped[int | None] = mapped_column(Integer)
+    content_type_id: Mapped[int | None] = mapped_column(Integer)
+    appeal_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index("IX_AppealDailyStats_day_section", "day", "user_section_id"),
+    )
+
+
+class AppealDirectionDailyStat(Base):
+    """İcra istiqaməti üzrə gündəlik (distinct) müraciət sayı"""
+    __tablename__ = "AppealDirectionDailyStats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date | None] = mapped_column(Date)
+    user_section_id: Mapped[int | None] = mapped_column(Integer)
+    direction_id: Mapped[int | None] = mapped_column(Integer)
+    appeal_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index("IX_AppealDirectionDailyStats_day_section", "day", "user_section_id"),
+    )
@@ -0,0 +1,43 @@
+"""
+Maps to table: AuditChanges
+
+Audit diff-lərinin sahə səviyyəsində normallaşdırılmış forması: AuditLogs-un
+hər sətri üçün dəyişən hər sahəyə bir sətir. "Kim X-i dəyişib" sorğuları
+JSON-u oxumadan indekslərlə cavablanır. AuditLogs ilə eyni yazılışda
+doldurulur (app/services/audit_changes.py), köhnə loglar üçün:
+backfill_audit_changes.py.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, Unicode
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+# Dəyərlər indekslənə bilsin deyə qısaldılır: (entity_type, field, new_value) açarı MSSQL-in 900 bayt limitinə sığır
+VALUE_MAX_LENGTH = 250
+
+
+class AuditChange(Base):
+    __tablename__ = "AuditChanges"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    audit_id: Mapped[int] = mapped_column(Integer)  # AuditLogs.id
+    entity_type: Mapped[str] = mapped_column(Unicode(50))
+    entity_id: Mapped[int] = mapped_column(Integer)
+    field: Mapped[str] = mapped_column(Unicode(100))
+    old_value: Mapped[str | None] = mapped_column(Unicode(VALUE_MAX_LENGTH))
+    new_value: Mapped[str | None] = mapped_column(Unicode(VALUE_MAX_LENGTH))
+    created_by: Mapped[int | None] = mapped_column(Integer)
+    created_by_name: Mapped[str | None] = mapped_column(Unicode(100))
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("IX_AuditChanges_field", "entity_type", "field", "created_at", "id"),
+        Index("IX_AuditChanges_field_value", "entity_type", "field", "new_value"),
+        Index("IX_AuditChanges_entity", "entity_type", "entity_id", "created_at"),
+        Index("IX_AuditChanges_user", "created_by", "created_at"),
+        Index("IX_AuditChanges_audit", "audit_id"),
+    )
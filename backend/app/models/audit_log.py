@@ -5,7 +5,7 @@ Stores all operations for audit trail
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import DateTime, Integer, String, Text, ForeignKey, Unicode, UnicodeText
+from sqlalchemy import DateTime, Index, Integer, String, Text, ForeignKey, Unicode, UnicodeText
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -27,3 +27,12 @@ class AuditLog(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     ip_address: Mapped[str | None] = mapped_column(String(45))  # IPv4 or IPv6
     user_agent: Mapped[str | None] = mapped_column(String(500))  # Browser info
+
+    # Hamısı (…, created_at, id) ilə bitir: filtr + keyset səhifələmə sortsuz
+    # oxunur (migrations/add_audit_log_indexes.sql)
+    __table_args__ = (
+        Index("IX_AuditLogs_created_at_id", "created_at", "id"),
+        Index("IX_AuditLogs_entity", "entity_type", "entity_id", "created_at", "id"),
+        Index("IX_AuditLogs_created_by", "created_by", "created_at", "id"),
+        Index("IX_AuditLogs_action", "action", "created_at", "id"),
+    )
@@ -61,11 +61,3 @@ class Executor(Base):
         primaryjoin="Executor.direction_id == foreign(Direction.id)",
         viewonly=True
     )
-
-    @property
-    def executor_name(self):
-        return self.executor_list.executor if self.executor_list else None
-
-    @property
-    def direction_name(self):
-        return self.direction.direction if self.direction else None
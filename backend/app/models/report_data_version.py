@@ -0,0 +1,23 @@
+"""
+Maps to table: ReportDataVersions
+
+Hesabat keşlərinin (report_cache, render_cache) bütün worker-lər üçün ortaq
+versiya sayğacları (app/core/data_version.py). Hər sətir bir (scope, ay)
+cütüdür: scope "s<bölmə id>", "all" (admin) və ya "reference" (lookup
+cədvəlləri); month YYYYMM, tarixsiz müraciətlər üçün 0. Cədvəl yoxdursa
+startup zamanı yaradılır.
+"""
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Integer, Unicode
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ReportDataVersion(Base):
+    __tablename__ = "ReportDataVersions"
+
+    scope: Mapped[str] = mapped_column(Unicode(20), primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,22 @@
+"""
+Maps to table: StartupTasks
+
+Bir dəfəlik startup tapşırıqlarının (app/db/startup_tasks.py) tamamlanmış
+versiyaları. Cədvəl yoxdursa startup zamanı yaradılır.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Unicode
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class StartupTask(Base):
+    __tablename__ = "StartupTasks"
+
+    name: Mapped[str] = mapped_column(Unicode(100), primary_key=True)
+    version: Mapped[str] = mapped_column(Unicode(64))
+    completed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
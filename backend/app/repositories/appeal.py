@@ -2,14 +2,32 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_
 from datetime import datetime
 
+from app.core.config import settings
 from app.models.appeal import Appeal
-from app.models.executor import Executor
+from app.repositories.appeal_stats import AppealStatsRepository
 
 
 class AppealRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    def _rollups(self) -> AppealStatsRepository | None:
+        # Statistika rollup cədvəlləri müraciətlə eyni tranzaksiyada yenilənir
+        return AppealStatsRepository(self.db) if settings.appeal_rollups_enabled else None
+
+    def _move_rollups(self, obj: Appeal, change) -> None:
+        """Apply `change(obj)` and move the appeal's rollup counts accordingly (no commit)."""
+        stats = self._rollups()
+        if stats is None:
+            change(obj)
+            return
+        old = stats.snapshot(obj)
+        directions = stats.directions_of(obj.id)
+        change(obj)
+        new = stats.snapshot(obj)
+        stats.apply(old, new)
+        stats.apply_directions(old, directions, new, directions)
+
     def list(
         self,
         dep_id: int | None = None,
@@ -22,8 +40,7 @@ class AppealRepository:
         include_deleted: bool = False,
     ) -> list[Appeal]:
         query = self.db.query(Appeal).options(
-            joinedload(Appeal.executors).joinedload(Executor.executor_list),
-            joinedload(Appeal.executors).joinedload(Executor.direction),
+            joinedload(Appeal.executors),
             joinedload(Appeal.contacts)
         )
         
@@ -91,8 +108,7 @@ class AppealRepository:
 
     def get(self, appeal_id: int, include_deleted: bool = False) -> Appeal | None:
         query = self.db.query(Appeal).options(
-            joinedload(Appeal.executors).joinedload(Executor.executor_list),
-            joinedload(Appeal.executors).joinedload(Executor.direction),
+            joinedload(Appeal.executors),
             joinedload(Appeal.contacts)
         ).filter(Appeal.id == appeal_id)
         if not include_deleted:
@@ -110,6 +126,9 @@ class AppealRepository:
         obj.created_by_name = user_name
         obj.created_at = datetime.utcnow()
         self.db.add(obj)
+        stats = self._rollups()
+        if stats is not None:
+            stats.apply(None, stats.snapshot(obj))
         self.db.commit()
         self.db.refresh(obj)
         return obj
@@ -128,9 +147,12 @@ class AppealRepository:
         user_name: str | None = None,
     ) -> Appeal:
         """Update an appeal with user tracking"""
-        for key, value in updates.items():
-            if hasattr(obj, key):
-                setattr(obj, key, value)
+        def change(appeal: Appeal) -> None:
+            for key, value in updates.items():
+                if hasattr(appeal, key):
+                    setattr(appeal, key, value)
+
+        self._move_rollups(obj, change)
         
         obj.updated_by = user_id
         obj.updated_by_name = user_name
@@ -148,7 +170,7 @@ class AppealRepository:
         user_name: str | None = None,
     ) -> Appeal:
         """Soft delete an appeal"""
-        obj.is_deleted = True
+        self._move_rollups(obj, lambda appeal: setattr(appeal, "is_deleted", True))
         obj.updated_by = user_id
         obj.updated_by_name = user_name
         obj.updated_at = datetime.utcnow()
@@ -165,7 +187,7 @@ class AppealRepository:
         user_name: str | None = None,
     ) -> Appeal:
         """Restore a soft-deleted appeal"""
-        obj.is_deleted = False
+        self._move_rollups(obj, lambda appeal: setattr(appeal, "is_deleted", False))
         obj.updated_by = user_id
         obj.updated_by_name = user_name
         obj.updated_at = datetime.utcnow()
@@ -0,0 +1,313 @@
+"""
+Repository for the appeal statistics rollup tables (AppealDailyStats,
+AppealDirectionDailyStats).
+
+Write path: AppealRepository / executor endpoints call apply() and
+apply_directions() with before/after snapshots; the caller commits.
+Read path: sum_by() / sum_by_direction() for ReportRepository.get_appeal_stats.
+Maintenance: rebuild() and reconcile() (see rebuild_appeal_rollups.py).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Date, and_, cast, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.appeal import Appeal
+from app.models.appeal_stats import AppealDailyStat, AppealDirectionDailyStat
+from app.models.executor import Executor
+
+# Appeals sütunları ki, rollup-da ölçü kimi saxlanılır (adlar hər iki cədvəldə eynidir)
+DIMENSIONS = (
+    "user_section_id", "dep_id", "region_id", "status",
+    "ap_index_id", "InSection", "account_index_id", "content_type_id",
+)
+
+# (day, user_section_id, dep_id, ...) və ya silinmiş müraciət üçün None
+Snapshot = tuple | None
+
+
+def _match(model, values: dict):
+    return [
+        getattr(model, key).is_(None) if value is None else getattr(model, key) == value
+        for key, value in values.items()
+    ]
+
+
+def _not_deleted():
+    # In some legacy DBs, is_deleted might be NULL instead of False. Handle both.
+    return or_(Appeal.is_deleted == False, Appeal.is_deleted == None)
+
+
+class AppealStatsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- write path ----
+
+    @staticmethod
+    def snapshot(appeal: Appeal) -> Snapshot:
+        """Rollup key of an appeal in its current state."""
+        if appeal.is_deleted:
+            return None
+        day = appeal.reg_date.date() if appeal.reg_date else None
+        return (day,) + tuple(getattr(appeal, dim) for dim in DIMENSIONS)
+
+    def directions_of(self, appeal_id: int) -> set[int]:
+        rows = (
+            self.db.query(Executor.direction_id)
+            .filter(Executor.appeal_id == appeal_id, Executor.direction_id != None)
+            .distinct()
+            .all()
+        )
+        return {row[0] for row in rows}
+
+    def apply(self, old: Snapshot, new: Snapshot) -> None:
+        """Move one appeal from `old` to `new` rollup key. Does not commit."""
+        if old == new:
+            return
+        if old is not None:
+            self._add(AppealDailyStat, dict(zip(("day",) + DIMENSIONS, old)), -1)
+        if new is not None:
+            self._add(AppealDailyStat, dict(zip(("day",) + DIMENSIONS, new)), 1)
+
+    def apply_directions(
+        self,
+        old: Snapshot,
+        old_directions: set[int],
+        new: Snapshot,
+        new_directions: set[int],
+    ) -> None:
+        """Same as apply() for the (day, section, direction) rollup. Does not commit."""
+        old_keys = {(old[0], old[1], d) for d in old_directions} if old is not None else set()
+        new_keys = {(new[0], new[1], d) for d in new_directions} if new is not None else set()
+        for day, section_id, direction_id in old_keys - new_keys:
+            self._add(
+                AppealDirectionDailyStat,
+                {"day": day, "user_section_id": section_id, "direction_id": direction_id},
+                -1,
+            )
+        for day, section_id, direction_id in new_keys - old_keys:
+            self._add(
+                AppealDirectionDailyStat,
+                {"day": day, "user_section_id": section_id, "direction_id": direction_id},
+                1,
+            )
+
+    def _add(self, model, values: dict, delta: int) -> None:
+        row_id = (
+            self.db.query(model.id)
+            .filter(*_match(model, values))
+            .order_by(model.id)
+            .limit(1)
+            .scalar()
+        )
+        if row_id is None:
+            self.db.add(model(**values, appeal_count=delta))
+            self.db.flush()
+        else:
+            self.db.query(model).filter(model.id == row_id).update(
+                {model.appeal_count: model.appeal_count + delta},
+                synchronize_session=False,
+            )
+
+    # ---- read path ----
+
+    @staticmethod
+    def _range_filters(model, start_date: date | None, end_date: date | None, user_section_id: int | None):
+        filters = []
+        if user_section_id is not None:
+            filters.append(model.user_section_id == user_section_id)
+        if start_date:
+            filters.append(model.day >= start_date)
+        if end_date:
+            filters.append(model.day <= end_date)
+        return filters
+
+    def sum_by(
+        self,
+        dimension: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        user_section_id: int | None = None,
+    ):
+        """[(id, count)] grouped by one of DIMENSIONS."""
+        column = getattr(AppealDailyStat, dimension)
+        total = func.sum(AppealDailyStat.appeal_count)
+        return (
+            self.db.query(column.label("id"), total.label("count"))
+            .filter(*self._range_filters(AppealDailyStat, start_date, end_date, user_section_id))
+            .group_by(column)
+            .having(total != 0)
+            .all()
+        )
+
+    def sum_by_direction(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        user_section_id: int | None = None,
+    ):
+        """[(direction_id, distinct appeal count)]. Each appeal has one day, so daily sums stay distinct."""
+        model = AppealDirectionDailyStat
+        total = func.sum(model.appeal_count)
+        return (
+            self.db.query(model.direction_id.label("id"), total.label("count"))
+            .filter(*self._range_filters(model, start_date, end_date, user_section_id))
+            .group_by(model.direction_id)
+            .having(total != 0)
+            .all()
+        )
+
+    # ---- maintenance ----
+
+    def _day_expr(self):
+        if self.db.get_bind().dialect.name == "sqlite":
+            return func.date(Appeal.reg_date)
+        return cast(Appeal.reg_date, Date)
+
+    @staticmethod
+    def _appeal_range(start_date: date | None, end_date: date | None, null_day: bool):
+        if null_day:
+            return [Appeal.reg_date == None]
+        filters = []
+        if start_date:
+            filters.append(Appeal.reg_date >= datetime.combine(start_date, time.min))
+        if end_date:
+            filters.append(Appeal.reg_date < datetime.combine(end_date + timedelta(days=1), time.min))
+        return filters
+
+    @staticmethod
+    def _rollup_range(model, start_date: date | None, end_date: date | None, null_day: bool):
+        if null_day:
+            return [model.day == None]
+        filters = []
+        if start_date:
+            filters.append(model.day >= start_date)
+        if end_date:
+            filters.append(model.day <= end_date)
+        return filters
+
+    def rebuild(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        null_day: bool = False,
+    ) -> None:
+        """
+        Recompute both rollup tables from Appeals for a day range (all days
+        when no range; `null_day` for appeals without reg_date). Commits.
+        """
+        full = start_date is None and end_date is None and not null_day
+        day = self._day_expr().label("day")
+        appeal_filters = [_not_deleted()] + self._appeal_range(start_date, end_date, null_day)
+
+        for model in (AppealDailyStat, AppealDirectionDailyStat):
+            stmt = delete(model)
+            if not full:
+                stmt = stmt.where(and_(*self._rollup_range(model, start_date, end_date, null_day)))
+            self.db.execute(stmt)
+
+        dims = [getattr(Appeal, dim) for dim in DIMENSIONS]
+        daily = (
+            select(day, *dims, func.count(Appeal.id))
+            .where(*appeal_filters)
+            .group_by(day, *dims)
+        )
+        self.db.execute(
+            insert(AppealDailyStat).from_select(["day", *DIMENSIONS, "appeal_count"], daily)
+        )
+
+        by_direction = (
+            select(day, Appeal.user_section_id, Executor.direction_id, func.count(func.distinct(Appeal.id)))
+            .select_from(Appeal)
+            .join(Executor, Executor.appeal_id == Appeal.id)
+            .where(Executor.direction_id != None, *appeal_filters)
+            .group_by(day, Appeal.user_section_id, Executor.direction_id)
+        )
+        self.db.execute(
+            insert(AppealDirectionDailyStat).from_select(
+                ["day", "user_section_id", "direction_id", "appeal_count"], by_direction
+            )
+        )
+        self.db.commit()
+
+    def _raw_counts(self, start_date, end_date) -> dict[tuple, int]:
+        day = self._day_expr()
+        dims = [getattr(Appeal, dim) for dim in DIMENSIONS]
+        rows = (
+            self.db.query(day, *dims, func.count(Appeal.id))
+            .filter(_not_deleted(), *self._appeal_range(start_date, end_date, False))
+            .group_by(day, *dims)
+            .all()
+        )
+        return {self._normalize_key(row[:-1]): row[-1] for row in rows}
+
+    def _rollup_counts(self, start_date, end_date) -> dict[tuple, int]:
+        model = AppealDailyStat
+        dims = [getattr(model, dim) for dim in DIMENSIONS]
+        total = func.sum(model.appeal_count)
+        rows = (
+            self.db.query(model.day, *dims, total)
+            .filter(*self._rollup_range(model, start_date, end_date, False))
+            .group_by(model.day, *dims)
+            .having(total != 0)
+            .all()
+        )
+        return {self._normalize_key(row[:-1]): row[-1] for row in rows}
+
+    def _raw_direction_counts(self, start_date, end_date) -> dict[tuple, int]:
+        day = self._day_expr()
+        rows = (
+            self.db.query(day, Appeal.user_section_id, Executor.direction_id, func.count(func.distinct(Appeal.id)))
+            .select_from(Appeal)
+            .join(Executor, Executor.appeal_id == Appeal.id)
+            .filter(Executor.direction_id != None, _not_deleted(), *self._appeal_range(start_date, end_date, False))
+            .group_by(day, Appeal.user_section_id, Executor.direction_id)
+            .all()
+        )
+        return {self._normalize_key(row[:-1]): row[-1] for row in rows}
+
+    def _rollup_direction_counts(self, start_date, end_date) -> dict[tuple, int]:
+        model = AppealDirectionDailyStat
+        total = func.sum(model.appeal_count)
+        rows = (
+            self.db.query(model.day, model.user_section_id, model.direction_id, total)
+            .filter(*self._rollup_range(model, start_date, end_date, False))
+            .group_by(model.day, model.user_section_id, model.direction_id)
+            .having(total != 0)
+            .all()
+        )
+        return {self._normalize_key(row[:-1]): row[-1] for row in rows}
+
+    @staticmethod
+    def _normalize_key(key) -> tuple:
+        day = key[0]
+        if isinstance(day, datetime):
+            day = day.date()
+        elif isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        return (day,) + tuple(key[1:])
+
+    def reconcile(self, start_date: date | None = None, end_date: date | None = None) -> list[date | None]:
+        """
+        Compare rollups with Appeals for the range and rebuild only the days
+        that differ. Returns the rebuilt days (None = appeals without reg_date).
+        """
+        stale: set[date | None] = set()
+        for raw, rolled in (
+            (self._raw_counts(start_date, end_date), self._rollup_counts(start_date, end_date)),
+            (self._raw_direction_counts(start_date, end_date), self._rollup_direction_counts(start_date, end_date)),
+        ):
+            for key in raw.keys() | rolled.keys():
+                if raw.get(key, 0) != rolled.get(key, 0):
+                    stale.add(key[0])
+
+        for day in sorted(stale, key=lambda d: (d is not None, d or date.min)):
+            if day is None:
+                if start_date is None and end_date is None:
+                    self.rebuild(null_day=True)
+            else:
+                self.rebuild(day, day)
+        return sorted(stale, key=lambda d: (d is not None, d or date.min))
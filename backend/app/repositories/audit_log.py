@@ -5,34 +5,47 @@ from __future__ import annotations
 
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, func, not_, or_
 
+from app.core.config import settings
+from app.models.audit_change import AuditChange
 from app.models.audit_log import AuditLog
 
+# IX_AuditLogs_entity açar + INCLUDE sütunları (migrations/add_audit_log_indexes.sql)
+HISTORY_SUMMARY_COLUMNS = (
+    AuditLog.id, AuditLog.entity_type, AuditLog.entity_id, AuditLog.created_at,
+    AuditLog.action, AuditLog.created_by, AuditLog.created_by_name,
+)
+
 
 class AuditLogRepository:
     def __init__(self, db: Session):
         self.db = db
 
     def create(self, log: AuditLog) -> AuditLog:
-        """Create a new audit log entry"""
+        """Create a new audit log entry (and its AuditChanges rows when enabled)"""
         self.db.add(log)
+        if settings.audit_changes_enabled:
+            from app.services.audit_changes import changes_for
+
+            self.db.flush()
+            row = {column.key: getattr(log, column.key) for column in AuditLog.__table__.columns}
+            self.db.add_all(AuditChange(**change) for change in changes_for(row, log.id))
         self.db.commit()
         self.db.refresh(log)
         return log
 
-    def list(
+    def _filtered(
         self,
+        query,
         entity_type: str | None = None,
         entity_id: int | None = None,
         created_by: int | None = None,
         action: str | None = None,
-        limit: int = 50,
-        offset: int = 0,
-    ) -> list[AuditLog]:
-        """List audit logs with filters"""
-        query = self.db.query(AuditLog)
-        
+        start: datetime | None = None,
+        end: datetime | None = None,
+        archived: tuple[tuple[datetime, int], ...] = (),
+    ):
         if entity_type is not None:
             query = query.filter(AuditLog.entity_type == entity_type)
         if entity_id is not None:
@@ -41,8 +54,50 @@ class AuditLogRepository:
             query = query.filter(AuditLog.created_by == created_by)
         if action is not None:
             query = query.filter(AuditLog.action == action)
-        
-        return query.order_by(desc(AuditLog.created_at)).limit(limit).offset(offset).all()
+        if start is not None:
+            query = query.filter(AuditLog.created_at >= start)
+        if end is not None:
+            query = query.filter(AuditLog.created_at < end)
+        return self._exclude_archived(query, archived)
+
+    @staticmethod
+    def _exclude_archived(query, archived: tuple[tuple[datetime, int], ...]):
+        """Leave out rows already copied to audit_archive but not yet deleted (audit_archive.in_table())."""
+        for cutoff, max_id in archived:
+            query = query.filter(not_(and_(AuditLog.created_at < cutoff, AuditLog.id <= max_id)))
+        return query
+
+    def list(
+        self,
+        entity_type: str | None = None,
+        entity_id: int | None = None,
+        created_by: int | None = None,
+        action: str | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+        archived: tuple[tuple[datetime, int], ...] = (),
+    ) -> list[AuditLog]:
+        """
+        List audit logs with filters, newest first by (created_at, id).
+        `before` is a keyset cursor: only rows strictly older than that
+        (created_at, id) pair, and `offset` is then not used.
+        """
+        query = self._filtered(self.db.query(AuditLog), entity_type, entity_id, created_by, action, start, end, archived)
+        if before is not None:
+            created_at, id = before
+            query = query.filter(or_(
+                AuditLog.created_at < created_at,
+                and_(AuditLog.created_at == created_at, AuditLog.id < id),
+            ))
+            offset = 0
+        # IX_AuditLogs_* indekslərinin (…, created_at, id) sırası ilə eyni: ayrıca sort lazım deyil
+        query = query.order_by(desc(AuditLog.created_at), desc(AuditLog.id))
+        if offset:
+            query = query.offset(offset)
+        return query.limit(limit).all()
 
     def count(
         self,
@@ -50,24 +105,82 @@ class AuditLogRepository:
         entity_id: int | None = None,
         created_by: int | None = None,
         action: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        archived: tuple[tuple[datetime, int], ...] = (),
     ) -> int:
         """Count audit logs matching filters"""
-        query = self.db.query(AuditLog)
-        
-        if entity_type is not None:
-            query = query.filter(AuditLog.entity_type == entity_type)
-        if entity_id is not None:
-            query = query.filter(AuditLog.entity_id == entity_id)
-        if created_by is not None:
-            query = query.filter(AuditLog.created_by == created_by)
-        if action is not None:
-            query = query.filter(AuditLog.action == action)
-        
-        return query.count()
+        query = self._filtered(
+            self.db.query(func.count(AuditLog.id)), entity_type, entity_id, created_by, action, start, end, archived,
+        )
+        return query.scalar() or 0
 
-    def get_entity_history(self, entity_type: str, entity_id: int) -> list[AuditLog]:
-        """Get complete history of changes for an entity"""
-        return self.db.query(AuditLog).filter(
+    def get_entity_history(
+        self,
+        entity_type: str,
+        entity_id: int,
+        summary: bool = False,
+        archived: tuple[tuple[datetime, int], ...] = (),
+    ) -> list[AuditLog] | list:
+        """
+        Get complete history of changes for an entity. Seeks
+        IX_AuditLogs_entity in index order; with `summary` only the columns
+        that index covers are read (no lookups into the table rows).
+        """
+        columns = HISTORY_SUMMARY_COLUMNS if summary else (AuditLog,)
+        query = self.db.query(*columns).filter(
             AuditLog.entity_type == entity_type,
             AuditLog.entity_id == entity_id
-        ).order_by(desc(AuditLog.created_at)).all()
+        )
+        return self._exclude_archived(query, archived).order_by(desc(AuditLog.created_at), desc(AuditLog.id)).all()
+
+    def list_changes(
+        self,
+        entity_type: str | None = None,
+        entity_id: int | None = None,
+        field: str | None = None,
+        old_value: str | None = None,
+        new_value: str | None = None,
+        created_by: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        user_section_id: int | None = None,
+        limit: int = 50,
+        before: tuple[datetime, int] | None = None,
+    ) -> list[AuditChange]:
+        """
+        Field-level changes, newest first by (created_at, id), e.g. who
+        changed `status` of appeals in a section last month.
+        `user_section_id` restricts to appeals of that section.
+        """
+        query = self.db.query(AuditChange)
+        if user_section_id is not None:
+            from app.models.appeal import Appeal
+
+            query = query.join(Appeal, Appeal.id == AuditChange.entity_id).filter(
+                AuditChange.entity_type == "Appeal",
+                Appeal.user_section_id == user_section_id,
+            )
+        if entity_type is not None:
+            query = query.filter(AuditChange.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.filter(AuditChange.entity_id == entity_id)
+        if field is not None:
+            query = query.filter(AuditChange.field == field)
+        if old_value is not None:
+            query = query.filter(AuditChange.old_value == old_value)
+        if new_value is not None:
+            query = query.filter(AuditChange.new_value == new_value)
+        if created_by is not None:
+            query = query.filter(AuditChange.created_by == created_by)
+        if start is not None:
+            query = query.filter(AuditChange.created_at >= start)
+        if end is not None:
+            query = query.filter(AuditChange.created_at < end)
+        if before is not None:
+            created_at, id = before
+            query = query.filter(or_(
+                AuditChange.created_at < created_at,
+                and_(AuditChange.created_at == created_at, AuditChange.id < id),
+            ))
+        return query.order_by(desc(AuditChange.created_at), desc(AuditChange.id)).limit(limit).all()
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.models.executor import Executor, ExecutorList
 
@@ -11,23 +11,11 @@ class ExecutorRepository:
         """
         Return all executors for a given appeal.
 
-        Executor model already has relationships + properties:
-        - executor_name -> ExecutorList.executor
-        - direction_name -> Direction.direction
-
-        Ona görə ayrıca manual field yazmağa ehtiyac yoxdur, yalnız
-        joinedload ilə əlaqələri eager-load etmək kifayətdir.
+        executor_name / direction_name are filled by ExecutorOut from the
+        reference_data resolver, ona görə lookup cədvəllərini join etməyə
+        ehtiyac yoxdur.
         """
-        from app.models.executor import Direction
-
-        query = (
-            self.db.query(Executor)
-            .options(
-                joinedload(Executor.executor_list),
-                joinedload(Executor.direction),
-            )
-            .filter(Executor.appeal_id == appeal_id)
-        )
+        query = self.db.query(Executor).filter(Executor.appeal_id == appeal_id)
         return query.all()
 
     def get(self, executor_id: int) -> Executor | None:
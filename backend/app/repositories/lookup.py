@@ -3,17 +3,32 @@ Generic lookup repository for all reference data tables
 """
 from sqlalchemy.orm import Session
 
+from app.core import data_version, lookup_cache
+
+
+def soft_delete_column(model_class):
+    """IsDeleted (or Organs-style isDeleted) column of a lookup model, if any."""
+    for name in ("IsDeleted", "isDeleted"):
+        if hasattr(model_class, name):
+            return getattr(model_class, name)
+    return None
+
 
 class LookupRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    @staticmethod
+    def _changed(table_name: str) -> None:
+        lookup_cache.bump(table_name)
+        # Bütün worker-lərin hesabat keşləri köhnəlir (adlar, ap_index_id kimi sahələr)
+        data_version.bump_reference()
+
     def list_all(self, model_class, active_only: bool = True):
         query = self.db.query(model_class)
-        if active_only and hasattr(model_class, "IsDeleted"):
-            query = query.filter(
-                (model_class.IsDeleted == False) | (model_class.IsDeleted == None)
-            )
+        deleted_col = soft_delete_column(model_class)
+        if active_only and deleted_col is not None:
+            query = query.filter((deleted_col == False) | (deleted_col == None))
         return query.order_by(model_class.id).all()
 
     def get(self, model_class, id: int):
@@ -29,6 +44,7 @@ class LookupRepository:
         self.db.add(model_instance)
         self.db.commit()
         self.db.refresh(model_instance)
+        self._changed(type(model_instance).__tablename__)
         return model_instance
 
     def update(self, model_instance):
@@ -37,6 +53,7 @@ class LookupRepository:
         self.db.commit()
         # Refresh to get updated values
         self.db.refresh(model_instance)
+        self._changed(type(model_instance).__tablename__)
         return model_instance
 
     def delete(self, model_class, id: int):
@@ -54,6 +71,7 @@ class LookupRepository:
             self.db.delete(item)
         
         self.db.commit()
+        self._changed(model_class.__tablename__)
         return True
 
     def restore(self, model_class, id: int):
@@ -68,4 +86,5 @@ class LookupRepository:
         item.IsDeleted = False
         self.db.merge(item)
         self.db.commit()
+        self._changed(model_class.__tablename__)
         return True
@@ -1,12 +1,92 @@
+from typing import NamedTuple
+
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import Date, Integer, String, cast, func, and_, or_, literal_column, select, text
+from app.core.config import settings
 from app.models.appeal import Appeal
 from app.models.department import Department
 from app.models.region import Region
 from app.models.lookup import ApStatus, ApIndex, InSection, AccountIndex, ContentType
 from app.models.executor import Executor, Direction
+from app.models.appeal_stats import AppealDailyStat
+from app.repositories.appeal_stats import AppealStatsRepository
+from app.core.reference_data import reference_data
 from datetime import date
 
+
+# group_by -> (Appeals column, lookup model used for the name)
+STATS_GROUP_COLUMNS = {
+    "department": (Appeal.dep_id, Department),
+    "region": (Appeal.region_id, Region),
+    "status": (Appeal.status, ApStatus),
+    "index": (Appeal.ap_index_id, ApIndex),
+    "insection": (Appeal.InSection, InSection),
+    "account_index": (Appeal.account_index_id, AccountIndex),
+    "content_type": (Appeal.content_type_id, ContentType),
+}
+
+
+# Forma 4 projection (ReportRepository.iter_forma_4_records)
+FORMA_4_APPEAL_COLUMNS = (
+    Appeal.id, Appeal.reg_num, Appeal.reg_date, Appeal.in_ap_num, Appeal.in_ap_date,
+    Appeal.dep_id, Appeal.official_id, Appeal.content, Appeal.ap_index_id, Appeal.paper_count,
+    Appeal.account_index_id, Appeal.content_type_id, Appeal.repetition,
+    Appeal.who_control_id, Appeal.instructions_id, Appeal.status, Appeal.user_section_id,
+)
+FORMA_4_EXECUTOR_COLUMNS = (
+    Executor.appeal_id, Executor.direction_id, Executor.executor_id,
+    Executor.out_num, Executor.out_date, Executor.attach_num, Executor.attach_paper_num,
+    Executor.r_num, Executor.r_date,
+)
+
+
+class StatRow(NamedTuple):
+    id: int | None
+    name: str | None
+    count: int
+
+
+# Cross-tab statistics: time buckets of reg_date (bucket key = first day of the bucket)
+TIME_BUCKETS = ("day", "week", "month", "quarter", "year")
+CROSSTAB_MAX_DIMENSIONS = 3
+
+
+class CrossTabRow(NamedTuple):
+    keys: tuple  # bucket date and/or dimension ids, in request order; None where rolled up
+    count: int
+    level: int  # 0 = detail, n = last n keys are subtotals
+
+
+def _bucket_expr(dialect: str, column, bucket: str):
+    """First day of the `bucket` containing `column` (a datetime or date column)."""
+    if dialect == "sqlite":
+        day = func.date(column)
+        if bucket == "day":
+            return day
+        if bucket == "week":
+            # Bazar ertəsi ilə başlayan həftə
+            return func.date(column, "-" + cast((cast(func.strftime("%w", column), Integer) + 6) % 7, String) + " days")
+        if bucket == "month":
+            return func.date(column, "start of month")
+        if bucket == "quarter":
+            month = cast(func.strftime("%m", column), Integer)
+            return func.printf("%s-%02d-01", func.strftime("%Y", column), ((month - 1) // 3) * 3 + 1)
+        return func.date(column, "start of year")
+
+    day = cast(column, Date)
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        # 1900-01-01 bazar ertəsidir: DATEFIRST ayarından asılı deyil
+        return func.dateadd(text("day"), -(func.datediff(text("day"), literal_column("'19000101'"), day) % 7), day)
+    year = func.year(column)
+    if bucket == "month":
+        return func.datefromparts(year, func.month(column), 1)
+    if bucket == "quarter":
+        return func.datefromparts(year, (func.datepart(text("quarter"), column) - 1) * 3 + 1, 1)
+    return func.datefromparts(year, 1, 1)
+
+
 class ReportRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -18,50 +98,26 @@ class ReportRepository:
         end_date: date | None = None,
         user_section_id: int | None = None
     ):
-        # Base query: count appeals
-        query = self.db.query(func.count(Appeal.id).label("count"))
-        
-        # Define joins and labels based on group_by
-        if group_by == "department":
-            query = query.add_columns(Appeal.dep_id.label("id"), Department.department.label("name"))
-            query = query.outerjoin(Department, Appeal.dep_id == Department.id)
-            query = query.group_by(Appeal.dep_id, Department.department)
-        elif group_by == "region":
-            query = query.add_columns(Appeal.region_id.label("id"), Region.region.label("name"))
-            query = query.outerjoin(Region, Appeal.region_id == Region.id)
-            query = query.group_by(Appeal.region_id, Region.region)
-        elif group_by == "status":
-            query = query.add_columns(Appeal.status.label("id"), ApStatus.status.label("name"))
-            query = query.outerjoin(ApStatus, Appeal.status == ApStatus.id)
-            query = query.group_by(Appeal.status, ApStatus.status)
-        elif group_by == "index":
-            query = query.add_columns(Appeal.ap_index_id.label("id"), ApIndex.ap_index.label("name"))
-            query = query.outerjoin(ApIndex, Appeal.ap_index_id == ApIndex.id)
-            query = query.group_by(Appeal.ap_index_id, ApIndex.ap_index)
-        elif group_by == "insection":
-            query = query.add_columns(Appeal.InSection.label("id"), InSection.section.label("name"))
-            query = query.outerjoin(InSection, Appeal.InSection == InSection.id)
-            query = query.group_by(Appeal.InSection, InSection.section)
-        elif group_by == "account_index":
-            query = query.add_columns(Appeal.account_index_id.label("id"), AccountIndex.account_index.label("name"))
-            query = query.outerjoin(AccountIndex, Appeal.account_index_id == AccountIndex.id)
-            query = query.group_by(Appeal.account_index_id, AccountIndex.account_index)
-        elif group_by == "content_type":
-            query = query.add_columns(Appeal.content_type_id.label("id"), ContentType.content_type.label("name"))
-            query = query.outerjoin(ContentType, Appeal.content_type_id == ContentType.id)
-            query = query.group_by(Appeal.content_type_id, ContentType.content_type)
-        elif group_by == "exec_direction":
+        # Only Appeals (and Executors for exec_direction) are queried; names are
+        # resolved from the in-memory reference data instead of lookup joins.
+        if settings.appeal_rollups_enabled:
+            return self._appeal_stats_from_rollups(group_by, start_date, end_date, user_section_id)
+
+        if group_by == "exec_direction":
             # Count DISTINCT appeals per icra istiqaməti
-            query = self.db.query(func.count(func.distinct(Appeal.id)).label("count"))
-            query = query.add_columns(Direction.id.label("id"), Direction.direction.label("name"))
-            query = query.join(Executor, Executor.appeal_id == Appeal.id)
-            query = query.join(Direction, Executor.direction_id == Direction.id)
-            query = query.group_by(Direction.id, Direction.direction)
+            model = Direction
+            query = self.db.query(
+                Executor.direction_id.label("id"),
+                func.count(func.distinct(Appeal.id)).label("count"),
+            )
+            query = query.select_from(Appeal).join(Executor, Executor.appeal_id == Appeal.id)
+            query = query.filter(Executor.direction_id != None)
+            query = query.group_by(Executor.direction_id)
         else:
-            # Fallback or default
-            query = query.add_columns(Appeal.status.label("id"), ApStatus.status.label("name"))
-            query = query.outerjoin(ApStatus, Appeal.status == ApStatus.id)
-            query = query.group_by(Appeal.status, ApStatus.status)
+            # Fallback or default: status
+            column, model = STATS_GROUP_COLUMNS.get(group_by, STATS_GROUP_COLUMNS["status"])
+            query = self.db.query(column.label("id"), func.count(Appeal.id).label("count"))
+            query = query.group_by(column)
 
         # Apply filters
         # In some legacy DBs, is_deleted might be NULL instead of False. Handle both.
@@ -78,21 +134,125 @@ class ReportRepository:
             end_dt = datetime.combine(end_date, time.max)
             query = query.filter(Appeal.reg_date <= end_dt)
 
-        return query.all()
+        rows = []
+        for row in query.all():
+            if group_by == "exec_direction" and reference_data.get(Direction, row.id) is None:
+                # Əvvəlki INNER JOIN kimi: mövcud olmayan istiqamətlər sayılmır
+                continue
+            rows.append(StatRow(id=row.id, name=reference_data.label(model, row.id), count=row.count))
+        return rows
 
-    def get_forma_4_data(self, start_date: date | None = None, end_date: date | None = None, user_section_id: int | None = None):
-        from sqlalchemy.orm import joinedload
-        from sqlalchemy import cast, Date, or_
-        from app.models.executor import Executor
-        
-        # In some legacy DBs, is_deleted might be NULL instead of False. Handle both.
+    def _appeal_stats_from_rollups(
+        self,
+        group_by: str,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+    ):
+        """Same result as get_appeal_stats, summed from the daily rollup tables."""
+        stats = AppealStatsRepository(self.db)
+        if group_by == "exec_direction":
+            model = Direction
+            result = stats.sum_by_direction(start_date, end_date, user_section_id)
+        else:
+            column, model = STATS_GROUP_COLUMNS.get(group_by, STATS_GROUP_COLUMNS["status"])
+            result = stats.sum_by(column.key, start_date, end_date, user_section_id)
+
+        rows = []
+        for row in result:
+            if group_by == "exec_direction" and reference_data.get(Direction, row.id) is None:
+                continue
+            rows.append(StatRow(id=row.id, name=reference_data.label(model, row.id), count=int(row.count)))
+        return rows
+
+    def get_appeal_crosstab(
+        self,
+        dimensions: list[str],
+        bucket: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        user_section_id: int | None = None,
+    ) -> list[CrossTabRow]:
+        """
+        Appeal counts grouped by an optional time bucket plus up to three
+        STATS_GROUP_COLUMNS dimensions in one GROUP BY, with hierarchical
+        subtotals (GROUP BY ROLLUP on MSSQL, summed from the detail rows on
+        other dialects). Reads the daily rollup tables when enabled.
+        """
         from datetime import datetime, time
-        
+
+        if settings.appeal_rollups_enabled:
+            source = AppealDailyStat
+            day_column = AppealDailyStat.day
+            filters = AppealStatsRepository._range_filters(AppealDailyStat, start_date, end_date, user_section_id)
+            columns = [getattr(AppealDailyStat, STATS_GROUP_COLUMNS[d][0].key) for d in dimensions]
+        else:
+            source = Appeal
+            day_column = Appeal.reg_date
+            filters = [or_(Appeal.is_deleted == False, Appeal.is_deleted == None)]
+            if user_section_id is not None:
+                filters.append(Appeal.user_section_id == user_section_id)
+            if start_date:
+                filters.append(Appeal.reg_date >= datetime.combine(start_date, datetime.min.time()))
+            if end_date:
+                filters.append(Appeal.reg_date <= datetime.combine(end_date, time.max))
+            columns = [STATS_GROUP_COLUMNS[d][0] for d in dimensions]
+
+        dialect = self.db.get_bind().dialect.name
+        keys = [column.label(f"k{i + 1}") for i, column in enumerate(columns)]
+        if bucket:
+            keys.insert(0, _bucket_expr(dialect, day_column, bucket).label("k0"))
+        # Açarlar alt sorğuda hesablanır ki, GROUP BY ifadələri SELECT-dəkilərlə eyni olsun
+        measure = literal_column("1") if source is Appeal else AppealDailyStat.appeal_count
+        inner = select(*keys, measure.label("n")).select_from(source).where(*filters).subquery()
+        group = [inner.c[key.name] for key in keys]
+        total = func.count() if source is Appeal else func.sum(inner.c.n)
+
+        if dialect == "mssql":
+            flags = [func.grouping(column).label(f"g_{column.name}") for column in group]
+            result = self.db.execute(
+                select(*group, *flags, total.label("appeal_count")).group_by(func.rollup(*group))
+            ).all()
+            return [
+                CrossTabRow(
+                    keys=tuple(row[:len(group)]),
+                    count=int(row.appeal_count),
+                    level=sum(row[len(group):len(group) * 2]),
+                )
+                for row in result
+                if row.appeal_count
+            ]
+
+        detail = self.db.execute(select(*group, total.label("appeal_count")).group_by(*group)).all()
+        rows = [CrossTabRow(keys=tuple(row[:len(group)]), count=int(row.appeal_count), level=0) for row in detail if row.appeal_count]
+        # ROLLUP emulyasiyası: hər səviyyə üçün son n açar atılıb cəmlənir
+        for level in range(1, len(group) + 1):
+            sums: dict[tuple, int] = {}
+            for row in rows:
+                if row.level == 0:
+                    prefix = row.keys[:len(group) - level] + (None,) * level
+                    sums[prefix] = sums.get(prefix, 0) + row.count
+            rows.extend(CrossTabRow(keys=k, count=v, level=level) for k, v in sums.items())
+        return rows
+
+    def _forma_4_query(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+        *entities,
+        unsectioned: bool = False,
+    ):
+        """`user_section_id` None means all sections; `unsectioned` selects appeals without a section instead."""
+        from datetime import datetime, time
+
         # In some legacy DBs, is_deleted might be NULL instead of False. Handle both.
-        query = self.db.query(Appeal).filter(or_(Appeal.is_deleted == False, Appeal.is_deleted == None))
+        query = self.db.query(*(entities or (Appeal,))).filter(or_(Appeal.is_deleted == False, Appeal.is_deleted == None))
         
         # Apply filters
-        if user_section_id is not None:
+        if unsectioned:
+            query = query.filter(Appeal.user_section_id == None)
+        elif user_section_id is not None:
             query = query.filter(Appeal.user_section_id == user_section_id)
         if start_date:
             start_dt = datetime.combine(start_date, datetime.min.time())
@@ -100,24 +260,100 @@ class ReportRepository:
         if end_date:
             end_dt = datetime.combine(end_date, time.max)
             query = query.filter(Appeal.reg_date <= end_dt)
-            
-        # Eager load everything needed for the 18 columns
-        query = query.options(
-            joinedload(Appeal.executors).joinedload(Executor.executor_list),
-            joinedload(Appeal.executors).joinedload(Executor.direction),
-            joinedload(Appeal.contacts),
-            joinedload(Appeal.department),
-            joinedload(Appeal.ap_index_rel),
-            joinedload(Appeal.account_index_rel),
-            joinedload(Appeal.content_type_rel),
-            joinedload(Appeal.status_rel),
-            joinedload(Appeal.instruction_rel),
-            joinedload(Appeal.control_rel),
-            joinedload(Appeal.official_rel),
-            joinedload(Appeal.region_rel)
+        return query
+
+    def forma_4_sections(self, start_date: date | None, end_date: date | None) -> list[int | None]:
+        """user_section_id values (None for appeals without a section) that have appeals in the range."""
+        query = self._forma_4_query(start_date, end_date, None, Appeal.user_section_id).distinct()
+        return [row.user_section_id for row in query]
+
+    def iter_forma_4_records(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        user_section_id: int | None = None,
+        batch_size: int = 2000,
+        status: int | None = None,
+        dep_id: int | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+        unsectioned: bool = False,
+    ):
+        """
+        Yield (appeal_row, [executor_rows]) for Forma 4 ordered by appeal id.
+
+        Keyset pages of `batch_size` appeals (Appeal.id > last id of the
+        previous page), each followed by the executors of exactly that page's
+        appeals (same filters, not an id range that would include other
+        sections' executors), so only one page is in memory and no cursor
+        stays open while rows are yielded. `after_id` / `limit` give keyset
+        pages to the caller (the preview API).
+        """
+        query = self._forma_4_query(
+            start_date, end_date, user_section_id, *FORMA_4_APPEAL_COLUMNS, unsectioned=unsectioned,
         )
-        
-        # When using joinedload with collections, deduplication is handled by Query.all() 
-        # for standard relationships. For older SQLAlchemy versions or specific join patterns,
-        # we return the list. unique() is the 2.0 style for Result objects, not Query.
-        return query.all()
+        if status is not None:
+            query = query.filter(Appeal.status == status)
+        if dep_id is not None:
+            query = query.filter(Appeal.dep_id == dep_id)
+        last_id = after_id
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            page = query if last_id is None else query.filter(Appeal.id > last_id)
+            appeals = page.order_by(Appeal.id).limit(size).all()
+            if not appeals:
+                return
+            executors: dict[int, list] = {}
+            for row in self._forma_4_executors(query, appeals[0].id, appeals[-1].id).all():
+                executors.setdefault(row.appeal_id, []).append(row)
+            for appeal in appeals:
+                yield appeal, executors.get(appeal.id, [])
+            if len(appeals) < size:
+                return
+            last_id = appeals[-1].id
+            if remaining is not None:
+                remaining -= len(appeals)
+
+    def _forma_4_executors(self, appeal_query, first_id: int, last_id: int):
+        """Executor columns of the appeals of `appeal_query` with ids in [first_id, last_id] (one keyset page)."""
+        page_ids = appeal_query.with_entities(Appeal.id).filter(Appeal.id.between(first_id, last_id))
+        return (
+            self.db.query(*FORMA_4_EXECUTOR_COLUMNS)
+            .filter(Executor.appeal_id.in_(page_ids.scalar_subquery()))
+            .order_by(Executor.appeal_id, Executor.id)
+        )
+
+    def iter_forma_4_frames(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        user_section_id: int | None = None,
+        chunk_size: int = 20000,
+        unsectioned: bool = False,
+    ):
+        """
+        DataFrame variant of iter_forma_4_records: yields (appeals_df,
+        executors_df) per chunk of `chunk_size` appeals. Each chunk is its own
+        keyset page (Appeal.id > last id of the previous chunk) read with
+        read_sql, followed by the executors of that chunk's appeals, so only
+        one chunk is in memory and no cursor stays open between them.
+        """
+        import pandas as pd
+
+        conn = self.db.connection()
+        query = self._forma_4_query(
+            start_date, end_date, user_section_id, *FORMA_4_APPEAL_COLUMNS, unsectioned=unsectioned,
+        )
+        last_id = None
+        while True:
+            page = query if last_id is None else query.filter(Appeal.id > last_id)
+            appeals_stmt = page.order_by(Appeal.id).limit(chunk_size).statement
+            # read_sql(chunksize=...) cursoru açıq saxlayır; MSSQL-də (MARS yoxdur) icraçı sorğusu ilə toqquşur
+            appeals = pd.read_sql(appeals_stmt, conn, parse_dates=["reg_date", "in_ap_date"])
+            if appeals.empty:
+                return
+            last_id = int(appeals["id"].iloc[-1])
+            executors_stmt = self._forma_4_executors(query, int(appeals["id"].iloc[0]), last_id).statement
+            executors = pd.read_sql(executors_stmt, conn, parse_dates=["out_date", "r_date"])
+            yield appeals, executors
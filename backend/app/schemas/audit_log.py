@@ -4,7 +4,7 @@ Pydantic schemas for AuditLog
 from __future__ import annotations
 
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 
 class AuditLogBase(BaseModel):
@@ -30,12 +30,42 @@ class AuditLogOut(AuditLogBase):
     ip_address: str | None = None
     user_agent: str | None = None
 
+    @field_validator("old_values", "new_values", mode="before")
+    @classmethod
+    def _decode_values(cls, value):
+        # Sıxılmış diff-lər ("z:...") klientə adi JSON mətni kimi verilir
+        from app.services.audit_diff import decode
+
+        return decode(value)
+
     class Config:
         from_attributes = True
 
 
 class AuditLogListResponse(BaseModel):
     items: list[AuditLogOut]
-    total: int
+    total: int | None  # cursor ilə sorğularda hesablanmır
     limit: int
     offset: int
+    next_cursor: str | None = None  # növbəti səhifə üçün cursor; None = son səhifə
+
+
+class AuditChangeOut(BaseModel):
+    audit_id: int
+    entity_type: str
+    entity_id: int
+    field: str
+    old_value: str | None = None
+    new_value: str | None = None
+    created_by: int | None = None
+    created_by_name: str | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AuditChangeListResponse(BaseModel):
+    items: list[AuditChangeOut]
+    limit: int
+    next_cursor: str | None = None
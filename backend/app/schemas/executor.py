@@ -2,7 +2,12 @@
 Schemas for executor-related endpoints
 """
 from datetime import datetime
+
+from pydantic import model_validator
+
+from app.models.executor import Direction, ExecutorList
 from app.schemas.common import ORMBase
+from app.core.reference_data import reference_data
 
 
 class ExecutorOut(ORMBase):
@@ -26,6 +31,15 @@ class ExecutorOut(ORMBase):
     PC: str | None = None
     PC_Tarixi: datetime | None = None
 
+    # Adlar yaddaşdakı arayış məlumatından götürülür (join lazım deyil)
+    @model_validator(mode="after")
+    def _resolve_names(self):
+        if self.executor_name is None and self.executor_id is not None:
+            self.executor_name = reference_data.label(ExecutorList, self.executor_id)
+        if self.direction_name is None and self.direction_id is not None:
+            self.direction_name = reference_data.label(Direction, self.direction_id)
+        return self
+
 
 class ExecutorCreate(ORMBase):
     """Create executor assignment - executorId comes from ExecutorList"""
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class RequestProfileOut(BaseModel):
+    id: str
+    method: str
+    path: str
+    query: str
+    status: int | None = None
+    username: str
+    created_at: datetime
+    duration_ms: float
+    endpoint_ms: float
+    samples: int
+    html_url: str
+    pstats_url: str
+    collapsed_url: str
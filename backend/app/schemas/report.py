@@ -1,4 +1,6 @@
-from datetime import date
+from datetime import date, datetime
+from typing import Literal
+
 from pydantic import BaseModel
 from app.schemas.common import ORMBase
 
@@ -18,3 +20,47 @@ class ReportResponse(BaseModel):
     group_by: str
     start_date: date | None
     end_date: date | None
+
+class Forma4Row(BaseModel):
+    id: int  # Appeals.id
+    values: list[str]  # 18 sütun, ixracdakı ardıcıllıqla
+
+class Forma4Page(BaseModel):
+    columns: list[str]
+    items: list[Forma4Row]
+    limit: int
+    next_after_id: int | None  # növbəti səhifə üçün after_id; None = son səhifə
+
+class CrossTabCell(BaseModel):
+    keys: list[date | int | None]  # dimensions ardıcıllığı ilə; None = həmin səviyyədə cəm
+    names: list[str | None]
+    count: int
+    level: int  # 0 = detal sətir, n = son n ölçü üzrə aralıq cəm
+
+class CrossTabResponse(BaseModel):
+    dimensions: list[str]  # zaman bölgüsü (varsa) birinci, məs. ["month", "department", "status"]
+    rows: list[CrossTabCell]
+    total: int
+    start_date: date | None
+    end_date: date | None
+
+class ReportJobCreate(BaseModel):
+    report: Literal["forma_4", "appeal_stats"]
+    format: Literal["excel", "word", "pdf"]
+    start_date: date | None = None
+    end_date: date | None = None
+    group_by: str = "department"  # yalnız appeal_stats üçün
+
+class ReportJobOut(BaseModel):
+    id: str
+    report: str
+    format: str
+    status: str  # queued, running, done, failed
+    params: ReportParams
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    expires_at: datetime | None = None
+    size: int | None = None
+    error: str | None = None
+    download_url: str | None = None
@@ -1,6 +1,7 @@
 from datetime import datetime
 from fastapi import HTTPException
 
+from app.core import report_cache
 from app.models.appeal import Appeal
 from app.models.user import User
 from app.repositories.appeal import AppealRepository
@@ -104,6 +105,7 @@ class AppealService:
             num = 1 if max_num == 0 else max_num + 1
 
         # 3. Get Department sign and Section index
+        # reg_num bazaya yazılır: arayış keşindən yox, birbaşa cədvəldən oxunur (başqa worker-in dəyişikliyi)
         dept = self.appeals.db.query(Department).filter(Department.id == dep_id).first()
         sign = dept.sign if dept else None
         
@@ -154,6 +156,8 @@ class AppealService:
             contact_obj = Contact(appeal_id=result.id, contact=phone)
             self.appeals.db.add(contact_obj)
             self.appeals.db.commit()
+
+        report_cache.invalidate_appeal(result.user_section_id, result.reg_date)
         
         # Log the creation ... (omitted for brevity in this tool call, will maintain original logic)
         if self.audit:
@@ -194,6 +198,7 @@ class AppealService:
         for key in updates.keys():
             if hasattr(obj, key):
                 old_values[key] = getattr(obj, key)
+        old_section_id, old_reg_date = obj.user_section_id, obj.reg_date
 
         result = self.appeals.update(
             obj,
@@ -211,6 +216,9 @@ class AppealService:
                 contact = Contact(appeal_id=appeal_id, contact=phone)
             self.appeals.db.add(contact)
             self.appeals.db.commit()
+
+        report_cache.invalidate_appeal(old_section_id, old_reg_date)
+        report_cache.invalidate_appeal(result.user_section_id, result.reg_date)
         
         # Log the update
         if self.audit:
@@ -258,6 +266,7 @@ class AppealService:
             user_id=current_user.id,
             user_name=current_user.username
         )
+        report_cache.invalidate_appeal(obj.user_section_id, obj.reg_date)
 
         return {"message": "Müraciət silindi", "id": appeal_id}
 
@@ -293,5 +302,6 @@ class AppealService:
             user_id=current_user.id,
             user_name=current_user.username
         )
+        report_cache.invalidate_appeal(obj.user_section_id, obj.reg_date)
 
         return {"message": "Müraciət geri qaytarıldı", "id": appeal_id}
@@ -3,14 +3,57 @@ Service for audit logging operations
 """
 from __future__ import annotations
 
-import json
+import base64
 from datetime import datetime
 from typing import Any
 
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.audit_change import AuditChange
 from app.models.audit_log import AuditLog
-from app.repositories.audit_log import AuditLogRepository
+from app.repositories.audit_log import HISTORY_SUMMARY_COLUMNS, AuditLogRepository
 from app.models.user import User
 from app.schemas.audit_log import AuditLogCreate
+from app.services import audit_archive, audit_diff, audit_writer
+
+
+# Oxunuş bu prosesin növbədəki audit yazılarını ən çox bu qədər gözləyir (writer dərhal oyadılır)
+READ_FLUSH_TIMEOUT_SECONDS = 0.5
+
+# Sütun uzunluqları: uzun dəyər (məs. User-Agent) sətrin DB tərəfindən rədd edilməsinə səbəb olmasın
+_COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in AuditLog.__table__.columns
+    if getattr(column.type, "length", None)
+}
+
+
+def _fit_columns(row: dict[str, Any]) -> dict[str, Any]:
+    """Cut string values to their AuditLogs column length."""
+    for name, length in _COLUMN_LENGTHS.items():
+        value = row.get(name)
+        if isinstance(value, str) and len(value) > length:
+            row[name] = value[:length]
+    return row
+
+
+def encode_cursor(item: AuditLog | AuditChange | dict) -> str:
+    """Opaque keyset cursor for the (created_at, id) of a listed row."""
+    if isinstance(item, dict):
+        created_at, id = item["created_at"], item["id"]
+    else:
+        created_at, id = item.created_at, item.id
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor etibarsızdır")
 
 
 class AuditService:
@@ -29,17 +72,17 @@ class AuditService:
         ip_address: str | None = None,
         user_agent: str | None = None,
     ) -> AuditLog:
-        """Log an action performed on an entity"""
-        
-        def json_serial(obj):
-            """JSON serializer for objects not serializable by default json code"""
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            return str(obj)
-
-        old_values_json = json.dumps(old_values, default=json_serial) if old_values else None
-        new_values_json = json.dumps(new_values, default=json_serial) if new_values else None
+        """
+        Log an action performed on an entity. With audit_writer_enabled the row
+        is only queued (written in a batch shortly after) and the returned
+        AuditLog is not persisted, so it has no id.
+        """
         
+        # Yalnız həqiqətən dəyişən sahələr saxlanılır; böyük diff-lər sıxılır
+        old_values, new_values = audit_diff.compact(old_values, new_values)
+        old_values_json = audit_diff.encode(old_values)
+        new_values_json = audit_diff.encode(new_values)
+
         log_data = AuditLogCreate(
             entity_type=entity_type,
             entity_id=entity_id,
@@ -49,12 +92,16 @@ class AuditService:
             new_values=new_values_json,
             created_by=current_user.id,
             created_by_name=current_user.username,
+            created_at=datetime.utcnow(),
             ip_address=ip_address,
             user_agent=user_agent,
         )
-        
-        log_obj = AuditLog(**log_data.model_dump())
-        return self.audit_repo.create(log_obj)
+        row = _fit_columns(log_data.model_dump())
+
+        if settings.audit_writer_enabled:
+            audit_writer.enqueue(row)
+            return AuditLog(**row)
+        return self.audit_repo.create(AuditLog(**row))
 
     def list_logs(
         self,
@@ -64,24 +111,61 @@ class AuditService:
         action: str | None = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> tuple[list[AuditLog], int]:
-        """Get audit logs with pagination"""
-        items = self.audit_repo.list(
-            entity_type=entity_type,
-            entity_id=entity_id,
-            created_by=created_by,
-            action=action,
-            limit=limit,
-            offset=offset,
-        )
-        total = self.audit_repo.count(
-            entity_type=entity_type,
-            entity_id=entity_id,
-            created_by=created_by,
-            action=action,
-        )
-        return items, total
+        start: datetime | None = None,
+        end: datetime | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[AuditLog | dict], int | None, str | None]:
+        """
+        Get audit logs, newest first: (items, total, next_cursor). With a
+        `cursor` (next_cursor of the previous page) the page continues after
+        that row by keyset, `offset` is ignored and total is not counted.
+        Archived rows (audit_archive) are older than the table's rows, so
+        they continue the list after the last table row; they are dicts.
+        """
+        before = decode_cursor(cursor) if cursor else None
+        filters = dict(entity_type=entity_type, entity_id=entity_id, created_by=created_by, action=action, start=start, end=end)
+        # Bu prosesin növbədəki yazıları da görünsün
+        audit_writer.flush(READ_FLUSH_TIMEOUT_SECONDS)
+        # Arxivə köçürülmüş, hələ silinməmiş sətirlər yalnız arxivdən göstərilir
+        archived = audit_archive.in_table() if audit_archive.generation() else ()
+        items = self.audit_repo.list(**filters, limit=limit, offset=offset, before=before, archived=archived)
+        total = None if before else self.audit_repo.count(**filters, archived=archived)
+        if audit_archive.generation():
+            archive_filter = audit_archive.AuditFilter(**filters, before=before)
+            if len(items) < limit:
+                archive_offset = 0 if before else max(offset - total, 0)
+                items = list(items) + audit_archive.page(archive_filter, archive_offset, limit - len(items))
+            if total is not None:
+                total += audit_archive.count(archive_filter)
+        next_cursor = encode_cursor(items[-1]) if len(items) == limit else None
+        return items, total, next_cursor
+
+    def list_changes(
+        self,
+        limit: int = 50,
+        cursor: str | None = None,
+        **filters,
+    ) -> tuple[list[AuditChange], str | None]:
+        """Field-level changes (AuditChanges), newest first: (items, next_cursor)."""
+        if not settings.audit_changes_enabled:
+            raise HTTPException(status_code=404, detail="Sahə üzrə dəyişiklik indeksi aktiv deyil")
+        audit_writer.flush(READ_FLUSH_TIMEOUT_SECONDS)
+        items = self.audit_repo.list_changes(**filters, limit=limit, before=decode_cursor(cursor) if cursor else None)
+        return items, encode_cursor(items[-1]) if len(items) == limit else None
 
-    def get_entity_history(self, entity_type: str, entity_id: int) -> list[AuditLog]:
-        """Get full change history for an entity"""
-        return self.audit_repo.get_entity_history(entity_type, entity_id)
+    def get_entity_history(self, entity_type: str, entity_id: int, summary: bool = False) -> list:
+        """
+        Get full change history for an entity (table rows, then archived
+        ones). `summary` leaves out description and the old/new values.
+        """
+        audit_writer.flush(READ_FLUSH_TIMEOUT_SECONDS)
+        archived = audit_archive.in_table() if audit_archive.generation() else ()
+        history = self.audit_repo.get_entity_history(entity_type, entity_id, summary=summary, archived=archived)
+        if summary:
+            history = [dict(row._mapping) for row in history]
+        if audit_archive.generation():
+            archived = audit_archive.page(audit_archive.AuditFilter(entity_type, entity_id))
+            if summary:
+                archived = [{column.key: row[column.key] for column in HISTORY_SUMMARY_COLUMNS} for row in archived]
+            history = list(history) + archived
+        return history
@@ -0,0 +1,480 @@
+"""
+Cold storage for old AuditLogs rows.
+
+archive_audit_logs.py moves rows older than audit_archive_retention_days out
+of the AuditLogs table into monthly segments in settings.audit_archive_dir:
+
+    YYYY-MM.jsonl.gz    rows of that month (created_at), one JSON object per
+                        line; every archive run appends a new gzip member
+    YYYY-MM.keys.json   entity ids, users and actions present in the segment
+    index.json          per-segment row count, row counts per user and per
+                        action, created_at and id range, and the
+                        archived-but-not-yet-deleted watermarks
+
+Reads (AuditService.list_logs / get_entity_history) use the index and the
+keys files to skip segments that cannot match; counts of whole months
+without a filter or filtered by user or action alone come from the index,
+so a page only decompresses the segments it returns rows from. Segments are
+streamed and only the matching rows are kept (as JSON lines), in a cache
+bounded by audit_archive_cache_max_bytes. reindex() fills in the counts of
+segments archived before the index had them. Segments are written before the rows are deleted; rows
+with created_at < cutoff and id <= max_id of a watermark in
+index["in_table"] are already archived, so table reads leave them out
+until the DELETE removes them (see in_table()). A rerun after an
+interruption skips ids already inside a segment's id range, so row counts
+stay exact; a row appended twice anyway (crash before the index write) is
+dropped by id when the segment is read.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from threading import Lock
+from typing import Iterator, NamedTuple
+
+from app.core.config import settings
+
+INDEX_FILE = "index.json"
+
+# AuditLogs sütunları, seqment sətirlərində eyni adlarla
+COLUMNS = (
+    "id", "entity_type", "entity_id", "action", "description", "old_values", "new_values",
+    "created_by", "created_by_name", "created_at", "ip_address", "user_agent",
+)
+
+_lock = Lock()
+
+
+class AuditFilter(NamedTuple):
+    entity_type: str | None = None
+    entity_id: int | None = None
+    created_by: int | None = None
+    action: str | None = None
+    start: datetime | None = None  # created_at >= start
+    end: datetime | None = None  # created_at < end
+    before: tuple[datetime, int] | None = None  # keyset: (created_at, id) < before
+
+    def has_fields(self) -> bool:
+        return any(v is not None for v in (self.entity_type, self.entity_id, self.created_by, self.action))
+
+
+def archive_dir() -> str:
+    path = os.path.abspath(settings.audit_archive_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _path(name: str) -> str:
+    return os.path.join(archive_dir(), name)
+
+
+def _write_json(name: str, data: dict) -> None:
+    path = _path(name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(name: str) -> dict | None:
+    try:
+        with open(_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def generation() -> int:
+    """Changes on every archive run; 0 when nothing has been archived."""
+    try:
+        return os.stat(_path(INDEX_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+@lru_cache(maxsize=4)
+def _index(gen: int) -> dict:
+    return (_read_json(INDEX_FILE) or {"segments": {}}) if gen else {"segments": {}}
+
+
+def load_index() -> dict:
+    return _index(generation())
+
+
+@lru_cache(maxsize=64)
+def _keys(month: str, gen: int) -> dict:
+    keys = _read_json(f"{month}.keys.json") or {}
+    return {
+        "entities": {etype: frozenset(ids) for etype, ids in keys.get("entities", {}).items()},
+        "users": frozenset(keys.get("users", ())),
+        "actions": frozenset(keys.get("actions", ())),
+    }
+
+
+def _parse(line: str) -> dict:
+    row = json.loads(line)
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+def _lines(month: str) -> Iterator[str]:
+    """Lines of a segment as they are decompressed."""
+    with gzip.open(_path(f"{month}.jsonl.gz"), "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield line
+        except EOFError:
+            # Yazılışı yarımçıq qalmış sonuncu gzip hissəsi: oxunanlar saxlanılır
+            return
+
+
+def _month_range(month: str) -> tuple[datetime, datetime]:
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _may_match(month: str, meta: dict, f: AuditFilter, gen: int) -> bool:
+    month_start, month_end = _month_range(month)
+    if f.start is not None and month_end <= f.start:
+        return False
+    if f.end is not None and month_start >= f.end:
+        return False
+    if f.before is not None and month_start > f.before[0]:
+        return False
+    if not f.has_fields():
+        return True
+    if "users" in meta:
+        # İndeksdəki saylar: istifadəçi/əməliyyat üzrə filtr keys faylını açmır
+        if f.created_by is not None and not meta["users"].get(str(f.created_by)):
+            return False
+        if f.action is not None and not meta["actions"].get(f.action):
+            return False
+        if f.entity_type is None and f.entity_id is None:
+            return True
+    keys = _keys(month, gen)
+    if f.entity_type is not None:
+        ids = keys["entities"].get(f.entity_type)
+        if ids is None or (f.entity_id is not None and f.entity_id not in ids):
+            return False
+    elif f.entity_id is not None and not any(f.entity_id in ids for ids in keys["entities"].values()):
+        return False
+    if f.created_by is not None and f.created_by not in keys["users"]:
+        return False
+    if f.action is not None and f.action not in keys["actions"]:
+        return False
+    return True
+
+
+def _matches(row: dict, f: AuditFilter) -> bool:
+    return (
+        (f.entity_type is None or row["entity_type"] == f.entity_type)
+        and (f.entity_id is None or row["entity_id"] == f.entity_id)
+        and (f.created_by is None or row["created_by"] == f.created_by)
+        and (f.action is None or row["action"] == f.action)
+        and (f.start is None or row["created_at"] >= f.start)
+        and (f.end is None or row["created_at"] < f.end)
+    )
+
+
+def _covers_month(month: str, f: AuditFilter) -> bool:
+    """Whether the date range (and cursor) of `f` takes in the whole of `month`."""
+    month_start, month_end = _month_range(month)
+    return (
+        (f.start is None or f.start <= month_start)
+        and (f.end is None or f.end >= month_end)
+        and (f.before is None or f.before[0] >= month_end)
+    )
+
+
+def _known_count(month: str, meta: dict, f: AuditFilter) -> int | None:
+    """Rows of `month` matching `f` from the index alone, or None when the segment has to be read."""
+    if f.entity_type is not None or f.entity_id is not None or not _covers_month(month, f):
+        return None
+    if f.created_by is None and f.action is None:
+        return meta["rows"]
+    if "users" not in meta:
+        return None
+    users = meta["users"].get(str(f.created_by), 0) if f.created_by is not None else None
+    actions = meta["actions"].get(f.action, 0) if f.action is not None else None
+    if users is None or actions is None:
+        return actions if users is None else users
+    # İstifadəçi + əməliyyat birgə sayılmır: yalnız biri 0 olduqda məlumdur
+    return 0 if not users or not actions else None
+
+
+# Oxunmuş seqment sətirləri (created_at, id, sətir), köhnədən yeniyə; ölçü baytla məhduddur
+_cache: OrderedDict[tuple, tuple[tuple, int]] = OrderedDict()
+_cache_bytes = 0
+_cache_lock = Lock()
+# Sətrin özündən əlavə tuple/datetime/int üçün təxmini yer
+_ENTRY_OVERHEAD = 150
+
+
+def _sort_key(entry: tuple) -> tuple[datetime, int]:
+    return entry[0], entry[1]
+
+
+def _filtered(month: str, gen: int, f: AuditFilter) -> tuple[tuple, ...]:
+    """
+    (created_at, id, line) of the rows of `month` matching `f` (without the
+    cursor), oldest first, without duplicate ids. The segment is streamed:
+    only matching rows are kept, as their JSON lines, and parsed again for
+    the page that returns them.
+    """
+    global _cache_bytes
+    if _covers_month(month, f._replace(before=None)):
+        # Bütün ayı əhatə edən tarix aralıqları eyni keş girişini paylaşır
+        f = f._replace(start=None, end=None)
+    key = (month, gen, f._replace(before=None))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached[0]
+
+    rows: dict[int, tuple] = {}
+    for line in _lines(month):
+        row = _parse(line)
+        if _matches(row, f):
+            rows[row["id"]] = (row["created_at"], row["id"], line)
+    entries = tuple(sorted(rows.values(), key=_sort_key))
+    size = sum(sys.getsizeof(line) + _ENTRY_OVERHEAD for _, _, line in entries)
+
+    limit = settings.audit_archive_cache_max_bytes
+    if size <= limit:
+        with _cache_lock:
+            if key not in _cache:
+                _cache[key] = (entries, size)
+                _cache_bytes += size
+                while _cache_bytes > limit:
+                    _, (_, evicted) = _cache.popitem(last=False)
+                    _cache_bytes -= evicted
+    return entries
+
+
+def _rows(month: str, gen: int, f: AuditFilter) -> tuple[tuple[tuple, ...], int]:
+    """_filtered() and the number of its entries before `f.before` (binary search)."""
+    entries = _filtered(month, gen, f)
+    if f.before is None:
+        return entries, len(entries)
+    return entries, bisect_left(entries, f.before, key=_sort_key)
+
+
+def _months(f: AuditFilter) -> Iterator[tuple[str, dict, int]]:
+    """(month, index entry, generation) of segments that may match, newest first."""
+    gen = generation()
+    segments = _index(gen)["segments"]
+    for month in sorted(segments, reverse=True):
+        if _may_match(month, segments[month], f, gen):
+            yield month, segments[month], gen
+
+
+def count(f: AuditFilter) -> int:
+    total = 0
+    for month, meta, gen in _months(f):
+        # Tam ay, filtr yoxdur və ya yalnız istifadəçi/əməliyyat: indeksdəki say kifayətdir
+        known = _known_count(month, meta, f)
+        total += known if known is not None else _rows(month, gen, f)[1]
+    return total
+
+
+def page(f: AuditFilter, offset: int = 0, limit: int | None = None) -> list[dict]:
+    """Archived rows matching `f`, newest first (created_at DESC, like AuditLogRepository.list)."""
+    result: list[dict] = []
+    for month, meta, gen in _months(f):
+        if limit is not None and len(result) >= limit:
+            break
+        if offset:
+            known = _known_count(month, meta, f)
+            if known is not None and offset >= known:
+                offset -= known
+                continue
+        entries, end = _rows(month, gen, f)
+        if offset >= end:
+            offset -= end
+            continue
+        take = end - offset if limit is None else min(end - offset, limit - len(result))
+        stop = end - offset
+        result.extend(_parse(line) for _, _, line in reversed(entries[stop - take:stop]))
+        offset = 0
+    return result
+
+
+def _serial(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+
+
+def in_table() -> tuple[tuple[datetime, int], ...]:
+    """(cutoff, max_id) watermarks: table rows with created_at < cutoff and id <= max_id are archived."""
+    return tuple(
+        (datetime.fromisoformat(mark["cutoff"]), mark["max_id"])
+        for mark in load_index().get("in_table", ())
+    )
+
+
+def _set_watermark(index: dict, cutoff: datetime, max_id: int) -> None:
+    marks = index.setdefault("in_table", [])
+    for mark in marks:
+        if mark["cutoff"] == cutoff.isoformat():
+            mark["max_id"] = max(mark["max_id"], max_id)
+            return
+    marks.append({"cutoff": cutoff.isoformat(), "max_id": max_id})
+
+
+def _add_counts(entry: dict, rows) -> None:
+    users, actions = entry["users"], entry["actions"]
+    for row in rows:
+        if row["created_by"] is not None:
+            users[str(row["created_by"])] = users.get(str(row["created_by"]), 0) + 1
+        actions[row["action"]] = actions.get(row["action"], 0) + 1
+
+
+def _segment_counts(month: str, entry: dict) -> dict:
+    """Per-user and per-action row counts of a segment, read from its file."""
+    seen: set[int] = set()
+
+    def rows():
+        for line in _lines(month):
+            row = json.loads(line)
+            # İndeksə düşməmiş (yazılışı yarımçıq qalmış) və təkrar sətirlər sayılmır
+            if entry["min_id"] <= row["id"] <= entry["max_id"] and row["id"] not in seen:
+                seen.add(row["id"])
+                yield row
+
+    counts = {"users": {}, "actions": {}}
+    _add_counts(counts, rows())
+    return counts
+
+
+def reindex() -> int:
+    """
+    Fill in the per-user and per-action counts of segments archived before
+    the index had them. Returns the number of segments updated.
+    """
+    with _lock:
+        index = _read_json(INDEX_FILE)
+        if not index:
+            return 0
+        months = [month for month, entry in index["segments"].items() if "users" not in entry]
+        for month in months:
+            index["segments"][month].update(_segment_counts(month, index["segments"][month]))
+        if months:
+            _write_json(INDEX_FILE, index)
+        return len(months)
+
+
+def append(rows: list[dict], cutoff: datetime | None = None) -> None:
+    """
+    Append AuditLogs rows (column -> value) to their monthly segments and
+    update the index. Rows whose id is already inside a segment's id range
+    (re-read after an interrupted run) are skipped. With `cutoff` (the rows
+    are about to be deleted) a watermark hides them from table reads.
+    """
+    by_month: dict[str, list[dict]] = {}
+    for row in rows:
+        by_month.setdefault(row["created_at"].strftime("%Y-%m"), []).append(row)
+
+    with _lock:
+        index = _read_json(INDEX_FILE) or {"segments": {}}
+        for month, month_rows in sorted(by_month.items()):
+            entry = index["segments"].get(month)
+            if entry is not None:
+                # Arxivləmə id sırası ilə gedir: seqmentin id aralığındakı sətirlər artıq yazılıb
+                month_rows = [r for r in month_rows if not entry["min_id"] <= r["id"] <= entry["max_id"]]
+                if not month_rows:
+                    continue
+            entry = entry or {"rows": 0, "users": {}, "actions": {}}
+            if "users" not in entry:
+                # Saylardan əvvəlki seqment: yeni sətirlər yazılmazdan əvvəl saylar doldurulur
+                entry.update(_segment_counts(month, entry))
+            data = "".join(json.dumps(row, default=_serial, ensure_ascii=False) + "\n" for row in month_rows)
+            with open(_path(f"{month}.jsonl.gz"), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                    gz.write(data.encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+
+            keys = _read_json(f"{month}.keys.json") or {"entities": {}, "users": [], "actions": []}
+            for row in month_rows:
+                keys["entities"].setdefault(row["entity_type"], []).append(row["entity_id"])
+            keys["entities"] = {etype: sorted(set(ids)) for etype, ids in keys["entities"].items()}
+            keys["users"] = sorted(set(keys["users"]) | {r["created_by"] for r in month_rows if r["created_by"] is not None})
+            keys["actions"] = sorted(set(keys["actions"]) | {r["action"] for r in month_rows})
+            _write_json(f"{month}.keys.json", keys)
+
+            _add_counts(entry, month_rows)
+            created = [r["created_at"].isoformat() for r in month_rows]
+            ids = [r["id"] for r in month_rows]
+            entry["rows"] += len(month_rows)
+            entry["min_created_at"] = min(created + [entry.get("min_created_at") or created[0]])
+            entry["max_created_at"] = max(created + [entry.get("max_created_at") or created[0]])
+            entry["min_id"] = min(ids + [entry.get("min_id", ids[0])])
+            entry["max_id"] = max(ids + [entry.get("max_id", ids[0])])
+            index["segments"][month] = entry
+        if cutoff is not None and rows:
+            _set_watermark(index, cutoff, max(r["id"] for r in rows))
+        _write_json(INDEX_FILE, index)
+
+
+def _clear_watermarks(cutoff: datetime) -> None:
+    """No table row older than `cutoff` is left: watermarks up to it are obsolete."""
+    with _lock:
+        index = _read_json(INDEX_FILE)
+        if not index or not index.get("in_table"):
+            return
+        index["in_table"] = [m for m in index["in_table"] if datetime.fromisoformat(m["cutoff"]) > cutoff]
+        _write_json(INDEX_FILE, index)
+
+
+def archive_older_than(cutoff: datetime, batch_size: int = 5000) -> int:
+    """
+    Move AuditLogs rows with created_at < `cutoff` to the archive in id
+    order, `batch_size` rows per segment write + DELETE. Returns the number
+    of rows moved.
+    """
+    from sqlalchemy import delete, select
+
+    from app.db.session import engine
+    from app.models.audit_log import AuditLog
+
+    table = AuditLog.__table__
+    moved = 0
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            result = conn.execute(
+                select(*(table.c[name] for name in COLUMNS))
+                .where(table.c.created_at < cutoff, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            )
+            rows = [dict(row._mapping) for row in result]
+        if not rows:
+            _clear_watermarks(cutoff)
+            return moved
+        append(rows, cutoff)
+        # Sətirlər yalnız fayla yazıldıqdan (fsync) sonra silinir
+        # id aralığı ilə: MSSQL-də IN (...) parametr sayı 2100 ilə məhduddur
+        first_id, last_id = rows[0]["id"], rows[-1]["id"]
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.c.created_at < cutoff, table.c.id >= first_id, table.c.id <= last_id,
+            ))
+        moved += len(rows)
+
+
+def default_cutoff(today: date | None = None) -> datetime:
+    """Start of the month audit_archive_retention_days ago: only whole months are archived."""
+    day = (today or date.today()) - timedelta(days=settings.audit_archive_retention_days)
+    return datetime(day.year, day.month, 1)
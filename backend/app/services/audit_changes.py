@@ -0,0 +1,59 @@
+"""
+Field-level rows (AuditChanges) derived from an AuditLogs row's
+old_values / new_values JSON.
+
+A field is emitted when its old and new values differ after normalization
+(strings as-is, other JSON values serialized, both cut to
+VALUE_MAX_LENGTH). CREATE-like rows without old_values emit only the
+non-null new fields.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any
+
+from app.models.audit_change import VALUE_MAX_LENGTH
+from app.services import audit_diff
+
+
+def field_value(value: Any) -> str | None:
+    """Normalized, indexable text form of a JSON value."""
+    if value is None:
+        return None
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return text[:VALUE_MAX_LENGTH]
+
+
+def _load(values: str | dict | None) -> dict:
+    if not values:
+        return {}
+    if isinstance(values, dict):
+        return values
+    try:
+        data = json.loads(audit_diff.decode(values))
+    except (ValueError, zlib.error):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def changes_for(row: dict, audit_id: int) -> list[dict]:
+    """AuditChanges rows (column -> value) for one AuditLogs row."""
+    old, new = _load(row.get("old_values")), _load(row.get("new_values"))
+    changes = []
+    for field in dict.fromkeys([*new, *old]):
+        old_value, new_value = field_value(old.get(field)), field_value(new.get(field))
+        if old_value == new_value:
+            continue
+        changes.append({
+            "audit_id": audit_id,
+            "entity_type": row["entity_type"],
+            "entity_id": row["entity_id"],
+            "field": str(field)[:100],
+            "old_value": old_value,
+            "new_value": new_value,
+            "created_by": row.get("created_by"),
+            "created_by_name": row.get("created_by_name"),
+            "created_at": row["created_at"],
+        })
+    return changes
@@ -0,0 +1,64 @@
+"""
+Compact storage format for AuditLogs.old_values / new_values.
+
+compact() keeps only the fields whose value actually changes (and drops
+nulls from create-like payloads without old values); encode() stores the
+JSON as is, or zlib-compressed as "z:" + base64 when it is at least
+audit_diff_compress_min_bytes long. decode() returns the JSON text for
+either form, so readers (AuditLogOut, AuditChanges) see plain JSON.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any
+
+from app.core.config import settings
+
+COMPRESSED_PREFIX = "z:"
+
+
+def json_serial(obj):
+    """JSON serializer for objects not serializable by default json code"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _normalized(value: Any) -> str:
+    return json.dumps(value, default=json_serial, sort_keys=True)
+
+
+def compact(old: dict | None, new: dict | None) -> tuple[dict | None, dict | None]:
+    """Drop fields that are present on both sides with the same value."""
+    if not old:
+        return old, {k: v for k, v in new.items() if v is not None} if new else new
+    if not new:
+        return old, new
+    unchanged = {k for k in old.keys() & new.keys() if _normalized(old[k]) == _normalized(new[k])}
+    return (
+        {k: v for k, v in old.items() if k not in unchanged},
+        {k: v for k, v in new.items() if k not in unchanged},
+    )
+
+
+def encode(values: dict | None) -> str | None:
+    if not values:
+        return None
+    text = json.dumps(values, default=json_serial, ensure_ascii=False)
+    threshold = settings.audit_diff_compress_min_bytes
+    if threshold is not None and len(text) >= threshold:
+        packed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text.encode("utf-8"))).decode("ascii")
+        # Kiçik qazancda sıxılmamış saxlanılır (oxunuşu ucuz qalsın)
+        if len(packed) < len(text):
+            return packed
+    return text
+
+
+def decode(stored: str | None) -> str | None:
+    """JSON text of a stored value (compressed or not)."""
+    if stored and stored.startswith(COMPRESSED_PREFIX):
+        return zlib.decompress(base64.b64decode(stored[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    return stored
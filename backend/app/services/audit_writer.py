@@ -0,0 +1,342 @@
+"""
+Asynchronous, batched AuditLogs writer.
+
+AuditService.log_action only builds the row and puts it on an in-process
+queue; a daemon thread inserts queued rows in batches with one executemany
+(pyodbc fast_executemany on MSSQL, see app/db/session.py), plus their
+field-level AuditChanges rows when audit_changes_enabled. A batch is flushed
+when it reaches audit_writer_batch_size rows or audit_writer_flush_seconds
+after its first row, whichever comes first, or at once when flush() is
+called (audit reads do, so this process's queued rows are visible).
+
+If the insert fails because the DB is unavailable, or the queue is full,
+rows are appended to a per-process JSONL spill file in audit_writer_spill_dir
+(fsync'ed). Spill files of any process are replayed after the next
+successful flush and at startup. Any other failure is blamed on the rows: the
+batch is retried row by row and rows the DB still rejects go to a dead-letter
+file in the "rejected" subdirectory (same format, never replayed
+automatically), so one bad row can neither block its batch nor stop a
+replay. shutdown() drains the queue before the process exits.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from threading import Lock
+
+from app.core.config import settings
+from app.services import audit_changes
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+# flush() oyadır: yığılmış paket audit_writer_flush_seconds gözləmədən yazılır
+_FLUSH = object()
+
+# Başqa prosesin spill faylı bu qədər saniyə dəyişməyibsə təkrar yazıla bilər
+SPILL_SETTLE_SECONDS = 5
+
+_queue: queue.Queue | None = None
+_thread: threading.Thread | None = None
+_lock = Lock()
+_spill_lock = Lock()
+_stats = {"enqueued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "rejected": 0, "failures": 0}
+
+
+def spill_dir() -> str:
+    path = os.path.abspath(settings.audit_writer_spill_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _spill_path() -> str:
+    return os.path.join(spill_dir(), f"{os.getpid()}.jsonl")
+
+
+def _rejected_path() -> str:
+    path = os.path.join(spill_dir(), "rejected")
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, f"{os.getpid()}.jsonl")
+
+
+def _ensure_started() -> queue.Queue:
+    global _queue, _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _queue = queue.Queue(maxsize=settings.audit_writer_max_queue)
+            _thread = threading.Thread(target=_run, args=(_queue,), name="audit-writer", daemon=True)
+            _thread.start()
+        return _queue
+
+
+def enqueue(row: dict) -> None:
+    """Queue one AuditLogs row (column -> value). Never blocks the request."""
+    q = _ensure_started()
+    _stats["enqueued"] += 1
+    try:
+        q.put_nowait(row)
+    except queue.Full:
+        # Növbə doludursa (DB çox yavaşdır) sətir itirilmir, diskə yazılır
+        _spill([row])
+
+
+def _insert(rows: list[dict]) -> None:
+    from sqlalchemy import insert
+
+    from app.db.session import engine
+    from app.models.audit_change import AuditChange
+    from app.models.audit_log import AuditLog
+
+    table = AuditLog.__table__
+    with engine.begin() as conn:
+        if not settings.audit_changes_enabled:
+            conn.execute(insert(table), rows)
+            return
+        # AuditChanges üçün yeni id-lər lazımdır: insertmanyvalues (OUTPUT / RETURNING) sıranı saxlayır
+        ids = conn.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars().all()
+        changes = [change for row, id in zip(rows, ids) for change in audit_changes.changes_for(row, id)]
+        if changes:
+            conn.execute(insert(AuditChange.__table__), changes)
+
+
+def _is_unavailable(error: Exception) -> bool:
+    """Whether an insert failed because of the DB (connection, timeout) rather than the rows."""
+    from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    if isinstance(error, (OperationalError, InterfaceError, PoolTimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+def _write(rows: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Insert `rows`; returns (unwritten, rejected). `unwritten` are the rows
+    left because the DB is unavailable (the caller spills them). When the
+    batch fails for another reason the rows are retried one by one and
+    `rejected` are those the DB still refuses (for the dead-letter file).
+    """
+    try:
+        _insert(rows)
+        return [], []
+    except Exception as e:
+        if _is_unavailable(e):
+            return rows, []
+        logger.warning("Audit batch of %d rows rejected, retrying row by row: %s", len(rows), e)
+    rejected = []
+    for i, row in enumerate(rows):
+        try:
+            _insert([row])
+        except Exception as e:
+            if _is_unavailable(e):
+                return rows[i:], rejected
+            logger.warning("Audit row rejected (%s %s): %s", row.get("entity_type"), row.get("entity_id"), e)
+            rejected.append(row)
+    return [], rejected
+
+
+def _reject(rows: list[dict]) -> None:
+    if rows:
+        _append_spill(rows, _rejected_path())
+        _stats["rejected"] += len(rows)
+
+
+def _append_spill(rows: list[dict], path: str | None = None) -> None:
+    def serial(value):
+        return value.isoformat() if isinstance(value, datetime) else str(value)
+
+    data = "".join(json.dumps(row, default=serial, ensure_ascii=False) + "\n" for row in rows)
+    with _spill_lock:
+        with open(path or _spill_path(), "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _spill(rows: list[dict]) -> None:
+    _append_spill(rows)
+    _stats["spilled"] += len(rows)
+
+
+def _load_spill(path: str) -> list[dict]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # Yarımçıq yazılmış sonuncu sətir (proses yazarkən öldürülüb)
+                continue
+            if row.get("created_at"):
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+            rows.append(row)
+    return rows
+
+
+def replay_spill() -> int:
+    """Insert rows from all spill files; returns the number of rows written."""
+    own = _spill_path()
+    replayed = 0
+    for path in sorted(glob.glob(os.path.join(spill_dir(), "*.jsonl"))):
+        try:
+            # Başqa prosesin faylına hələ yazıla bilər: yalnız bir müddət toxunulmayanlar
+            if path != own and time.time() - os.path.getmtime(path) < SPILL_SETTLE_SECONDS:
+                continue
+        except FileNotFoundError:
+            continue
+        # Faylı adını dəyişərək "tuturuq": eyni faylı iki proses təkrar yazmasın
+        claimed = f"{path}.replay-{os.getpid()}"
+        with _spill_lock:
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+        rows = _load_spill(claimed)
+        batch_size = settings.audit_writer_batch_size
+        done = 0
+        try:
+            while done < len(rows):
+                batch = rows[done:done + batch_size]
+                # Rədd edilən sətirlər dead-letter faylına gedir; DB əlçatmazdırsa qalıq saxlanılır
+                unwritten, rejected = _write(batch)
+                _reject(rejected)
+                written = len(batch) - len(unwritten) - len(rejected)
+                done += len(batch) - len(unwritten)
+                replayed += written
+                _stats["replayed"] += written
+                if unwritten:
+                    raise RuntimeError(f"database unavailable, {len(rows) - done} audit rows kept for the next replay")
+        except Exception:
+            # Yazılmamış qalıq yenidən spill faylına qaytarılır
+            try:
+                _append_spill(rows[done:])
+            except Exception:
+                # Qalıq yazılmadı (disk dolu, icazə): tutulmuş fayl silinmir, növbəti replay-ə qaytarılır.
+                # Artıq yazılmış `done` sətir təkrar yazıla bilər, amma heç biri itmir
+                os.replace(claimed, _unclaimed_path(path))
+                raise
+            os.remove(claimed)
+            raise
+        os.remove(claimed)
+    return replayed
+
+
+def _unclaimed_path(path: str) -> str:
+    """New spill file name for a claimed file that could not be replayed (never overwrites `path`)."""
+    base = path[:-len(".jsonl")]
+    return f"{base}-{uuid.uuid4().hex[:8]}.jsonl"
+
+
+def _flush(batch: list[dict]) -> None:
+    unwritten, rejected = _write(batch)
+    if rejected:
+        try:
+            _reject(rejected)
+        except OSError:
+            # Dead-letter faylı yazılmadı: sətirlər itməsin, spill-ə (növbəti replay yenidən rədd edəcək)
+            logger.warning("Audit dead-letter write failed, %d rows spilled", len(rejected), exc_info=True)
+            _spill(rejected)
+    _stats["written"] += len(batch) - len(unwritten) - len(rejected)
+    if unwritten:
+        _stats["failures"] += 1
+        logger.warning("Audit batch insert failed (database unavailable), %d rows spilled", len(unwritten))
+        _spill(unwritten)
+        return
+    _stats["batches"] += 1
+    if glob.glob(os.path.join(spill_dir(), "*.jsonl")):
+        try:
+            replay_spill()
+        except Exception:
+            logger.warning("Audit spill replay failed", exc_info=True)
+
+
+def _run(q: queue.Queue) -> None:
+    try:
+        replay_spill()
+    except Exception:
+        logger.warning("Audit spill replay failed", exc_info=True)
+
+    batch: list[dict] = []
+    deadline = None
+    stopping = False
+    while not stopping:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            item = q.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        if item is _STOP:
+            stopping = True
+        elif item is not None and item is not _FLUSH:
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + settings.audit_writer_flush_seconds
+        if batch and (stopping or item is None or item is _FLUSH or len(batch) >= settings.audit_writer_batch_size):
+            _flush(batch)
+            for _ in batch:
+                q.task_done()
+            batch = []
+            deadline = None
+        if item is _STOP or item is _FLUSH:
+            q.task_done()
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """
+    Write queued rows now instead of after audit_writer_flush_seconds and
+    wait until they are written (or spilled); False on timeout.
+    """
+    q = _queue
+    if q is None or not q.unfinished_tasks:
+        return True
+    try:
+        q.put_nowait(_FLUSH)
+    except queue.Full:
+        # Növbə doludursa writer onsuz da fasiləsiz yazır
+        pass
+    # queue.join() timeout qəbul etmir
+    deadline = time.monotonic() + timeout
+    while q.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def shutdown(timeout: float = 10.0) -> None:
+    """Write out everything still queued and stop the thread (app shutdown)."""
+    global _thread
+    with _lock:
+        thread, q = _thread, _queue
+        _thread = None
+    if thread is None or not thread.is_alive():
+        return
+    q.put(_STOP)
+    thread.join(timeout)
+    if thread.is_alive():
+        # DB cavab vermir: qalan sətirlər diskə, növbəti başlanğıcda yazılacaq
+        pending = []
+        while True:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and item is not _FLUSH:
+                pending.append(item)
+        if pending:
+            _spill(pending)
+
+
+def get_stats() -> dict[str, int]:
+    q = _queue
+    return {**_stats, "queued": q.qsize() if q is not None else 0}
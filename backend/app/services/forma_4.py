@@ -0,0 +1,226 @@
+"""
+Forma 4 data engine.
+
+ReportRepository.iter_forma_4_records() yields (appeal, executors) pairs of
+plain projection rows; this module turns them into 18-value row tuples using
+id -> name maps built once per export from reference_data. No ORM objects
+and no lookup joins are involved.
+
+iter_frame_rows() produces the same tuples from the DataFrame chunks of
+ReportRepository.iter_forma_4_frames() (settings.report_forma_4_engine =
+"pandas"); see benchmarks/forma_4_rows.py.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+from app.models.department import Department, DepOfficial
+from app.models.executor import Direction, ExecutorList
+from app.models.lookup import ApIndex, ApStatus, ChiefInstruction, ContentType, WhoControl
+from app.core.reference_data import reference_data
+
+COLUMN_COUNT = 18
+
+
+class LookupMaps(NamedTuple):
+    departments: dict
+    officials: dict
+    chiefs: dict
+    instructions: dict
+    content_types: dict
+    ap_indexes: dict
+    statuses: dict
+    directions: dict
+    executors: dict
+
+
+def _names(model, field: str) -> dict:
+    return {id: getattr(record, field) or "" for id, record in reference_data.table(model).items()}
+
+
+def lookup_maps() -> LookupMaps:
+    """Snapshot of the id -> display value maps used by Forma 4 (one per export)."""
+    return LookupMaps(
+        departments=_names(Department, "department"),
+        officials=_names(DepOfficial, "official"),
+        chiefs=_names(WhoControl, "chief"),
+        instructions=_names(ChiefInstruction, "instructions"),
+        content_types=_names(ContentType, "content_type"),
+        # Müraciətin indeksi sahəsində tam ad yox, yalnız indeks nömrəsi göstərilir
+        ap_indexes={
+            id: str(record.ap_index_id)
+            for id, record in reference_data.table(ApIndex).items()
+            if record.ap_index_id is not None
+        },
+        statuses=_names(ApStatus, "status"),
+        directions=_names(Direction, "direction"),
+        executors=_names(ExecutorList, "executor"),
+    )
+
+
+def format_date(value) -> str:
+    # strftime("%d.%m.%Y") ilə eyni nəticə, daha sürətli
+    return f"{value.day:02d}.{value.month:02d}.{value.year}" if value else ""
+
+
+def _numbered(number, when) -> str | None:
+    if not number:
+        return None
+    return f"{number} {format_date(when)}" if when else str(number)
+
+
+def _join_unique(values: Iterable[str | None]) -> str:
+    return "\n".join(dict.fromkeys(v for v in values if v))
+
+
+def build_row(ap, executors: Sequence, maps: LookupMaps) -> tuple:
+    """One Forma 4 row (columns 1..18) from an appeal projection row and its executor rows."""
+    # Column 5: haradan gəlib
+    haradan = [maps.departments[ap.dep_id]] if ap.dep_id in maps.departments else []
+    if ap.official_id in maps.officials:
+        haradan.append(maps.officials[ap.official_id])
+
+    # Column 10: müraciətin növü + təkrar olub-olmaması
+    content_type = [maps.content_types[ap.content_type_id]] if maps.content_types.get(ap.content_type_id) else []
+    if ap.repetition:
+        content_type.append("Təkrar")
+
+    # Column 11: Kim baxmışdır və dərkənar
+    derkenar = [maps.chiefs[ap.who_control_id]] if ap.who_control_id in maps.chiefs else []
+    if ap.instructions_id in maps.instructions:
+        derkenar.append(maps.instructions[ap.instructions_id])
+
+    return (
+        ap.reg_num or "",
+        format_date(ap.reg_date),
+        ap.in_ap_num or "",
+        format_date(ap.in_ap_date),
+        "\n".join(haradan),
+        ap.content or "",
+        maps.ap_indexes.get(ap.ap_index_id, ""),
+        ap.paper_count or "",
+        # Hesabat indeksi sahəsində də yalnız indeks nömrəsi
+        str(ap.account_index_id) if ap.account_index_id is not None else "",
+        "\n".join(content_type),
+        "\n".join(derkenar),
+        _join_unique(maps.directions.get(e.direction_id) for e in executors),
+        _join_unique(maps.executors.get(e.executor_id) for e in executors),
+        "\n".join(filter(None, (_numbered(e.out_num, e.out_date) for e in executors))),
+        maps.statuses.get(ap.status, ""),
+        "\n".join(str(e.attach_num) for e in executors if e.attach_num),
+        "\n".join(str(e.attach_paper_num) for e in executors if e.attach_paper_num),
+        "\n".join(filter(None, (_numbered(e.r_num, e.r_date) for e in executors))),
+    )
+
+
+def iter_rows(records: Iterable[tuple], maps: LookupMaps | None = None) -> Iterator[tuple]:
+    """Row tuples for (appeal, executors) records in a single pass."""
+    maps = maps or lookup_maps()
+    for ap, executors in records:
+        yield build_row(ap, executors, maps)
+
+
+# ---- pandas (vectorized) variant: ReportRepository.iter_forma_4_frames ----
+
+def _format_dates(series):
+    import numpy as np
+    import pandas as pd
+
+    # Yalnız unikal günlər formatlanır; NaT kodu -1 -> sonuncu element ""
+    codes, days = pd.factorize(series.dt.normalize())
+    labels = np.append(days.strftime("%d.%m.%Y").to_numpy(dtype=object), "")
+    return pd.Series(labels[codes], index=series.index, dtype=object)
+
+
+def _present(series):
+    """Values as object dtype with missing / empty strings as None."""
+    series = series.astype(object)
+    return series.where(series.notna() & (series != ""), None)
+
+
+def _join_present(*parts):
+    """Row-wise newline join of the parts that are not None (all same index)."""
+    out = parts[0].astype(object)
+    for part in parts[1:]:
+        part = part.astype(object)
+        both = out.notna() & part.notna()
+        joined = out.where(~both, out.astype(str) + "\n" + part.astype(str))
+        out = joined.where(out.notna(), part)
+    return out.fillna("")
+
+
+def _numbered_series(numbers, dates):
+    numbers = _present(numbers)
+    text = numbers.astype(str)
+    dated = dates.notna()
+    text = text.where(~dated, text + " " + _format_dates(dates))
+    return text.where(numbers.notna(), None)
+
+
+def _per_appeal(executors, values, unique: bool = False):
+    """appeal_id -> newline-joined non-empty `values`, in executor order."""
+    import numpy as np
+
+    frame = executors[["appeal_id"]].assign(value=_present(values)).dropna(subset=["value"])
+    if unique:
+        frame = frame.drop_duplicates()
+    appeal_ids = frame["appeal_id"].to_numpy()
+    texts = frame["value"].astype(str).tolist()
+    if not texts:
+        return {}
+    # Sətirlər appeal_id üzrə sıralıdır: qrup sərhədləri numpy ilə, birləşdirmə dilimlərlə
+    # (groupby().agg(join) hər qrup üçün Series yaradır və bir neçə dəfə yavaşdır)
+    starts = np.flatnonzero(np.r_[True, appeal_ids[1:] != appeal_ids[:-1]])
+    ends = np.r_[starts[1:], len(texts)]
+    return {appeal_ids[a]: "\n".join(texts[a:b]) for a, b in zip(starts, ends)}
+
+
+def frame_rows(appeals, executors, maps: LookupMaps) -> list[tuple]:
+    """Same rows as build_row() for a chunk of appeals, computed column-wise."""
+    import pandas as pd
+
+    ids = appeals["id"]
+
+    def mapped(column, mapping):
+        return appeals[column].map(mapping)
+
+    def from_executors(series):
+        return ids.map(series).fillna("")
+
+    def nullable(column):
+        return appeals[column].astype(object).where(appeals[column].notna(), None)
+
+    repetition = appeals["repetition"].fillna(False).astype(bool)
+    account_index = appeals["account_index_id"].astype("Int64").astype("string")
+
+    columns = [
+        nullable("reg_num").fillna(""),
+        _format_dates(appeals["reg_date"]),
+        nullable("in_ap_num").fillna(""),
+        _format_dates(appeals["in_ap_date"]),
+        _join_present(mapped("dep_id", maps.departments), mapped("official_id", maps.officials)),
+        nullable("content").fillna(""),
+        mapped("ap_index_id", maps.ap_indexes).fillna(""),
+        _present(appeals["paper_count"]).fillna(""),
+        account_index.astype(object).where(account_index.notna(), ""),
+        _join_present(
+            _present(mapped("content_type_id", maps.content_types)),
+            pd.Series(["Təkrar"] * len(appeals), index=appeals.index, dtype=object).where(repetition, None),
+        ),
+        _join_present(mapped("who_control_id", maps.chiefs), mapped("instructions_id", maps.instructions)),
+        from_executors(_per_appeal(executors, executors["direction_id"].map(maps.directions), unique=True)),
+        from_executors(_per_appeal(executors, executors["executor_id"].map(maps.executors), unique=True)),
+        from_executors(_per_appeal(executors, _numbered_series(executors["out_num"], executors["out_date"]))),
+        mapped("status", maps.statuses).fillna(""),
+        from_executors(_per_appeal(executors, executors["attach_num"])),
+        from_executors(_per_appeal(executors, executors["attach_paper_num"])),
+        from_executors(_per_appeal(executors, _numbered_series(executors["r_num"], executors["r_date"]))),
+    ]
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def iter_frame_rows(frames, maps: LookupMaps | None = None) -> Iterator[tuple]:
+    """Row tuples for (appeals_df, executors_df) chunks."""
+    maps = maps or lookup_maps()
+    for appeals, executors in frames:
+        yield from frame_rows(appeals, executors, maps)
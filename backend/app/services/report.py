@@ -1,42 +1,114 @@
-from app.repositories.report import ReportRepository
-from app.schemas.report import ReportResponse, ReportItem, ReportParams
+from fastapi import HTTPException
+from app.repositories.report import CROSSTAB_MAX_DIMENSIONS, STATS_GROUP_COLUMNS, TIME_BUCKETS, ReportRepository
+from app.schemas.report import CrossTabCell, CrossTabResponse, Forma4Page, Forma4Row, ReportResponse, ReportItem, ReportParams
 from app.models.user import User
-import pandas as pd
+from app.core import data_version, render_cache, report_cache, tracing
+from app.core.config import settings
+from app.services import forma_4, report_docx, report_pdf, report_render
+from app.core.reference_data import reference_data
 import io
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
 from datetime import date, datetime
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_ORIENT
-from docx.enum.table import WD_TABLE_ALIGNMENT, WD_ALIGN_VERTICAL
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import os
 
-# Try to register a font that supports Azerbaijani characters
-try:
-    font_path = "C:\\Windows\\Fonts\\arial.ttf"
-    if os.path.exists(font_path):
-        pdfmetrics.registerFont(TTFont('Arial', font_path))
-        DEFAULT_FONT = 'Arial'
-    else:
-        DEFAULT_FONT = 'Helvetica'
-except Exception:
-    DEFAULT_FONT = 'Helvetica'
+# pandas, python-docx və reportlab yalnız ixrac zamanı (funksiyaların içində) import olunur:
+# app.api.deps bu modulu hər worker-də yükləyir, ixrac isə nadir əməliyyatdır.
+# Qabaqcadan yükləmək üçün: warm_up_exports() (REPORT_EXPORT_WARMUP).
+
+# Azərbaycan hərflərini dəstəkləyən şrift (Windows serverlərində Arial)
+ARIAL_FONT_PATH = "C:\\Windows\\Fonts\\arial.ttf"
+ARIAL_BOLD_FONT_PATH = "C:\\Windows\\Fonts\\arialbd.ttf"
+
+
+@lru_cache(maxsize=None)
+def pdf_fonts() -> tuple[str, str]:
+    """(regular, bold) reportlab font names; Arial is registered on first call when available."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    try:
+        if not os.path.exists(ARIAL_FONT_PATH):
+            return "Helvetica", "Helvetica-Bold"
+        pdfmetrics.registerFont(TTFont("Arial", ARIAL_FONT_PATH))
+    except Exception:
+        return "Helvetica", "Helvetica-Bold"
+    # Qalın şrift: Arial-Bold ayrıca qeydiyyat tələb edir, tapılmasa adi şrift
+    try:
+        pdfmetrics.registerFont(TTFont("Arial-Bold", ARIAL_BOLD_FONT_PATH))
+        return "Arial", "Arial-Bold"
+    except Exception:
+        return "Arial", "Arial"
+
+
+def warm_up_exports() -> None:
+    """
+    Import the export libraries, register PDF fonts and build the DOCX
+    template, so the first export in this process does not pay for them.
+    """
+    import openpyxl  # noqa: F401
+    import reportlab.platypus  # noqa: F401
+
+    pdf_fonts()
+    report_docx.forma_4_template()
+    if settings.report_forma_4_engine == "pandas":
+        import pandas  # noqa: F401
+
+
+# format -> (fayl uzantısı, media type)
+EXPORT_FORMATS = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "word": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": ("pdf", "application/pdf"),
+}
+REPORT_KINDS = ("forma_4", "appeal_stats")
+
+TIME_BUCKET_LABELS = {"day": "Gün", "week": "Həftə", "month": "Ay", "quarter": "Rüb", "year": "İl"}
+
+
+def bucket_name(bucket: str, day: date) -> str:
+    """Display name of a time bucket starting at `day`."""
+    if bucket == "day":
+        return day.strftime("%d.%m.%Y")
+    if bucket == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if bucket == "month":
+        return day.strftime("%m.%Y")
+    if bucket == "quarter":
+        return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+    return str(day.year)
+
+
+def section_scope(user: User) -> int | None:
+    """user_section_id filter for reports: admins see all sections."""
+    return None if user.is_admin else user.section_id
+
 
 class ReportService:
     def __init__(self, reports: ReportRepository):
         self.reports = reports
 
     def get_appeal_report(self, params: ReportParams, user: User) -> ReportResponse:
-        user_section_id = None
-        if not user.is_admin:
-            user_section_id = user.section_id
+        return self.appeal_report(params, section_scope(user))
+
+    def appeal_report(self, params: ReportParams, user_section_id: int | None) -> ReportResponse:
+        # Eyni parametrlərlə təkrar sorğular keşdən verilir (müraciət yazılışı keşi təmizləyir)
+        return report_cache.get_or_compute(
+            "appeal_stats",
+            (params.group_by,),
+            user_section_id,
+            params.start_date,
+            params.end_date,
+            lambda: self._build_appeal_report(params, user_section_id),
+            lambda: self._data_version(params.start_date, params.end_date, user_section_id),
+        )
+
+    def _data_version(self, start_date: date | None, end_date: date | None, user_section_id: int | None) -> tuple | None:
+        """Shared version of the appeals and reference data behind a report (None: unavailable)."""
+        return data_version.current(start_date, end_date, user_section_id)
 
+    def _build_appeal_report(self, params: ReportParams, user_section_id: int | None) -> ReportResponse:
         results = self.reports.get_appeal_stats(
             group_by=params.group_by,
             start_date=params.start_date,
@@ -63,182 +135,204 @@ class ReportService:
             end_date=params.end_date
         )
 
-    def _prepare_forma_4_rows(self, results):
-        rows = []
-        for ap in results:
-            # Column 5: haradan gəlib
-            haradan_parts = []
-            if ap.department:
-                haradan_parts.append(ap.department.department)
-            if ap.official_rel:
-                haradan_parts.append(ap.official_rel.official)
-            haradan = "\n".join(haradan_parts)
-            
-            # Column 11: Kim baxmışdır və dərkənar
-            derkenar_parts = []
-            if ap.control_rel:
-                derkenar_parts.append(ap.control_rel.chief or "")
-            if ap.instruction_rel:
-                derkenar_parts.append(ap.instruction_rel.instructions or "")
-            derkenar = "\n".join(derkenar_parts)
-            
-            # Executors data
-            execs = ap.executors or []
-            directions = "\n".join(set(e.direction_name for e in execs if e.direction_name))
-            executor_names = "\n".join(set(e.executor_name for e in execs if e.executor_name))
-            
-            # Col 14: out_num and out_date
-            icra_senedi_parts = []
-            for e in execs:
-                if e.out_num:
-                    s = str(e.out_num)
-                    if e.out_date:
-                        s += f" {e.out_date.strftime('%d.%m.%Y')}"
-                    icra_senedi_parts.append(s)
-            icra_senedi = "\n".join(icra_senedi_parts)
-
-            # Col 18: r_num and r_date
-            gonderilme_parts = []
-            for e in execs:
-                if e.r_num:
-                    s = str(e.r_num)
-                    if e.r_date:
-                        s += f" {e.r_date.strftime('%d.%m.%Y')}"
-                    gonderilme_parts.append(s)
-            gonderilme = "\n".join(gonderilme_parts)
-
-            # Col 16-17: Tikildiyi iş №-si and İşdəki vərəq №-si
-            tikildiyi_is_parts = []
-            isdeki_vereq_parts = []
-            for e in execs:
-                if getattr(e, "attach_num", None):
-                    tikildiyi_is_parts.append(str(e.attach_num))
-                if getattr(e, "attach_paper_num", None):
-                    isdeki_vereq_parts.append(str(e.attach_paper_num))
-            tikildiyi_is = "\n".join(tikildiyi_is_parts)
-            isdeki_vereq = "\n".join(isdeki_vereq_parts)
-
-            # Column 10: müraciətin növü + təkrar olub-olmaması
-            content_type_parts = []
-            if ap.content_type_rel and ap.content_type_rel.content_type:
-                content_type_parts.append(ap.content_type_rel.content_type)
-            if getattr(ap, "repetition", None):
-                content_type_parts.append("Təkrar")
-            content_type_value = "\n".join(content_type_parts)
-
-            row = {
-                "1": ap.reg_num or "",
-                "2": ap.reg_date.strftime("%d.%m.%Y") if ap.reg_date else "",
-                "3": ap.in_ap_num or "",
-                "4": ap.in_ap_date.strftime("%d.%m.%Y") if ap.in_ap_date else "",
-                "5": haradan,
-                "6": ap.content or "",
-                # Müraciətin indeksi sahəsində tam ad yox, yalnız indeks nömrəsi göstərilsin
-                "7": str(ap.ap_index_rel.ap_index_id) if ap.ap_index_rel and ap.ap_index_rel.ap_index_id is not None else "",
-                "8": ap.paper_count or "",
-                # Hesabat indeksi sahəsində də yalnız indeks nömrəsi göstərilsin
-                "9": str(ap.account_index_id) if getattr(ap, "account_index_id", None) is not None else "",
-                "10": content_type_value,
-                "11": derkenar,
-                "12": directions,
-                "13": executor_names,
-                "14": icra_senedi,
-                "15": ap.status_rel.status if ap.status_rel else "",
-                "16": tikildiyi_is,
-                "17": isdeki_vereq,
-                "18": gonderilme
-            }
-            rows.append(row)
-        return rows
-
-    def generate_forma_4_excel(self, start_date: date | None, end_date: date | None, user: User) -> io.BytesIO:
-        user_section_id = None if user.is_admin else user.section_id
-        results = self.reports.get_forma_4_data(start_date, end_date, user_section_id)
-
-        headers = [
-            "Qeydəalınma №-si", "Qeydəalınma tarixi", "Daxil olan müraciətin №-si", "Daxil olan müraciətin tarixi",
-            "Müraciət haradan (kimdən) gəlib", "Müraciətin qısa məzmunu", "Müraciətin indeksi", "Vərəq sayı",
-            "Hesabat indeksi", "Müraciətin növü", "Kim baxmışdır və dərkənar",
-            "Müraciət hansı struktur bölməyə icraya verilib", "İcraçının adı və soyadı",
-            "Müraciət hansı sənədlə icra edilib", "Müraciətin baxılması vəziyyəti",
-            "Tikildiyi iş №-si", "İşdəki vərəq №-si", "Sənədin göndərilməsi barədə qeyd"
-        ]
-
-        from openpyxl import Workbook
-        from openpyxl.styles import Alignment, Border, Side, Font
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Forma 4"
-
-        # Header rows
-        ws.append(headers)
-        ws.append(list(range(1, 19)))
-
-        # Data rows start from row 3
-        if results:
-            prepared_rows = self._prepare_forma_4_rows(results)
-            for r in prepared_rows:
-                ws.append([r.get(str(i), "") for i in range(1, 19)])
-        else:
-            ws.append([""] * 18)
+    def appeal_crosstab(
+        self,
+        dimensions: list[str],
+        bucket: str | None,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+    ) -> CrossTabResponse:
+        """
+        Appeal counts by an optional time bucket and up to three grouping
+        dimensions, with subtotals for every prefix of the dimensions.
+        Rows are sorted by key; each subtotal follows its detail rows.
+        """
+        if len(dimensions) > CROSSTAB_MAX_DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"Ən çoxu {CROSSTAB_MAX_DIMENSIONS} ölçü seçilə bilər")
+        if len(set(dimensions)) != len(dimensions):
+            raise HTTPException(status_code=400, detail="Ölçülər təkrarlana bilməz")
+        unknown = [d for d in dimensions if d not in STATS_GROUP_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Naməlum ölçü: {', '.join(unknown)}")
+        if bucket is not None and bucket not in TIME_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"Naməlum zaman bölgüsü: {bucket}")
+        if not dimensions and bucket is None:
+            raise HTTPException(status_code=400, detail="Ən azı bir ölçü və ya zaman bölgüsü seçilməlidir")
+
+        return report_cache.get_or_compute(
+            "appeal_crosstab",
+            (tuple(dimensions), bucket),
+            user_section_id,
+            start_date,
+            end_date,
+            lambda: self._build_appeal_crosstab(dimensions, bucket, start_date, end_date, user_section_id),
+            lambda: self._data_version(start_date, end_date, user_section_id),
+        )
 
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin"),
+    def _build_appeal_crosstab(
+        self,
+        dimensions: list[str],
+        bucket: str | None,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+    ) -> CrossTabResponse:
+        rows = self.reports.get_appeal_crosstab(dimensions, bucket, start_date, end_date, user_section_id)
+        models = [STATS_GROUP_COLUMNS[d][1] for d in dimensions]
+        cells = []
+        total = 0
+        offset = 1 if bucket else 0
+        for row in rows:
+            keys = list(row.keys)
+            rolled = len(keys) - row.level  # bu mövqedən sonrakı açarlar cəmlənib
+            names = []
+            if bucket:
+                # SQLite mətn, MSSQL date qaytarır
+                keys[0] = date.fromisoformat(str(keys[0])[:10]) if keys[0] is not None else None
+                names.append(bucket_name(bucket, keys[0]) if keys[0] is not None else None)
+            for i, model in enumerate(models, start=offset):
+                names.append(None if i >= rolled else reference_data.label(model, keys[i]) or "Məlum deyil")
+            if row.level == len(keys):
+                total = row.count
+            cells.append(CrossTabCell(keys=keys, names=names, count=row.count, level=row.level))
+
+        # Açar üzrə sıralama; aralıq cəm həmin qrupun detallarından sonra gəlir
+        def sort_key(cell: CrossTabCell):
+            rolled = len(cell.keys) - cell.level
+            return tuple(
+                (i >= rolled, key is None, "" if key is None else key.isoformat() if isinstance(key, date) else key)
+                for i, key in enumerate(cell.keys)
+            )
+
+        cells.sort(key=sort_key)
+        return CrossTabResponse(
+            dimensions=([bucket] if bucket else []) + list(dimensions),
+            rows=cells,
+            total=total,
+            start_date=start_date,
+            end_date=end_date,
         )
 
-        col_widths = [15, 12, 15, 12, 25, 30, 10, 8, 10, 15, 25, 20, 20, 20, 15, 12, 12, 15]
-        for i, width in enumerate(col_widths, start=1):
-            ws.column_dimensions[chr(64 + i)].width = width
+    def generate_appeal_crosstab_excel(
+        self,
+        dimensions: list[str],
+        bucket: str | None,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+    ) -> SpooledTemporaryFile:
+        report = self.appeal_crosstab(dimensions, bucket, start_date, end_date, user_section_id)
+        labels = [TIME_BUCKET_LABELS[d] if d in TIME_BUCKET_LABELS else self._get_group_label(d) for d in report.dimensions]
+        output = report_render.spooled_file()
+        report_render.write_crosstab_xlsx(
+            "MÜRACİƏTLƏRİN STATİSTİK HESABATI",
+            f"Dövr: {start_date or 'Əvvəldən'} - {end_date or 'Bugünədək'}",
+            labels,
+            report.rows,
+            report.total,
+            output,
+        )
+        output.seek(0)
+        return output
 
-        ws.row_dimensions[1].height = 120
-        ws.row_dimensions[2].height = 22
-        ws.freeze_panes = "A3"
+    def iter_forma_4_rows(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+        unsectioned: bool = False,
+    ):
+        """
+        Forma 4 rows as tuples of 18 values (projection queries, names from
+        reference_data). `unsectioned` selects appeals without a section.
+        """
+        # tracing aktivdirsə oxuma və hazırlama vaxtı report.render span-ında ayrıca göstərilir
+        if settings.report_forma_4_engine == "pandas":
+            frames = tracing.phase(
+                self.reports.iter_forma_4_frames(start_date, end_date, user_section_id, unsectioned=unsectioned), "fetch",
+            )
+            return tracing.phase(forma_4.iter_frame_rows(frames), "prepare")
+        records = tracing.phase(
+            self.reports.iter_forma_4_records(start_date, end_date, user_section_id, unsectioned=unsectioned), "fetch",
+        )
+        return tracing.phase(forma_4.iter_rows(records), "prepare")
+
+    def forma_4_preview(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        user_section_id: int | None,
+        status: int | None = None,
+        dep_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> Forma4Page:
+        """One keyset page of Forma 4 rows (same row builder as the exports)."""
+        # Bir artıq sətir oxunur: növbəti səhifənin olub-olmadığını bilmək üçün
+        records = list(self.reports.iter_forma_4_records(
+            start_date, end_date, user_section_id,
+            status=status, dep_id=dep_id, after_id=after_id, limit=limit + 1,
+        ))
+        has_more = len(records) > limit
+        records = records[:limit]
+        maps = forma_4.lookup_maps()
+        items = [
+            Forma4Row(id=ap.id, values=[str(v) for v in forma_4.build_row(ap, executors, maps)])
+            for ap, executors in records
+        ]
+        return Forma4Page(
+            columns=report_render.FORMA_4_HEADERS,
+            items=items,
+            limit=limit,
+            next_after_id=items[-1].id if has_more else None,
+        )
 
-        header_font = Font(bold=True, size=10)
-        normal_font = Font(size=10)
+    def forma_4_bundle_sections(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        sections: list[int] | None = None,
+    ) -> list[int | None]:
+        """
+        Sections of a multi-section Forma 4 bundle: `sections` as given, or
+        every section (None: appeals without a section) that has appeals in
+        the range. Rows are read per section by the bundle workers.
+        """
+        if sections is not None:
+            return list(dict.fromkeys(sections))
+        return self.reports.forma_4_sections(start_date, end_date)
+
+    def generate_forma_4_excel(self, start_date: date | None, end_date: date | None, user_section_id: int | None) -> SpooledTemporaryFile:
+        return self.write_forma_4_excel(self.iter_forma_4_rows(start_date, end_date, user_section_id))
+
+    @staticmethod
+    def write_forma_4_excel(rows) -> SpooledTemporaryFile:
+        # Write-only iş kitabı + spooled fayl: yaddaş sətir sayından asılı olmur
+        output = report_render.spooled_file()
+        report_render.write_forma_4_xlsx(rows, output)
+        output.seek(0)
+        return output
 
-        max_row = ws.max_row
-        max_col = 18
+    def generate_forma_4_word(self, start_date: date | None, end_date: date | None, user_section_id: int | None) -> io.BytesIO:
+        return self.write_forma_4_word(self.iter_forma_4_rows(start_date, end_date, user_section_id))
 
-        for row in ws.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col):
-            for cell in row:
-                cell.border = thin_border
-                if cell.row == 1:
-                    cell.font = header_font
-                    cell.alignment = Alignment(
-                        textRotation=90,
-                        wrap_text=True,
-                        vertical="center",
-                        horizontal="center",
-                    )
-                elif cell.row == 2:
-                    cell.font = header_font
-                    cell.alignment = Alignment(
-                        wrap_text=True,
-                        vertical="center",
-                        horizontal="center",
-                    )
-                else:
-                    cell.font = normal_font
-                    cell.alignment = Alignment(
-                        wrap_text=True,
-                        vertical="top",
-                        horizontal="center",
-                    )
-
-        output = io.BytesIO()
-        wb.save(output)
+    @staticmethod
+    def write_forma_4_word(rows) -> SpooledTemporaryFile | io.BytesIO:
+        if settings.report_docx_engine == "python-docx":
+            return ReportService.write_forma_4_word_python_docx(list(rows))
+        output = report_render.spooled_file()
+        report_docx.write_forma_4_docx(rows, output)
         output.seek(0)
         return output
 
-    def generate_forma_4_word(self, start_date: date | None, end_date: date | None, user: User) -> io.BytesIO:
-        user_section_id = None if user.is_admin else user.section_id
-        results = self.reports.get_forma_4_data(start_date, end_date, user_section_id)
-        rows = self._prepare_forma_4_rows(results)
+    @staticmethod
+    def write_forma_4_word_python_docx(rows: list) -> io.BytesIO:
+        from docx import Document
+        from docx.enum.section import WD_ORIENT
+        from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.shared import Inches, Pt
 
         doc = Document()
 
@@ -299,14 +393,14 @@ class ReportService:
                     run.font.bold = True
                     run.font.size = Pt(8)
 
-        if not results:
+        if not rows:
             data_row = table.add_row()
             data_row.cells[0].text = "Məlumat tapılmadı"
         else:
             for r in rows:
                 row_cells = table.add_row().cells
                 for i in range(18):
-                    row_cells[i].text = str(r.get(str(i + 1), "")) or ""
+                    row_cells[i].text = str(r[i])
 
         # Sütun enləri – Excel col_widths-dən təxmini çevrilmə
         col_widths = [15, 12, 15, 12, 25, 30, 10, 8, 10, 15, 25, 20, 20, 20, 15, 12, 12, 15]
@@ -326,59 +420,14 @@ class ReportService:
         output.seek(0)
         return output
 
-    def generate_forma_4_pdf(self, start_date: date | None, end_date: date | None, user: User) -> io.BytesIO:
-        user_section_id = None if user.is_admin else user.section_id
-        results = self.reports.get_forma_4_data(start_date, end_date, user_section_id)
-        rows = self._prepare_forma_4_rows(results)
-        
-        output = io.BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=landscape(A4))
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        # Başlıq – Forma 4-ün üst hissəsi
-        title_style = styles['Title']
-        title_style.fontName = DEFAULT_FONT
-        elements.append(Paragraph("Daxil olan vətəndaş müraciətlərinin qeydiyyatı JURNALI", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Sütun başlıqları – Excel və Word-dəki kimi
-        headers = [
-            "Qeydəalınma №-si", "Qeydəalınma tarixi", "Daxil olan müraciətin №-si",
-            "Daxil olan müraciətin tarixi", "Müraciət haradan (kimdən) gəlib",
-            "Müraciətin qısa məzmunu", "Müraciətin indeksi", "Vərəq sayı",
-            "Hesabat indeksi", "Müraciətin növü", "Kim baxmışdır və dərkənar",
-            "Müraciət hansı struktur bölməyə icraya verilib", "İcraçının adı və soyadı",
-            "Müraciət hansı sənədlə icra edilib", "Müraciətin baxılması vəziyyəti",
-            "Tikildiyi iş №-si", "İşdəki vərəq №-si", "Sənədin göndərilməsi barədə qeyd",
-        ]
+    def generate_forma_4_pdf(self, start_date: date | None, end_date: date | None, user_section_id: int | None) -> SpooledTemporaryFile:
+        return self.write_forma_4_pdf(self.iter_forma_4_rows(start_date, end_date, user_section_id))
 
-        # 1-ci sətr: mətn başlıqları, 2-ci sətr: sütun nömrələri
-        data = [headers, ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15", "16", "17", "18"]]
-        if not results:
-            data.append(["Məlumat tapılmadı"] + [""] * 17)
-        else:
-            for r in rows:
-                data.append([str(r[str(i+1)]) for i in range(1, 19)])
-            
-        t = Table(data, repeatRows=2)
-        t.setStyle(TableStyle([
-            # Başlıq sətrləri
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('BACKGROUND', (0, 1), (-1, 1), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 1), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('FONTNAME', (0, 0), (-1, 1), f'{DEFAULT_FONT}-Bold'),
-            ('FONTNAME', (0, 2), (-1, -1), DEFAULT_FONT),
-            ('FONTSIZE', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, 1), 6),
-            ('BACKGROUND', (0, 2), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
-        ]))
-        
-        elements.append(t)
-        doc.build(elements)
+    @staticmethod
+    def write_forma_4_pdf(rows) -> SpooledTemporaryFile:
+        # Sabit ölçülü cədvəl hissələri: yaddaş sətir sayından asılı olmur
+        output = report_render.spooled_file()
+        report_pdf.write_forma_4_pdf(rows, output, *pdf_fonts())
         output.seek(0)
         return output
 
@@ -395,8 +444,8 @@ class ReportService:
         }
         return labels.get(group_by, "Kateqoriya")
 
-    def generate_appeal_stats_excel(self, params: ReportParams, user: User) -> io.BytesIO:
-        report = self.get_appeal_report(params, user)
+    def generate_appeal_stats_excel(self, params: ReportParams, user_section_id: int | None) -> io.BytesIO:
+        report = self.appeal_report(params, user_section_id)
         from openpyxl import Workbook
         from openpyxl.styles import Alignment, Border, Side, Font
         
@@ -442,11 +491,21 @@ class ReportService:
         output.seek(0)
         return output
 
-    def generate_appeal_stats_word(self, params: ReportParams, user: User) -> io.BytesIO:
-        report = self.get_appeal_report(params, user)
+    def generate_appeal_stats_word(self, params: ReportParams, user_section_id: int | None) -> io.BytesIO:
+        report = self.appeal_report(params, user_section_id)
         group_label = self._get_group_label(params.group_by)
         period = f"{params.start_date or 'Əvvəldən'} — {params.end_date or 'Bugünədək'}"
 
+        if settings.report_docx_engine != "python-docx":
+            output = report_render.spooled_file()
+            report_docx.write_appeal_stats_docx(group_label, period, report.items, report.total, output)
+            output.seek(0)
+            return output
+
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.shared import Pt
+
         doc = Document()
         style = doc.styles["Normal"]
         style.font.name = "Calibri"
@@ -498,8 +557,14 @@ class ReportService:
         output.seek(0)
         return output
 
-    def generate_appeal_stats_pdf(self, params: ReportParams, user: User) -> io.BytesIO:
-        report = self.get_appeal_report(params, user)
+    def generate_appeal_stats_pdf(self, params: ReportParams, user_section_id: int | None) -> io.BytesIO:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+        report = self.appeal_report(params, user_section_id)
+        font, bold_font = pdf_fonts()
         output = io.BytesIO()
         doc = SimpleDocTemplate(output, pagesize=A4)
         elements = []
@@ -524,15 +589,61 @@ class ReportService:
             ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), f'{DEFAULT_FONT}-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), DEFAULT_FONT),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTNAME', (0, 1), (-1, -1), font),
             ('FONTSIZE', (0, 0), (-1, -1), 10),
             ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
             ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), f'{DEFAULT_FONT}-Bold'),
+            ('FONTNAME', (0, -1), (-1, -1), bold_font),
         ]))
         
         elements.append(t)
         doc.build(elements)
         output.seek(0)
         return output
+
+    def render(self, kind: str, fmt: str, params: ReportParams, user_section_id: int | None):
+        """Rendered export file (positioned at 0) for a report kind and format."""
+        with tracing.phased_span("report.render", **{"report.kind": kind, "report.format": fmt}):
+            if kind == "forma_4":
+                generate = {
+                    "excel": self.generate_forma_4_excel,
+                    "word": self.generate_forma_4_word,
+                    "pdf": self.generate_forma_4_pdf,
+                }[fmt]
+                return generate(params.start_date, params.end_date, user_section_id)
+            generate = {
+                "excel": self.generate_appeal_stats_excel,
+                "word": self.generate_appeal_stats_word,
+                "pdf": self.generate_appeal_stats_pdf,
+            }[fmt]
+            return generate(params, user_section_id)
+
+    def render_cached(self, kind: str, fmt: str, params: ReportParams, user_section_id: int | None):
+        """
+        Rendered file from the on-disk render_cache, rendering and storing it
+        on a miss. Returns a render_cache.CachedFile, or the rendered file
+        object itself when caching is disabled or the file is too large.
+        """
+        if not settings.report_render_cache_enabled:
+            return self.render(kind, fmt, params, user_section_id)
+        # Forma 4 group_by-dan asılı deyil: eyni açar
+        cache_params = (params.start_date, params.end_date)
+        if kind == "appeal_stats":
+            cache_params += (params.group_by,)
+        # Versiya render-dən əvvəl oxunur: render zamanı gələn yazılış köhnə faylı yeni açarla saxlatmır
+        version = self._data_version(params.start_date, params.end_date, user_section_id)
+        if version is None:
+            return self.render(kind, fmt, params, user_section_id)
+        key = render_cache.make_key(kind, fmt, cache_params, user_section_id, version)
+        extension = EXPORT_FORMATS[fmt][0]
+        cached = render_cache.get(key, extension, user_section_id)
+        if cached is not None:
+            return cached
+        output = self.render(kind, fmt, params, user_section_id)
+        with tracing.span("report.save", **{"report.kind": kind, "report.format": fmt}):
+            stored = render_cache.put(key, extension, output, user_section_id, params.start_date, params.end_date)
+        if stored is None:
+            return output
+        output.close()
+        return stored
@@ -0,0 +1,224 @@
+"""
+Multi-section Forma 4 export bundle (GET /reports/forma-4/bundle).
+
+Every (section, format) part is rendered in a process pool and added to a ZIP
+archive that is streamed to the client as soon as each part is ready, so the
+first bytes go out while other parts are still rendering. The API process
+only sends the section id and date range: each pool worker reads its own
+section's rows (keyset pages, ReportService.iter_forma_4_rows) and streams
+them into the file, so no rows are built in or pickled from the API process.
+
+Every API worker has its own pool, so the number of parts rendering at once
+is also capped across all of them: a part first takes one of
+report_bundle_max_workers slot lock files in report_bundle_lock_dir (shared
+by the API workers) and waits while all slots are taken.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Iterator
+
+from app.core.config import settings
+
+_executor: ProcessPoolExecutor | None = None
+_lock = Lock()
+
+# xlsx / docx artıq sıxılmış zip-dir, yenidən sıxmaq yalnız CPU sərf edir
+_COMPRESSION = {"excel": zipfile.ZIP_STORED, "word": zipfile.ZIP_STORED, "pdf": zipfile.ZIP_DEFLATED}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_max_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def shutdown() -> None:
+    _reset_executor()
+
+
+def _max_workers() -> int:
+    return settings.report_bundle_max_workers or os.cpu_count() or 1
+
+
+def _try_lock(f) -> bool:
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def _render_slot() -> Iterator[None]:
+    """Hold one of the report_bundle_max_workers slots shared by all API workers (waits for a free one)."""
+    directory = os.path.abspath(settings.report_bundle_lock_dir)
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        for slot in range(_max_workers()):
+            f = open(os.path.join(directory, f"slot_{slot}.lock"), "a+b")
+            if _try_lock(f):
+                try:
+                    yield
+                finally:
+                    _unlock(f)
+                    f.close()
+                return
+            f.close()
+        time.sleep(0.2)
+
+
+def render_part(
+    fmt: str,
+    section_id: int | None,
+    start_date: date | None,
+    end_date: date | None,
+    directory: str,
+) -> str:
+    """Read and render one section/format into a file in `directory`. Runs in a pool worker process."""
+    from app.db.session import SessionLocal
+    from app.repositories.report import ReportRepository
+    from app.services.report import EXPORT_FORMATS, ReportService
+
+    writer = {
+        "excel": ReportService.write_forma_4_excel,
+        "word": ReportService.write_forma_4_word,
+        "pdf": ReportService.write_forma_4_pdf,
+    }[fmt]
+    with _render_slot():
+        db = SessionLocal()
+        try:
+            service = ReportService(ReportRepository(db))
+            rows = service.iter_forma_4_rows(start_date, end_date, section_id, unsectioned=section_id is None)
+            output = writer(rows)
+        finally:
+            db.close()
+    fd, path = tempfile.mkstemp(suffix=f".{EXPORT_FORMATS[fmt][0]}", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(output, f)
+    finally:
+        output.close()
+    return path
+
+
+def part_name(section_id: int | None, label: str | None) -> str:
+    """Folder name of a section inside the archive."""
+    if section_id is None:
+        return "Bölməsiz"
+    label = re.sub(r'[\\/:*?"<>|\r\n]+', " ", label or "").strip()
+    return f"{section_id} - {label}" if label else str(section_id)
+
+
+class _ZipSink:
+    """Write-only file object for ZipFile; the written bytes are taken out in pieces."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _submit(*args):
+    try:
+        return _get_executor().submit(render_part, *args)
+    except BrokenProcessPool:
+        # Worker proses çökübsə pool yenidən yaradılır
+        _reset_executor()
+        return _get_executor().submit(render_part, *args)
+
+
+def iter_bundle(
+    parts: dict[str, int | None],
+    formats: list[str],
+    start_date: date | None,
+    end_date: date | None,
+) -> Iterator[bytes]:
+    """
+    ZIP bytes for `parts` (folder name -> user_section_id, None for appeals
+    without a section) in every format of `formats`. A part that fails is
+    listed in XETALAR.txt instead of aborting the whole archive.
+    """
+    from app.services.report import EXPORT_FORMATS
+
+    sink = _ZipSink()
+    with tempfile.TemporaryDirectory(prefix="forma4_bundle_") as directory:
+        futures = {
+            _submit(fmt, section_id, start_date, end_date, directory): (name, fmt)
+            for name, section_id in parts.items()
+            for fmt in formats
+        }
+        errors = []
+        try:
+            with zipfile.ZipFile(sink, "w") as archive:
+                for future in as_completed(futures):
+                    name, fmt = futures[future]
+                    try:
+                        path = future.result()
+                    except Exception as e:
+                        errors.append(f"{name}/forma_4.{EXPORT_FORMATS[fmt][0]}: {e.__class__.__name__}: {e}")
+                        continue
+                    archive.write(path, f"{name}/forma_4.{EXPORT_FORMATS[fmt][0]}", compress_type=_COMPRESSION[fmt])
+                    os.remove(path)
+                    yield sink.take()
+                if errors:
+                    archive.writestr("XETALAR.txt", "\n".join(errors))
+            yield sink.take()
+        finally:
+            # Müştəri bağlantını kəsibsə növbədəki hissələr ləğv olunur
+            for future in futures:
+                future.cancel()
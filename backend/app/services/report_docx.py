@@ -0,0 +1,240 @@
+"""
+Template-based DOCX writer for Forma 4 and appeal statistics.
+
+python-docx builds every table cell as an lxml element tree and the old
+exporters then walked each paragraph/run to set fonts, which dominates the
+export time past a few thousand rows. Here python-docx is used only once
+per process to build a template: page setup, title, header rows and the
+paragraph styles data cells use, plus a marker row where the data goes.
+Rendering copies the template package and writes word/document.xml as
+prefix + one <w:tr> string per row + suffix, streamed into the zip entry.
+Cell formatting comes from shared styles (w:pStyle / w:rStyle), not from
+per-run properties.
+
+See benchmarks/report_docx.py for the comparison with the python-docx path.
+"""
+from __future__ import annotations
+
+import re
+import zipfile
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO, Iterable, NamedTuple, Sequence
+from xml.sax.saxutils import escape
+
+from app.services.report_render import FORMA_4_COL_WIDTHS, FORMA_4_HEADERS, FORMA_4_TITLE
+
+ROWS_MARKER = "__ROWS__"
+DOCUMENT_PART = "word/document.xml"
+
+# Sətirlər bu ölçüdə toplanıb zip-ə yazılır
+WRITE_BATCH_ROWS = 500
+
+# XML 1.0-da icazə verilməyən idarəetmə simvolları (\t, \n, \r xaric)
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class DocxTemplate(NamedTuple):
+    parts: dict[str, bytes]
+    document_prefix: bytes
+    document_suffix: bytes
+    cell_style: str
+    bold_style: str
+
+
+def _build_template(doc, table, cell_style: str, bold_style: str) -> DocxTemplate:
+    """Add the marker row to `table`, save `doc` and split document.xml around it."""
+    marker_row = table.add_row()
+    marker_row.cells[0].text = ROWS_MARKER
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        parts = {name: package.read(name) for name in package.namelist()}
+
+    document = parts.pop(DOCUMENT_PART).decode("utf-8")
+    marker = document.index(ROWS_MARKER)
+    row_start = document.rindex("<w:tr", 0, marker)
+    # "<w:tr" həm də "<w:trPr" ola bilər: sətir açılışını axtarırıq
+    while document[row_start + 5] not in "> ":
+        row_start = document.rindex("<w:tr", 0, row_start)
+    row_end = document.index("</w:tr>", marker) + len("</w:tr>")
+    return DocxTemplate(
+        parts=parts,
+        document_prefix=document[:row_start].encode("utf-8"),
+        document_suffix=document[row_end:].encode("utf-8"),
+        cell_style=cell_style,
+        bold_style=bold_style,
+    )
+
+
+def _cell_styles(doc, prefix: str) -> tuple[str, str]:
+    """Shared centered paragraph style and bold character style; returns their style ids."""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    cell = doc.styles.add_style(f"{prefix} Cell", WD_STYLE_TYPE.PARAGRAPH)
+    cell.base_style = doc.styles["Normal"]
+    cell.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    bold = doc.styles.add_style(f"{prefix} Bold", WD_STYLE_TYPE.CHARACTER)
+    bold.font.bold = True
+    return cell.style_id, bold.style_id
+
+
+@lru_cache(maxsize=None)
+def forma_4_template() -> DocxTemplate:
+    """Same page setup, title and header rows as the python-docx Forma 4 exporter."""
+    from docx import Document
+    from docx.enum.section import WD_ORIENT
+    from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Inches, Pt
+
+    doc = Document()
+    section = doc.sections[0]
+    section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_width, section.page_height = section.page_height, section.page_width
+    section.left_margin = Inches(0.5)
+    section.right_margin = Inches(0.5)
+    section.top_margin = Inches(0.6)
+    section.bottom_margin = Inches(0.5)
+
+    style = doc.styles["Normal"]
+    style.font.name = "Calibri"
+    style.font.size = Pt(9)
+    cell_style, bold_style = _cell_styles(doc, "Forma 4")
+
+    title = doc.add_paragraph(FORMA_4_TITLE)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title.runs[0].font.bold = True
+    title.runs[0].font.size = Pt(12)
+
+    table = doc.add_table(rows=2, cols=len(FORMA_4_HEADERS))
+    table.style = "Table Grid"
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    for row, values in zip(table.rows, (FORMA_4_HEADERS, range(1, len(FORMA_4_HEADERS) + 1))):
+        for cell, value in zip(row.cells, values):
+            cell.text = str(value)
+            cell.vertical_alignment = WD_ALIGN_VERTICAL.TOP
+            for p in cell.paragraphs:
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                for run in p.runs:
+                    run.font.bold = True
+                    run.font.size = Pt(8)
+    for i, width in enumerate(FORMA_4_COL_WIDTHS):
+        table.columns[i].width = Inches(width * 0.12)
+        for cell in table.columns[i].cells:
+            cell.width = Inches(width * 0.12)
+    return _build_template(doc, table, cell_style, bold_style)
+
+
+@lru_cache(maxsize=64)
+def appeal_stats_template(group_label: str, period: str) -> DocxTemplate:
+    """Same layout as the python-docx statistics exporter (title, period, 3-column table)."""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    doc = Document()
+    style = doc.styles["Normal"]
+    style.font.name = "Calibri"
+    style.font.size = Pt(11)
+    cell_style, bold_style = _cell_styles(doc, "Statistika")
+
+    title = doc.add_paragraph("MÜRACİƏTLƏRİN STATİSTİK HESABATI")
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title.runs[0].font.bold = True
+    title.runs[0].font.size = Pt(14)
+    doc.add_paragraph(f"Qruplaşdırma: {group_label} üzrə")
+    doc.add_paragraph(f"Hesabat dövrü: {period}")
+    doc.add_paragraph()
+
+    table = doc.add_table(rows=1, cols=3)
+    table.style = "Table Grid"
+    for cell, text in zip(table.rows[0].cells, (group_label, "Sayı", "Nisbət (%)")):
+        cell.text = text
+        for p in cell.paragraphs:
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            for run in p.runs:
+                run.font.bold = True
+    return _build_template(doc, table, cell_style, bold_style)
+
+
+def _text_xml(value) -> str:
+    """Run content for a cell value; newlines become <w:br/> like python-docx's text setter."""
+    text = _INVALID_XML_CHARS.sub("", str(value))
+    lines = escape(text).split("\n")
+    return "<w:br/>".join(f'<w:t xml:space="preserve">{line}</w:t>' if line else "" for line in lines)
+
+
+class _RowWriter:
+    """Pre-rendered cell prefixes so a row is a single str.join."""
+
+    def __init__(self, template: DocxTemplate, widths_dxa: Sequence[int]):
+        self._open = [
+            f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr>'
+            f'<w:p><w:pPr><w:pStyle w:val="{template.cell_style}"/></w:pPr>'
+            for width in widths_dxa
+        ]
+        self._bold = f'<w:rPr><w:rStyle w:val="{template.bold_style}"/></w:rPr>'
+
+    def row(self, values: Sequence, bold: bool = False) -> str:
+        parts = ["<w:tr>"]
+        for cell_open, value in zip(self._open, values):
+            parts.append(cell_open)
+            if value is not None and value != "":
+                parts.append(f"<w:r>{self._bold}{_text_xml(value)}</w:r>" if bold else f"<w:r>{_text_xml(value)}</w:r>")
+            parts.append("</w:p></w:tc>")
+        parts.append("</w:tr>")
+        return "".join(parts)
+
+
+def write_docx(template: DocxTemplate, row_xml: Iterable[str], target: BinaryIO) -> None:
+    """Write the template package to `target`, with `row_xml` streamed into the table."""
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as package:
+        # [Content_Types].xml birinci olmalıdır; qalan hissələr şablondakı sıra ilə
+        for name, data in template.parts.items():
+            package.writestr(name, data)
+        with package.open(DOCUMENT_PART, "w") as document:
+            document.write(template.document_prefix)
+            batch = []
+            for xml in row_xml:
+                batch.append(xml)
+                if len(batch) >= WRITE_BATCH_ROWS:
+                    document.write("".join(batch).encode("utf-8"))
+                    batch.clear()
+            if batch:
+                document.write("".join(batch).encode("utf-8"))
+            document.write(template.document_suffix)
+
+
+def write_forma_4_docx(rows: Iterable[Sequence], target: BinaryIO) -> None:
+    """Forma 4 document: `rows` yields 18 values per appeal."""
+    template = forma_4_template()
+    # 1 Excel vahidi ≈ 0.12 inch = 172.8 dxa
+    writer = _RowWriter(template, [round(w * 0.12 * 1440) for w in FORMA_4_COL_WIDTHS])
+
+    def row_xml():
+        empty = True
+        for row in rows:
+            empty = False
+            yield writer.row(row)
+        if empty:
+            yield writer.row(["Məlumat tapılmadı"] + [""] * (len(FORMA_4_HEADERS) - 1))
+
+    write_docx(template, row_xml(), target)
+
+
+def write_appeal_stats_docx(group_label: str, period: str, items: Iterable, total: int, target: BinaryIO) -> None:
+    """Statistics document: `items` have .name and .count (ReportItem)."""
+    template = appeal_stats_template(group_label, period)
+    # python-docx add_table(): 6 inch-lik mətn sahəsi 3 bərabər sütuna bölünür
+    writer = _RowWriter(template, [2880] * 3)
+
+    def row_xml():
+        for item in items:
+            percentage = (item.count / total * 100) if total > 0 else 0
+            yield writer.row((item.name, item.count, f"{percentage:.1f}%"))
+        yield writer.row(("CƏMİ", total, "100.0%"), bold=True)
+
+    write_docx(template, row_xml(), target)
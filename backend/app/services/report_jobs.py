@@ -0,0 +1,258 @@
+"""
+Background report export jobs (POST /reports/jobs).
+
+Rendering (openpyxl / python-docx / reportlab) is CPU-bound, so jobs run in a
+bounded ProcessPoolExecutor instead of the API worker's threadpool. Job state
+is a small JSON file (<id>.json) next to the result file in
+settings.report_jobs_dir, so status and download work from any API worker
+process. Finished jobs expire after report_jobs_ttl_seconds; sweep() removes
+expired state and files and runs on every submit/list.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+from threading import Lock
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_executor: ProcessPoolExecutor | None = None
+_lock = Lock()
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def jobs_dir() -> str:
+    path = os.path.abspath(settings.report_jobs_dir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _state_path(job_id: str) -> str:
+    return os.path.join(jobs_dir(), f"{job_id}.json")
+
+
+def result_path(state: dict) -> str:
+    from app.services.report import EXPORT_FORMATS
+
+    extension = EXPORT_FORMATS[state["format"]][0]
+    return os.path.join(jobs_dir(), f"{state['id']}.{extension}")
+
+
+def _write_state(state: dict) -> None:
+    path = _state_path(state["id"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load(job_id: str) -> dict | None:
+    if not _JOB_ID.match(job_id or ""):
+        return None
+    try:
+        with open(_state_path(job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def list_states() -> list[dict]:
+    states = []
+    for name in os.listdir(jobs_dir()):
+        if name.endswith(".json"):
+            state = load(name[:-5])
+            if state is not None:
+                states.append(state)
+    return states
+
+
+def get_stats() -> dict:
+    """Job counts by status (all workers share the state files) and the age of the oldest queued job."""
+    now = _now()
+    counts = {status: 0 for status in (STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)}
+    oldest_queued = None
+    for state in list_states():
+        counts[state["status"]] = counts.get(state["status"], 0) + 1
+        if state["status"] == STATUS_QUEUED:
+            created_at = datetime.fromisoformat(state["created_at"])
+            oldest_queued = created_at if oldest_queued is None else min(oldest_queued, created_at)
+    return {
+        "jobs": counts,
+        "oldest_queued_seconds": (now - oldest_queued).total_seconds() if oldest_queued else 0.0,
+    }
+
+
+def _is_expired(state: dict, now: datetime) -> bool:
+    expires_at = state.get("expires_at")
+    if expires_at is None:
+        # İlişib qalmış (worker ölüb) növbədəki işlər də TTL-dən sonra silinir
+        expires_at = (
+            datetime.fromisoformat(state["created_at"]) + timedelta(seconds=settings.report_jobs_ttl_seconds)
+        ).isoformat()
+    return datetime.fromisoformat(expires_at) <= now
+
+
+def _remove(state: dict) -> None:
+    for path in (result_path(state), _state_path(state["id"])):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep() -> int:
+    """Delete expired jobs (state + result file). Returns the number removed."""
+    now = _now()
+    expired = [state for state in list_states() if _is_expired(state, now)]
+    for state in expired:
+        _remove(state)
+    return len(expired)
+
+
+def _init_worker() -> None:
+    """Pool worker setup: no in-process report_cache."""
+    # İşin nəticəsi fayla yazılır; prosesdaxili keş burada yalnız yaddaş tutar
+    settings.report_cache_enabled = False
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: uşaq proses valideynin DB bağlantı pool-unu miras almasın
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.report_jobs_max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def submit(kind: str, fmt: str, params: dict, user_id: int, user_section_id: int | None) -> dict:
+    """Persist a queued job and hand it to the process pool."""
+    sweep()
+    active = sum(1 for state in list_states() if state["status"] in ACTIVE_STATUSES)
+    if active >= settings.report_jobs_max_pending:
+        raise HTTPException(
+            status_code=429,
+            detail="Hazırda çox sayda hesabat hazırlanır. Bir az sonra yenidən cəhd edin.",
+        )
+
+    state = {
+        "id": uuid.uuid4().hex,
+        "report": kind,
+        "format": fmt,
+        "params": params,
+        "user_id": user_id,
+        "user_section_id": user_section_id,
+        "status": STATUS_QUEUED,
+        "created_at": _now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "expires_at": None,
+        "size": None,
+        "error": None,
+    }
+    _write_state(state)
+
+    try:
+        future = _get_executor().submit(run_job, state["id"])
+    except BrokenProcessPool:
+        # Worker proses çökübsə pool yenidən yaradılır
+        _reset_executor()
+        future = _get_executor().submit(run_job, state["id"])
+    future.add_done_callback(partial(_on_done, state["id"]))
+    return state
+
+
+def _on_done(job_id: str, future: Future) -> None:
+    """Record failures the worker could not record itself (e.g. the process died)."""
+    if future.cancelled():
+        error = "Cancelled"
+    else:
+        exc = future.exception()
+        if exc is None:
+            return
+        error = f"{exc.__class__.__name__}: {exc}"
+    state = load(job_id)
+    if state is not None and state["status"] in ACTIVE_STATUSES:
+        _finish(state, STATUS_FAILED, error=error)
+
+
+def _finish(state: dict, status: str, size: int | None = None, error: str | None = None) -> None:
+    now = _now()
+    state.update(
+        status=status,
+        finished_at=now.isoformat(),
+        expires_at=(now + timedelta(seconds=settings.report_jobs_ttl_seconds)).isoformat(),
+        size=size,
+        error=error,
+    )
+    _write_state(state)
+
+
+def run_job(job_id: str) -> None:
+    """Render one job. Runs in a pool worker process."""
+    from app.db.session import SessionLocal
+    from app.repositories.report import ReportRepository
+    from app.schemas.report import ReportParams
+    from app.services.report import ReportService
+
+    state = load(job_id)
+    if state is None:
+        return
+    state.update(status=STATUS_RUNNING, started_at=_now().isoformat())
+    _write_state(state)
+
+    db = SessionLocal()
+    try:
+        service = ReportService(ReportRepository(db))
+        params = ReportParams(**state["params"])
+        output = service.render(state["report"], state["format"], params, state["user_section_id"])
+        path = result_path(state)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(output, f)
+        finally:
+            output.close()
+        os.replace(tmp_path, path)
+        _finish(state, STATUS_DONE, size=os.path.getsize(path))
+    except Exception as e:
+        _finish(state, STATUS_FAILED, error=f"{e.__class__.__name__}: {e}")
+    finally:
+        db.close()
+
+
+def shutdown() -> None:
+    """Stop the pool on application shutdown; queued jobs are marked failed."""
+    _reset_executor()
@@ -0,0 +1,223 @@
+"""
+Chunked PDF writer for Forma 4.
+
+A single reportlab Table over the whole dataset is laid out at once (row
+heights, column widths, split points), which is superlinear and keeps every
+cell in memory. Here the data is emitted as tables of CHUNK_ROWS rows with
+fixed column widths, created lazily while the document is built
+(_table_stream), so only the chunk being laid out is held as flowables. The
+title and the two header rows are drawn by the page templates on every page
+instead of being table rows (repeatRows), so consecutive chunks line up as
+one table. A row taller than a page (long content) is cut into continuation
+rows of at most a page's worth of lines instead of failing the layout.
+
+Data cells stay plain strings (reportlab's fast path, no Paragraph per
+cell); lines wider than their column are word-wrapped with simpleSplit.
+Paragraph and table styles are built once per font and cached.
+"""
+from __future__ import annotations
+
+from functools import lru_cache, partial
+from typing import BinaryIO, Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+from app.services.report_render import FORMA_4_COL_WIDTHS, FORMA_4_HEADERS, FORMA_4_TITLE
+
+CHUNK_ROWS = 200
+FONT_SIZE = 6
+MARGIN = 36  # 0.5 inch
+CELL_PADDING = 3  # TableStyle LEFTPADDING / RIGHTPADDING
+
+
+@lru_cache(maxsize=None)
+def _styles(font: str, bold_font: str):
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    header = ParagraphStyle(
+        "forma4_header", fontName=bold_font, fontSize=FONT_SIZE, leading=FONT_SIZE + 1,
+        alignment=TA_CENTER, textColor="whitesmoke",
+    )
+    title = ParagraphStyle("forma4_title", parent=getSampleStyleSheet()["Title"], fontName=font)
+    return header, title
+
+
+@lru_cache(maxsize=None)
+def _table_styles(font: str, bold_font: str):
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    common = [
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("FONTSIZE", (0, 0), (-1, -1), FONT_SIZE),
+        ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+        ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ]
+    header = TableStyle(common + [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("BACKGROUND", (0, 1), (-1, 1), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 1), colors.whitesmoke),
+        ("FONTNAME", (0, 0), (-1, -1), bold_font),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ])
+    data = TableStyle(common + [("FONTNAME", (0, 0), (-1, -1), font)])
+    return header, data
+
+
+def _table_stream(tables: Iterator):
+    """
+    Flowable that feeds the tables of `tables` to doc.build() one at a time,
+    so only one chunk (plus its split remainder) is materialized at a time.
+
+    It uses the documented platypus protocol: wrap() reports more than the
+    available height, so the frame calls split(), which returns the part of
+    the next table that fits followed by the stream itself. Once `tables` is
+    exhausted the stream has zero size and is done.
+    """
+    from reportlab.platypus import Flowable, FrameBreak
+
+    class TableStream(Flowable):
+        # Dolu frame-də də split() çağırılsın: əks halda axın təxirə salınır və növbəti dəfə LayoutError olur
+        _ZEROSIZE = True
+
+        def __init__(self):
+            super().__init__()
+            self._pending = next(tables, None)
+
+        def wrap(self, availWidth, availHeight):
+            if self._pending is None:
+                return 0, 0
+            return availWidth, availHeight + 1
+
+        def split(self, availWidth, availHeight):
+            if self._pending is None:
+                return []
+            table = self._pending
+            _, height = table.wrap(availWidth, availHeight)
+            if height <= availHeight:
+                self._pending = next(tables, None)
+                return [table, self]
+            parts = table.split(availWidth, availHeight)
+            if not parts:
+                # Səhifənin qalan hissəsinə heç bir sətir sığmır
+                return [FrameBreak(), self]
+            self._pending = parts[1] if len(parts) > 1 else next(tables, None)
+            return [parts[0], self]
+
+        def draw(self):
+            pass
+
+    return TableStream()
+
+
+def _column_widths(available: float) -> list[float]:
+    total = sum(FORMA_4_COL_WIDTHS)
+    return [width * available / total for width in FORMA_4_COL_WIDTHS]
+
+
+def write_forma_4_pdf(rows: Iterable[Sequence], target: BinaryIO, font: str, bold_font: str) -> None:
+    """Forma 4 as landscape A4 PDF; `rows` yields 18 values per appeal."""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Table
+
+    page_width, page_height = landscape(A4)
+    available = page_width - 2 * MARGIN
+    widths = _column_widths(available)
+    header_style, title_style = _styles(font, bold_font)
+    header_table_style, data_table_style = _table_styles(font, bold_font)
+
+    title = Paragraph(escape(FORMA_4_TITLE), title_style)
+    _, title_height = title.wrap(available, page_height)
+    title_height += 12
+    header = Table(
+        [
+            [Paragraph(escape(text), header_style) for text in FORMA_4_HEADERS],
+            [str(i) for i in range(1, len(FORMA_4_HEADERS) + 1)],
+        ],
+        colWidths=widths,
+        style=header_table_style,
+    )
+    _, header_height = header.wrap(available, page_height)
+
+    def draw_header(canvas, doc, with_title: bool):
+        top = page_height - MARGIN
+        canvas.saveState()
+        if with_title:
+            title.drawOn(canvas, MARGIN, top - title.height)
+            top -= title_height
+        header.drawOn(canvas, MARGIN, top - header_height)
+        canvas.restoreState()
+
+    def frame(reserved: float) -> Frame:
+        return Frame(
+            MARGIN, MARGIN, available, page_height - 2 * MARGIN - reserved,
+            leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
+        )
+
+    text_widths = [width - 2 * CELL_PADDING for width in widths]
+
+    def cell(value, width: float):
+        text = str(value)
+        if not text:
+            return text
+        # Sütuna sığmayan sətirlər sözlər üzrə bölünür; hüceyrə sadə string olaraq qalır
+        lines = text.split("\n")
+        if any(stringWidth(line, font, FONT_SIZE) > width for line in lines):
+            return "\n".join(wrapped for line in lines for wrapped in simpleSplit(line, font, FONT_SIZE, width) or [""])
+        return text
+
+    # Bir sətrin ən çox neçə mətn sətri ən kiçik (ilk səhifə) frame-ə sığır
+    one_line = Table([["x"]], style=data_table_style).wrap(available, page_height)[1]
+    leading = Table([["x\nx"]], style=data_table_style).wrap(available, page_height)[1] - one_line
+    max_lines = max(1, int((page_height - 2 * MARGIN - title_height - header_height - one_line) // leading) + 1)
+
+    def table_rows(row):
+        cells = [cell(value, width) for value, width in zip(row, text_widths)]
+        if max(text.count("\n") for text in cells) < max_lines:
+            yield cells
+            return
+        # Səhifədən hündür sətir davam sətirlərinə bölünür: cədvəl sətri səhifələr arasında bölünmür
+        lines = [text.split("\n") for text in cells]
+        for start in range(0, max(len(cell_lines) for cell_lines in lines), max_lines):
+            yield ["\n".join(cell_lines[start:start + max_lines]) for cell_lines in lines]
+
+    def chunks():
+        batch = []
+        for row in rows:
+            batch.extend(table_rows(row))
+            if len(batch) >= CHUNK_ROWS:
+                yield Table(batch, colWidths=widths, style=data_table_style)
+                batch = []
+        if batch:
+            yield Table(batch, colWidths=widths, style=data_table_style)
+
+    def tables():
+        empty = True
+        for table in chunks():
+            empty = False
+            yield table
+        if empty:
+            yield Table(
+                [["Məlumat tapılmadı"] + [""] * (len(FORMA_4_HEADERS) - 1)],
+                colWidths=widths,
+                style=data_table_style,
+            )
+
+    doc = BaseDocTemplate(
+        target,
+        pagesize=(page_width, page_height),
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+        title=FORMA_4_TITLE,
+    )
+    doc.addPageTemplates([
+        PageTemplate(
+            "first", [frame(title_height + header_height)],
+            onPage=partial(draw_header, with_title=True), autoNextPageTemplate="later",
+        ),
+        PageTemplate("later", [frame(header_height)], onPage=partial(draw_header, with_title=False)),
+    ])
+    doc.build([_table_stream(tables())])
@@ -0,0 +1,179 @@
+"""
+File renderers for reports (Forma 4, statistics).
+
+Renderers are plain module-level functions: rows in, bytes written to a
+binary file object out. They do not touch the DB session, so they can run
+after the request data is fetched or outside the request entirely.
+"""
+from __future__ import annotations
+
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Iterable, Iterator, Sequence
+
+FORMA_4_TITLE = "Daxil olan vətəndaş müraciətlərinin qeydiyyatı JURNALI"
+
+FORMA_4_HEADERS = [
+    "Qeydəalınma №-si", "Qeydəalınma tarixi", "Daxil olan müraciətin №-si", "Daxil olan müraciətin tarixi",
+    "Müraciət haradan (kimdən) gəlib", "Müraciətin qısa məzmunu", "Müraciətin indeksi", "Vərəq sayı",
+    "Hesabat indeksi", "Müraciətin növü", "Kim baxmışdır və dərkənar",
+    "Müraciət hansı struktur bölməyə icraya verilib", "İcraçının adı və soyadı",
+    "Müraciət hansı sənədlə icra edilib", "Müraciətin baxılması vəziyyəti",
+    "Tikildiyi iş №-si", "İşdəki vərəq №-si", "Sənədin göndərilməsi barədə qeyd",
+]
+
+# Excel sütun enləri (Word-də təxminən 0.12 inch / vahid)
+FORMA_4_COL_WIDTHS = [15, 12, 15, 12, 25, 30, 10, 8, 10, 15, 25, 20, 20, 20, 15, 12, 12, 15]
+
+# Hazır fayl bu ölçüyə qədər yaddaşda, daha böyük olduqda diskdə saxlanılır
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def spooled_file() -> SpooledTemporaryFile:
+    return SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b")
+
+
+def iter_file(fileobj: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read `fileobj` in chunks for StreamingResponse and close it at the end."""
+    try:
+        while chunk := fileobj.read(chunk_size):
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _forma_4_xlsx_styles():
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_font = Font(bold=True, size=10)
+    return [
+        NamedStyle(
+            name="forma4_header",
+            font=header_font,
+            border=border,
+            alignment=Alignment(textRotation=90, wrap_text=True, vertical="center", horizontal="center"),
+        ),
+        NamedStyle(
+            name="forma4_number",
+            font=header_font,
+            border=border,
+            alignment=Alignment(wrap_text=True, vertical="center", horizontal="center"),
+        ),
+        NamedStyle(
+            name="forma4_cell",
+            font=Font(size=10),
+            border=border,
+            alignment=Alignment(wrap_text=True, vertical="top", horizontal="center"),
+        ),
+    ]
+
+
+def write_forma_4_xlsx(rows: Iterable[Sequence], target: BinaryIO) -> None:
+    """
+    Write the Forma 4 workbook in openpyxl write-only mode: each row is
+    serialized as soon as it is appended, so memory does not grow with the
+    row count. `rows` yields 18 values per appeal.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Forma 4")
+    for style in _forma_4_xlsx_styles():
+        wb.add_named_style(style)
+
+    for i, width in enumerate(FORMA_4_COL_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    ws.row_dimensions[1].height = 120
+    ws.row_dimensions[2].height = 22
+    ws.freeze_panes = "A3"
+
+    def styled(values, style: str) -> list:
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        return cells
+
+    # Header rows
+    ws.append(styled(FORMA_4_HEADERS, "forma4_header"))
+    ws.append(styled(range(1, 19), "forma4_number"))
+
+    # Data rows start from row 3
+    empty = True
+    for row in rows:
+        empty = False
+        ws.append(styled(row, "forma4_cell"))
+    if empty:
+        ws.append(styled([""] * 18, "forma4_cell"))
+
+    wb.save(target)
+
+
+def write_crosstab_xlsx(
+    title: str,
+    period: str,
+    dimension_labels: Sequence[str],
+    cells: Iterable,
+    total: int,
+    target: BinaryIO,
+) -> None:
+    """
+    Cross-tab statistics as a pivot sheet: the last dimension becomes the
+    columns, the preceding ones are row headers, with row and column totals.
+    `cells` have .keys, .names, .count and .level (CrossTabCell); only detail
+    rows (level 0) are laid out, totals are summed from them.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Hesabat")
+    bold = Font(bold=True)
+
+    def bold_row(values) -> list:
+        row = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = bold
+            row.append(cell)
+        return row
+
+    ws.append(bold_row([title]))
+    ws.append([period])
+    ws.append([])
+
+    details = [cell for cell in cells if cell.level == 0]
+    if len(dimension_labels) == 1:
+        ws.append(bold_row([dimension_labels[0], "Sayı"]))
+        for cell in details:
+            ws.append([cell.names[0], cell.count])
+        ws.append(bold_row(["CƏMİ", total]))
+        wb.save(target)
+        return
+
+    # Sütunlar: son ölçünün dəyərləri, ilk rast gəlinmə ardıcıllığı ilə (detallar sıralanıb)
+    columns: dict = {}
+    pivot: dict[tuple, dict] = {}
+    row_names: dict[tuple, list] = {}
+    for cell in details:
+        row_key, column_key = tuple(cell.keys[:-1]), cell.keys[-1]
+        columns.setdefault(column_key, cell.names[-1])
+        pivot.setdefault(row_key, {})[column_key] = cell.count
+        row_names.setdefault(row_key, cell.names[:-1])
+    column_keys = sorted(columns, key=lambda key: (key is None, key if key is not None else 0))
+
+    ws.append(bold_row(list(dimension_labels[:-1]) + [columns[key] for key in column_keys] + ["CƏMİ"]))
+    column_totals = dict.fromkeys(column_keys, 0)
+    for row_key, counts in pivot.items():
+        for key, count in counts.items():
+            column_totals[key] += count
+        ws.append(row_names[row_key] + [counts.get(key, 0) for key in column_keys] + [sum(counts.values())])
+    padding = [""] * (len(dimension_labels) - 2)
+    ws.append(bold_row(["CƏMİ"] + padding + [column_totals[key] for key in column_keys] + [total]))
+    wb.save(target)
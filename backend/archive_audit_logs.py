@@ -0,0 +1,50 @@
+"""
+Move old AuditLogs rows into the compressed monthly archive
+(settings.audit_archive_dir, see app/services/audit_archive.py).
+
+    python archive_audit_logs.py                         # AUDIT_ARCHIVE_RETENTION_DAYS-dan köhnə tam aylar
+    python archive_audit_logs.py --before 2025-01-01
+    python archive_audit_logs.py --dry-run
+    python archive_audit_logs.py --reindex               # köhnə seqmentlərin istifadəçi/əməliyyat sayları
+
+Archived rows stay visible in GET /audit-logs and the entity history.
+Run from one place only (e.g. a nightly task); API workers only read the archive.
+"""
+import argparse
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from app.db.session import engine
+from app.models.audit_log import AuditLog
+from app.services import audit_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", type=date.fromisoformat, default=None, help="YYYY-MM-DD (bu tarixdən əvvəlki sətirlər)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="yalnız sətir sayını göstər")
+    parser.add_argument("--reindex", action="store_true", help="yalnız indeksdəki sayları doldur, sətir köçürmə")
+    args = parser.parse_args()
+
+    cutoff = datetime.combine(args.before, datetime.min.time()) if args.before else audit_archive.default_cutoff()
+    try:
+        if args.reindex:
+            print(f"✓ Reindexed {audit_archive.reindex()} segment(s) in {audit_archive.archive_dir()}")
+            return
+        if args.dry_run:
+            with engine.connect() as conn:
+                rows = conn.execute(select(func.count()).where(AuditLog.created_at < cutoff)).scalar()
+            print(f"{rows} row(s) older than {cutoff:%Y-%m-%d} would be archived")
+            return
+        moved = audit_archive.archive_older_than(cutoff, args.batch_size)
+        print(f"✓ Archived {moved} row(s) older than {cutoff:%Y-%m-%d} into {audit_archive.archive_dir()}")
+    except Exception as e:
+        print(f"✗ Audit archive failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Fill AuditChanges from existing AuditLogs rows (old_values / new_values JSON).
+
+    python backfill_audit_changes.py                  # AuditChanges sətri olmayan bütün loglar
+    python backfill_audit_changes.py --from-id 120000 # yalnız bu id-dən sonrakılar
+    python backfill_audit_changes.py --batch-size 2000
+
+Only logs without any AuditChanges row are processed (NOT EXISTS on
+IX_AuditChanges_audit), so it can run while AUDIT_CHANGES_ENABLED=true and
+the audit writer is already adding rows for new logs, and it can be rerun
+after an interruption: it never skips older logs and never duplicates rows.
+Rows already moved to the audit archive are not included.
+"""
+import argparse
+
+from sqlalchemy import exists, insert, select
+
+from app.db.session import engine
+from app.models.audit_change import AuditChange
+from app.models.audit_log import AuditLog
+from app.services.audit_changes import changes_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-id", type=int, default=0, help="bu AuditLogs.id-dən sonrakılar")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    table = AuditLog.__table__
+    # Canlı audit writer yeni loglar üçün sətir əlavə edir: MAX(audit_id)-dən davam etmək köhnələri ötürərdi
+    done = exists().where(AuditChange.audit_id == table.c.id)
+    try:
+        last_id = args.from_id
+        logs = changes = 0
+        while True:
+            with engine.begin() as conn:
+                rows = [dict(row._mapping) for row in conn.execute(
+                    select(table).where(table.c.id > last_id, ~done).order_by(table.c.id).limit(args.batch_size)
+                )]
+                if not rows:
+                    break
+                batch = [change for row in rows for change in changes_for(row, row["id"])]
+                if batch:
+                    conn.execute(insert(AuditChange.__table__), batch)
+            last_id = rows[-1]["id"]
+            logs += len(rows)
+            changes += len(batch)
+            print(f"  … {logs} log(s), {changes} change row(s), last id {last_id}")
+        print(f"✓ Backfilled {changes} change row(s) from {logs} audit log(s)")
+    except Exception as e:
+        print(f"✗ Audit changes backfill failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Forma 4 row preparation benchmark: projection tuples ("rows" engine,
+forma_4.iter_rows) vs vectorized pandas ("pandas" engine,
+forma_4.iter_frame_rows). Both include their DB reads.
+
+    python benchmarks/forma_4_rows.py                  # 10k, 100k, 500k
+    python benchmarks/forma_4_rows.py 10000 50000
+    python benchmarks/forma_4_rows.py --memory 10000   # + tracemalloc peak (slower)
+
+Runs against a temporary SQLite database (DATABASE_URL is overridden), never
+the configured one.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DB_DIR = tempfile.mkdtemp(prefix="forma4_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Appeal, ApIndex, ApStatus, ChiefInstruction, ContentType, Department,
+    DepOfficial, Direction, Executor, ExecutorList, WhoControl,
+)
+from app.repositories.report import ReportRepository  # noqa: E402
+from app.services import forma_4  # noqa: E402
+
+LOOKUP_SIZE = 20
+
+
+def seed_lookups():
+    db = SessionLocal()
+    for i in range(1, LOOKUP_SIZE + 1):
+        db.add_all([
+            Department(id=i, department=f"İdarə {i}"),
+            DepOfficial(id=i, official=f"Vəzifəli şəxs {i}", dep_id=i),
+            WhoControl(id=i, chief=f"Rəis {i}"),
+            ChiefInstruction(id=i, instructions=f"Dərkənar {i}"),
+            ContentType(id=i, content_type=f"Növ {i}"),
+            ApIndex(id=i, ap_index=f"İndeks {i}", ap_index_id=100 + i),
+            ApStatus(id=i, status=f"Status {i}"),
+            Direction(id=i, direction=f"İstiqamət {i}"),
+            ExecutorList(id=i, executor=f"İcraçı {i}", direction_id=i),
+        ])
+    db.commit()
+    db.close()
+
+
+def seed_appeals(count: int, rnd: random.Random):
+    def lookup_id():
+        return rnd.choice([None] + list(range(1, LOOKUP_SIZE + 1)))
+
+    base = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Executor.__table__.delete())
+        conn.execute(Appeal.__table__.delete())
+        for offset in range(0, count, 10000):
+            appeals = [
+                dict(
+                    id=offset + k + 1, reg_num=f"3-25-4/1-A-{offset + k}-0/2025",
+                    reg_date=base + timedelta(minutes=rnd.randint(0, 525600)),
+                    in_ap_num=str(k), in_ap_date=rnd.choice([None, base]),
+                    dep_id=lookup_id(), official_id=lookup_id(), content="məzmun " * rnd.randint(1, 20),
+                    ap_index_id=lookup_id(), paper_count=str(rnd.randint(1, 9)),
+                    account_index_id=rnd.choice([None, 1, 2]), content_type_id=lookup_id(),
+                    repetition=rnd.random() < 0.2, who_control_id=lookup_id(), instructions_id=lookup_id(),
+                    status=lookup_id(), user_section_id=1, is_deleted=False,
+                )
+                for k in range(min(10000, count - offset))
+            ]
+            conn.execute(Appeal.__table__.insert(), appeals)
+            executors = [
+                dict(
+                    appeal_id=a["id"], direction_id=lookup_id(), executor_id=lookup_id(),
+                    out_num=rnd.choice([None, f"{a['id']}/1"]), out_date=rnd.choice([None, base]),
+                    attach_num=rnd.choice([None, "12"]), attach_paper_num=rnd.choice([None, "3"]),
+                    r_num=rnd.choice([None, "R-1"]), r_date=rnd.choice([None, base]),
+                )
+                for a in appeals
+                for _ in range(rnd.randint(0, 3))
+            ]
+            conn.execute(Executor.__table__.insert(), executors)
+
+
+def run(engine_name: str, memory: bool):
+    db = SessionLocal()
+    repo = ReportRepository(db)
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if engine_name == "pandas":
+        rows = sum(1 for _ in forma_4.iter_frame_rows(repo.iter_forma_4_frames()))
+    else:
+        rows = sum(1 for _ in forma_4.iter_rows(repo.iter_forma_4_records()))
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    db.close()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000, 500_000])
+    parser.add_argument("--memory", action="store_true", help="tracemalloc peak (slows both engines)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    seed_lookups()
+    forma_4.lookup_maps()  # reference_data-nı əvvəlcədən yüklə
+
+    rnd = random.Random(42)
+    print(f"{'appeals':>9} {'engine':>7} {'rows':>9} {'seconds':>9} {'rows/s':>10} {'peak MB':>8}")
+    for size in args.sizes:
+        seed_appeals(size, rnd)
+        for engine_name in ("rows", "pandas"):
+            rows, elapsed, peak = run(engine_name, args.memory)
+            peak_text = f"{peak:8.1f}" if peak is not None else f"{'-':>8}"
+            print(f"{size:>9} {engine_name:>7} {rows:>9} {elapsed:>9.2f} {rows / elapsed:>10.0f} {peak_text}")
+
+
+if __name__ == "__main__":
+    main()
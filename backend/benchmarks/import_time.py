@@ -0,0 +1,79 @@
+"""
+Worker boot profile: wall time and peak RSS of importing the app in a fresh
+interpreter, with and without warm_up_exports(), plus the slowest imports
+by cumulative time from `python -X importtime`. Each scenario runs in its
+own subprocess; no database is needed.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 5 --top 30
+    python benchmarks/import_time.py --module app.services.report
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ayrıca göstərilən ağır ixrac kitabxanaları
+HEAVY_PACKAGES = ("pandas", "numpy", "docx", "lxml", "reportlab", "openpyxl")
+
+SCENARIO_CODE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+if {warm_up}:
+    from app.services.report import warm_up_exports
+    warm_up_exports()
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# Linux: KB, macOS: bayt
+rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_mb, "heavy": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def run_scenario(module: str, warm_up: bool) -> tuple[dict, list[tuple[int, int, str]]]:
+    """One fresh interpreter: (measurements, [(self_us, cumulative_us, module)] from -X importtime)."""
+    code = SCENARIO_CODE.format(module=module, warm_up=warm_up, heavy=HEAVY_PACKAGES)
+    env = {**os.environ, "DATABASE_URL": "sqlite://"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return json.loads(result.stdout.strip().splitlines()[-1]), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="module a worker imports at boot")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per scenario (median is shown)")
+    parser.add_argument("--top", type=int, default=20, help="slowest imports to list")
+    args = parser.parse_args()
+
+    print(f"{'scenario':>20} {'seconds':>9} {'RSS MB':>8}  heavy packages loaded")
+    last_imports = []
+    for name, warm_up in (("import", False), ("import + warm-up", True)):
+        runs = [run_scenario(args.module, warm_up) for _ in range(args.runs)]
+        seconds = statistics.median(r[0]["seconds"] for r in runs)
+        rss_mb = statistics.median(r[0]["rss_mb"] for r in runs)
+        heavy = ", ".join(runs[-1][0]["heavy"]) or "-"
+        print(f"{name:>20} {seconds:>9.3f} {rss_mb:>8.0f}  {heavy}")
+        if not warm_up:
+            last_imports = runs[-1][1]
+
+    print(f"\nSlowest imports of {args.module} (cumulative, ms):")
+    for self_us, cumulative_us, module in sorted(last_imports, key=lambda i: i[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>9.1f} {self_us / 1000:>8.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Forma 4 Word export benchmark: python-docx cell-by-cell path
+(ReportService.write_forma_4_word_python_docx) vs the template writer
+(report_docx.write_forma_4_docx). Only rendering is measured; rows are
+synthetic 18-value tuples, no database is needed.
+
+    python benchmarks/report_docx.py                 # 1k, 5k, 20k rows
+    python benchmarks/report_docx.py 1000 100000
+    python benchmarks/report_docx.py --skip-python-docx 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# app.services.report DB engine-i yaradır; benchmark bazaya qoşulmur
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import report_docx, report_render  # noqa: E402
+from app.services.report import ReportService  # noqa: E402
+
+
+def make_rows(count: int, rnd: random.Random) -> list[tuple]:
+    rows = []
+    for i in range(count):
+        executors = rnd.randint(0, 3)
+        rows.append((
+            f"3-25-4/1-A-{i}-0/2025", "01.02.2025", str(i), rnd.choice(["", "15.01.2025"]),
+            f"İdarə {rnd.randint(1, 20)}\nVəzifəli şəxs {rnd.randint(1, 20)}",
+            "məzmun " * rnd.randint(1, 20), str(100 + rnd.randint(1, 20)), str(rnd.randint(1, 9)), "",
+            rnd.choice(["Növ 1", "Növ 2\nTəkrar"]), f"Rəis {rnd.randint(1, 20)}\nDərkənar 3",
+            "\n".join(f"İstiqamət {k}" for k in range(executors)),
+            "\n".join(f"İcraçı {k}" for k in range(executors)),
+            "\n".join(f"{i}/{k} 02.02.2025" for k in range(executors)),
+            "Baxılır", "12" if executors else "", "3" if executors else "", "",
+        ))
+    return rows
+
+
+def run(name: str, rows: list[tuple]) -> tuple[float, int]:
+    started = time.perf_counter()
+    if name == "python-docx":
+        output = ReportService.write_forma_4_word_python_docx(rows)
+    else:
+        output = report_render.spooled_file()
+        report_docx.write_forma_4_docx(rows, output)
+    elapsed = time.perf_counter() - started
+    output.seek(0, os.SEEK_END)
+    size = output.tell()
+    output.close()
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 5_000, 20_000])
+    parser.add_argument("--skip-python-docx", action="store_true", help="only the template writer (large sizes)")
+    args = parser.parse_args()
+
+    report_docx.forma_4_template()  # şablon bir dəfə qurulur, ölçməyə daxil deyil
+    engines = ["template"] if args.skip_python_docx else ["python-docx", "template"]
+    rnd = random.Random(42)
+    print(f"{'rows':>8} {'engine':>12} {'seconds':>9} {'rows/s':>10} {'size KB':>9}")
+    for size in args.sizes:
+        rows = make_rows(size, rnd)
+        for name in engines:
+            elapsed, file_size = run(name, rows)
+            print(f"{size:>8} {name:>12} {elapsed:>9.2f} {size / elapsed:>10.0f} {file_size / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Rewrite historical AuditLogs.old_values / new_values into the compact diff
+format (app/services/audit_diff.py): unchanged fields and nulls of create
+payloads are dropped, large diffs are zlib-compressed.
+
+    python compact_audit_logs.py --dry-run            # nə qədər yer qazanılacaq
+    python compact_audit_logs.py
+    python compact_audit_logs.py --from-id 250000     # yarımçıq qalmış işdən davam
+
+Rows are processed in id order, one transaction per batch; it is safe to
+stop and rerun (already compact rows are left as they are). Rows already in
+the audit archive are not rewritten.
+"""
+import argparse
+import json
+
+from sqlalchemy import bindparam, select, update
+
+from app.db.session import engine
+from app.models.audit_log import AuditLog
+from app.services import audit_diff
+
+
+def _load(stored: str | None) -> dict | None:
+    if not stored:
+        return None
+    values = json.loads(audit_diff.decode(stored))
+    if not isinstance(values, dict):
+        raise ValueError("not a JSON object")
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-id", type=int, default=0, help="bu AuditLogs.id-dən sonrakılar")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--dry-run", action="store_true", help="heç nə yazma, yalnız hesabla")
+    args = parser.parse_args()
+
+    table = AuditLog.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(old_values=bindparam("b_old"), new_values=bindparam("b_new"))
+    )
+    try:
+        last_id = args.from_id
+        scanned = rewritten = skipped = before_chars = after_chars = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(table.c.id, table.c.old_values, table.c.new_values)
+                    .where(table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(args.batch_size)
+                ).all()
+                if not rows:
+                    break
+                params = []
+                for row in rows:
+                    try:
+                        old, new = audit_diff.compact(_load(row.old_values), _load(row.new_values))
+                    except ValueError:
+                        # JSON olmayan köhnə dəyərlərə toxunulmur
+                        skipped += 1
+                        continue
+                    old_text, new_text = audit_diff.encode(old), audit_diff.encode(new)
+                    if (old_text, new_text) == (row.old_values, row.new_values):
+                        continue
+                    before_chars += len(row.old_values or "") + len(row.new_values or "")
+                    after_chars += len(old_text or "") + len(new_text or "")
+                    params.append({"b_id": row.id, "b_old": old_text, "b_new": new_text})
+                if params and not args.dry_run:
+                    conn.execute(statement, params)
+            last_id = rows[-1].id
+            scanned += len(rows)
+            rewritten += len(params)
+            print(f"  … {scanned} scanned, {rewritten} rewritten, last id {last_id}")
+        action = "Would rewrite" if args.dry_run else "Rewrote"
+        print(
+            f"✓ {action} {rewritten} of {scanned} row(s), {skipped} skipped (not JSON); "
+            f"values {before_chars} → {after_chars} characters"
+        )
+    except Exception as e:
+        print(f"✗ Audit log compaction failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
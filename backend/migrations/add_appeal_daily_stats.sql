@@ -0,0 +1,36 @@
+-- Statistika hesabatları üçün gündəlik rollup cədvəlləri.
+-- Cədvəlləri yaratdıqdan sonra: python rebuild_appeal_rollups.py
+-- sonra APPEAL_ROLLUPS_ENABLED=true.
+
+-- MSSQL:
+IF OBJECT_ID(N'dbo.AppealDailyStats', N'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.AppealDailyStats (
+    id INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    day DATE NULL,
+    user_section_id INT NULL,
+    dep_id INT NULL,
+    region_id INT NULL,
+    status INT NULL,
+    ap_index_id INT NULL,
+    InSection INT NULL,
+    account_index_id INT NULL,
+    content_type_id INT NULL,
+    appeal_count INT NOT NULL DEFAULT 0
+  );
+  CREATE INDEX IX_AppealDailyStats_day_section ON dbo.AppealDailyStats(day, user_section_id);
+END
+GO
+
+IF OBJECT_ID(N'dbo.AppealDirectionDailyStats', N'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.AppealDirectionDailyStats (
+    id INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    day DATE NULL,
+    user_section_id INT NULL,
+    direction_id INT NULL,
+    appeal_count INT NOT NULL DEFAULT 0
+  );
+  CREATE INDEX IX_AppealDirectionDailyStats_day_section ON dbo.AppealDirectionDailyStats(day, user_section_id);
+END
+GO
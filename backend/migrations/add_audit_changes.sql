@@ -0,0 +1,26 @@
+-- Audit dəyişikliklərinin sahə səviyyəsində indeksi (GET /api/v1/audit-logs/changes).
+-- Cədvəli yaratdıqdan sonra: backend/env-də AUDIT_CHANGES_ENABLED=true,
+-- sonra köhnə loglar üçün: python backfill_audit_changes.py
+
+-- MSSQL:
+IF OBJECT_ID(N'dbo.AuditChanges', N'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.AuditChanges (
+    id INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    audit_id INT NOT NULL,
+    entity_type NVARCHAR(50) NOT NULL,
+    entity_id INT NOT NULL,
+    field NVARCHAR(100) NOT NULL,
+    old_value NVARCHAR(250) NULL,
+    new_value NVARCHAR(250) NULL,
+    created_by INT NULL,
+    created_by_name NVARCHAR(100) NULL,
+    created_at DATETIME NOT NULL
+  );
+  CREATE INDEX IX_AuditChanges_field ON dbo.AuditChanges(entity_type, field, created_at DESC, id DESC);
+  CREATE INDEX IX_AuditChanges_field_value ON dbo.AuditChanges(entity_type, field, new_value);
+  CREATE INDEX IX_AuditChanges_entity ON dbo.AuditChanges(entity_type, entity_id, created_at DESC);
+  CREATE INDEX IX_AuditChanges_user ON dbo.AuditChanges(created_by, created_at DESC);
+  CREATE INDEX IX_AuditChanges_audit ON dbo.AuditChanges(audit_id);
+END
+GO
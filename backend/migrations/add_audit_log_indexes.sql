@@ -0,0 +1,29 @@
+-- AuditLogs üçün kompozit indekslər: filtr + (created_at, id) üzrə keyset səhifələmə.
+-- Böyük cədvəldə iş saatlarından kənar işlədin (ONLINE = ON yalnız Enterprise edition-da).
+
+-- MSSQL:
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_AuditLogs_created_at_id' AND object_id = OBJECT_ID(N'dbo.AuditLogs'))
+BEGIN
+  CREATE INDEX IX_AuditLogs_created_at_id ON dbo.AuditLogs(created_at DESC, id DESC);
+END
+GO
+
+-- Müraciət/istifadəçi tarixçəsi: INCLUDE sütunları ilə qısa tarixçə (summary) yalnız indeksdən oxunur
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_AuditLogs_entity' AND object_id = OBJECT_ID(N'dbo.AuditLogs'))
+BEGIN
+  CREATE INDEX IX_AuditLogs_entity ON dbo.AuditLogs(entity_type, entity_id, created_at DESC, id DESC)
+    INCLUDE (action, created_by, created_by_name);
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_AuditLogs_created_by' AND object_id = OBJECT_ID(N'dbo.AuditLogs'))
+BEGIN
+  CREATE INDEX IX_AuditLogs_created_by ON dbo.AuditLogs(created_by, created_at DESC, id DESC);
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'IX_AuditLogs_action' AND object_id = OBJECT_ID(N'dbo.AuditLogs'))
+BEGIN
+  CREATE INDEX IX_AuditLogs_action ON dbo.AuditLogs(action, created_at DESC, id DESC);
+END
+GO
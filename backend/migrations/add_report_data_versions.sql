@@ -0,0 +1,14 @@
+-- Hesabat keşlərinin ortaq versiya sayğacları (app/core/data_version.py).
+-- Tətbiq cədvəli özü yaradır; DB istifadəçisinin DDL icazəsi yoxdursa bunu əl ilə işlədin.
+
+-- MSSQL:
+IF OBJECT_ID(N'dbo.ReportDataVersions', N'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.ReportDataVersions (
+    scope NVARCHAR(20) NOT NULL,
+    month INT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT PK_ReportDataVersions PRIMARY KEY (scope, month)
+  );
+END
+GO
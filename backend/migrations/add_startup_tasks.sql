@@ -0,0 +1,13 @@
+-- Bir dəfəlik startup tapşırıqlarının qeydiyyatı (app/db/startup_tasks.py).
+-- Tətbiq cədvəli özü yaradır; DB istifadəçisinin DDL icazəsi yoxdursa bunu əl ilə işlədin.
+
+-- MSSQL:
+IF OBJECT_ID(N'dbo.StartupTasks', N'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.StartupTasks (
+    name NVARCHAR(100) NOT NULL PRIMARY KEY,
+    version NVARCHAR(64) NOT NULL,
+    completed_at DATETIME NOT NULL DEFAULT GETUTCDATE()
+  );
+END
+GO
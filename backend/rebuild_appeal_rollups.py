@@ -0,0 +1,47 @@
+"""
+Rebuild or reconcile the appeal statistics rollup tables
+(AppealDailyStats, AppealDirectionDailyStats) from Appeals/Executors.
+
+    python rebuild_appeal_rollups.py                       # hamısını yenidən qur
+    python rebuild_appeal_rollups.py --start 2025-01-01 --end 2025-01-31
+    python rebuild_appeal_rollups.py --reconcile --start 2025-01-01
+
+--reconcile only rebuilds the days whose counts differ (safe to run nightly).
+"""
+import argparse
+from datetime import date
+
+from app.db.session import SessionLocal
+from app.repositories.appeal_stats import AppealStatsRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    parser.add_argument("--reconcile", action="store_true", help="yalnız fərqli günləri yenidən qur")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        repo = AppealStatsRepository(db)
+        if args.reconcile:
+            days = repo.reconcile(args.start, args.end)
+            if days:
+                print(f"✓ Rebuilt {len(days)} day(s): " + ", ".join(str(d) for d in days))
+            else:
+                print("✓ Rollups are consistent")
+        else:
+            repo.rebuild(args.start, args.end)
+            print("✓ Rollups rebuilt")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Rollup rebuild failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
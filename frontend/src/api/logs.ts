@@ -17,9 +17,10 @@ export interface AuditLog {
 
 export interface AuditLogListResponse {
   items: AuditLog[];
-  total: number;
+  total: number | null; // cursor ilə sorğularda hesablanmır
   limit: number;
   offset: number;
+  next_cursor: string | null; // növbəti səhifə üçün cursor; null = son səhifə
 }
 
 export interface GetLogsParams {
@@ -27,6 +28,9 @@ export interface GetLogsParams {
   entity_id?: number;
   created_by?: number;
   action?: string;
+  start_date?: string; // YYYY-MM-DD
+  end_date?: string; // YYYY-MM-DD, daxil olmaqla
+  cursor?: string; // əvvəlki cavabın next_cursor dəyəri
   limit?: number;
   offset?: number;
 }
@@ -35,11 +39,14 @@ export async function getLogs(params: GetLogsParams): Promise<AuditLogListRespon
   const response = await apiClient.get<AuditLogListResponse>('/audit-logs', {
     params: {
       limit: params.limit || 50,
-      offset: params.offset || 0,
+      // Cursor olduqda offset nəzərə alınmır və total hesablanmır
+      ...(params.cursor ? { cursor: params.cursor } : { offset: params.offset || 0 }),
       ...(params.entity_type && { entity_type: params.entity_type }),
       ...(params.entity_id && { entity_id: params.entity_id }),
       ...(params.created_by && { created_by: params.created_by }),
       ...(params.action && { action: params.action }),
+      ...(params.start_date && { start_date: params.start_date }),
+      ...(params.end_date && { end_date: params.end_date }),
     },
   });
   return response.data;
@@ -14,6 +14,7 @@ import {
   Chip,
 } from '@mui/material';
 import { getLogs, AuditLog } from '../../api/logs';
+import { useCursorPages } from '../../hooks/useCursorPages';
 
 interface ParsedFeedback {
   category?: string;
@@ -34,26 +35,26 @@ function parseFeedback(log: AuditLog): ParsedFeedback {
 }
 
 export function FeedbackInbox() {
-  const [page, setPage] = useState(0);
   const [rowsPerPage, setRowsPerPage] = useState(20);
+  const { page, cursor, changePage, reset: resetPages } = useCursorPages();
 
   const { data, isLoading, isError } = useQuery({
-    queryKey: ['feedback-inbox', page, rowsPerPage],
+    queryKey: ['feedback-inbox', rowsPerPage, cursor],
     queryFn: () =>
       getLogs({
         entity_type: 'Feedback',
         limit: rowsPerPage,
-        offset: page * rowsPerPage,
+        cursor,
       }),
   });
 
   const handleChangePage = (_: unknown, newPage: number) => {
-    setPage(newPage);
+    changePage(newPage, data?.next_cursor);
   };
 
   const handleChangeRowsPerPage = (event: React.ChangeEvent<HTMLInputElement>) => {
     setRowsPerPage(parseInt(event.target.value, 10));
-    setPage(0);
+    resetPages();
   };
 
   const items = data?.items ?? [];
@@ -155,13 +156,13 @@ export function FeedbackInbox() {
         </TableContainer>
         <TablePagination
           component="div"
-          count={data?.total || 0}
+          count={data?.next_cursor ? -1 : page * rowsPerPage + (data?.items.length ?? 0)}
           page={page}
           onPageChange={handleChangePage}
           rowsPerPage={rowsPerPage}
           onRowsPerPageChange={handleChangeRowsPerPage}
           labelRowsPerPage="Səhifə başına qeyd:"
-          labelDisplayedRows={({ from, to, count }) => `${from}–${to} / ${count}`}
+          labelDisplayedRows={({ from, to, count }) => (count === -1 ? `${from}–${to}` : `${from}–${to} / ${count}`)}
         />
       </Paper>
     </div>
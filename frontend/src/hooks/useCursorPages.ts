@@ -0,0 +1,25 @@
+import { useState } from 'react';
+
+/**
+ * Keyset (cursor) paging for list endpoints that return `next_cursor`.
+ * Page i is fetched with cursors[i]; the first page has no cursor, so only
+ * it carries `total`. Going back reuses the cursor the page was fetched with.
+ */
+export function useCursorPages() {
+    const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
+    const page = cursors.length - 1;
+
+    /** Move to `newPage` (one step from the current page) */
+    const changePage = (newPage: number, nextCursor: string | null | undefined) => {
+        if (newPage > page) {
+            if (nextCursor) setCursors([...cursors, nextCursor]);
+        } else {
+            setCursors(cursors.slice(0, newPage + 1));
+        }
+    };
+
+    /** Back to the first page (filters or page size changed) */
+    const reset = () => setCursors([undefined]);
+
+    return { page, cursor: cursors[page], changePage, reset };
+}
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { useQuery } from '@tanstack/react-query';
 import {
     Box,
@@ -17,11 +17,16 @@ import {
     useTheme,
 } from '@mui/material';
 import Select from 'react-select';
+import Flatpickr from 'react-flatpickr';
+import 'flatpickr/dist/flatpickr.min.css';
+import { Azerbaijan } from 'flatpickr/dist/l10n/az';
 import HistoryIcon from '@mui/icons-material/History';
 import RefreshIcon from '@mui/icons-material/Refresh';
 import { getLogs } from '../api/logs';
 import Layout from '../components/Layout';
 import LoadingSpinner from '../components/LoadingSpinner';
+import { useCursorPages } from '../hooks/useCursorPages';
+import { formatDateForParam } from '../utils/dateUtils';
 import { getSelectStyles } from '../utils/formStyles';
 
 const ACTION_COLORS: Record<string, string> = {
@@ -61,38 +66,64 @@ export default function Logs() {
     const [filters, setFilters] = useState({
         entity_type: '',
         action: '',
+        start_date: '',
+        end_date: '',
     });
-    const [page, setPage] = useState(0);
     const [rowsPerPage, setRowsPerPage] = useState(20);
+    // Səhifələr cursor ilə: yalnız ilk səhifə ümumi sayı (total) hesablayır
+    const { page, cursor, changePage, reset: resetPages } = useCursorPages();
+    const [total, setTotal] = useState<number | null>(null);
 
     const { data: logsData, isLoading, refetch } = useQuery({
-        queryKey: ['audit-logs', filters, page, rowsPerPage],
+        queryKey: ['audit-logs', filters, rowsPerPage, cursor],
         queryFn: () =>
             getLogs({
                 entity_type: filters.entity_type || undefined,
                 action: filters.action || undefined,
+                start_date: filters.start_date || undefined,
+                end_date: filters.end_date || undefined,
                 limit: rowsPerPage,
-                offset: page * rowsPerPage,
+                cursor,
             }),
     });
 
+    useEffect(() => {
+        if (logsData && logsData.total !== null) setTotal(logsData.total);
+    }, [logsData]);
+
+    const updateFilters = (changes: Partial<typeof filters>) => {
+        setFilters({ ...filters, ...changes });
+        resetPages();
+    };
+
     const handleChangePage = (_event: unknown, newPage: number) => {
-        setPage(newPage);
+        changePage(newPage, logsData?.next_cursor);
     };
 
     const handleChangeRowsPerPage = (event: React.ChangeEvent<HTMLInputElement>) => {
         setRowsPerPage(parseInt(event.target.value, 10));
-        setPage(0);
+        resetPages();
+    };
+
+    const handleRefresh = () => {
+        // Yeni loglar ilk səhifədə görünür
+        if (page === 0) refetch();
+        else resetPages();
     };
 
     const handleClearFilters = () => {
-        setFilters({
+        updateFilters({
             entity_type: '',
             action: '',
+            start_date: '',
+            end_date: '',
         });
-        setPage(0);
     };
 
+    // Son səhifəyə qədər say məlum deyil (-1): "növbəti" düyməsi next_cursor ilə aktivdir
+    const itemCount = logsData?.items.length ?? 0;
+    const paginationCount = logsData?.next_cursor ? -1 : page * rowsPerPage + itemCount;
+
     const formatDate = (dateString: string) => {
         const date = new Date(dateString);
         return date.toLocaleString('az-AZ', {
@@ -129,10 +160,7 @@ export default function Logs() {
                         <Typography sx={{ fontSize: '0.85rem', fontWeight: 600, color: 'text.secondary', mb: 0.5 }}>Entity Növü</Typography>
                         <Select
                             value={ENTITY_TYPE_OPTIONS.find(o => o.value === filters.entity_type) || null}
-                            onChange={(e) => {
-                                setFilters({ ...filters, entity_type: e?.value || '' });
-                                setPage(0);
-                            }}
+                            onChange={(e) => updateFilters({ entity_type: e?.value || '' })}
                             options={ENTITY_TYPE_OPTIONS}
                             styles={getSelectStyles(theme.palette.primary.main)}
                             menuPortalTarget={document.body}
@@ -143,22 +171,69 @@ export default function Logs() {
                         <Typography sx={{ fontSize: '0.85rem', fontWeight: 600, color: 'text.secondary', mb: 0.5 }}>Əməliyyat Növü</Typography>
                         <Select
                             value={ACTION_OPTIONS.find(o => o.value === filters.action) || null}
-                            onChange={(e) => {
-                                setFilters({ ...filters, action: e?.value || '' });
-                                setPage(0);
-                            }}
+                            onChange={(e) => updateFilters({ action: e?.value || '' })}
                             options={ACTION_OPTIONS}
                             styles={getSelectStyles(theme.palette.primary.main)}
                             menuPortalTarget={document.body}
                             isSearchable={false}
                         />
                     </Grid>
-                    <Grid item xs={12} md={6}>
+                    <Grid item xs={12} sm={6} md={3}>
+                        <Typography sx={{ fontSize: '0.85rem', fontWeight: 600, color: 'text.secondary', mb: 0.5 }}>Başlanğıc Tarix</Typography>
+                        <Flatpickr
+                            value={filters.start_date ? [new Date(`${filters.start_date}T00:00`)] : []}
+                            onChange={(dates) => updateFilters({ start_date: formatDateForParam(dates[0]) })}
+                            options={{
+                                mode: 'single',
+                                dateFormat: 'd.m.Y',
+                                locale: {
+                                    ...Azerbaijan,
+                                    firstDayOfWeek: 1
+                                }
+                            }}
+                            placeholder="Tarix seçin"
+                            className="w-full"
+                            style={{
+                                width: '100%',
+                                padding: '8px 12px',
+                                borderRadius: '8px',
+                                border: '1px solid rgba(0, 0, 0, 0.23)',
+                                backgroundColor: 'white',
+                                fontSize: '14px',
+                            }}
+                        />
+                    </Grid>
+                    <Grid item xs={12} sm={6} md={3}>
+                        <Typography sx={{ fontSize: '0.85rem', fontWeight: 600, color: 'text.secondary', mb: 0.5 }}>Son Tarix</Typography>
+                        <Flatpickr
+                            value={filters.end_date ? [new Date(`${filters.end_date}T00:00`)] : []}
+                            onChange={(dates) => updateFilters({ end_date: formatDateForParam(dates[0]) })}
+                            options={{
+                                mode: 'single',
+                                dateFormat: 'd.m.Y',
+                                locale: {
+                                    ...Azerbaijan,
+                                    firstDayOfWeek: 1
+                                }
+                            }}
+                            placeholder="Tarix seçin"
+                            className="w-full"
+                            style={{
+                                width: '100%',
+                                padding: '8px 12px',
+                                borderRadius: '8px',
+                                border: '1px solid rgba(0, 0, 0, 0.23)',
+                                backgroundColor: 'white',
+                                fontSize: '14px',
+                            }}
+                        />
+                    </Grid>
+                    <Grid item xs={12}>
                         <Box sx={{ display: 'flex', gap: 2 }}>
                             <Button
                                 variant="outlined"
                                 startIcon={<RefreshIcon />}
-                                onClick={() => refetch()}
+                                onClick={handleRefresh}
                                 sx={{
                                     borderRadius: 2,
                                     fontWeight: 700,
@@ -247,13 +322,13 @@ export default function Logs() {
                     <TablePagination
                         rowsPerPageOptions={[10, 20, 50, 100]}
                         component="div"
-                        count={logsData?.total || 0}
+                        count={paginationCount}
                         rowsPerPage={rowsPerPage}
                         page={page}
                         onPageChange={handleChangePage}
                         onRowsPerPageChange={handleChangeRowsPerPage}
                         labelRowsPerPage="Səhifə başına satır:"
-                        labelDisplayedRows={({ from, to, count }) => `${from}–${to} / ${count}`}
+                        labelDisplayedRows={({ from, to }) => `${from}–${to}${total !== null ? ` / ${total}` : ''}`}
                         sx={{
                             bgcolor: 'action.hover',
                             '& .MuiTablePagination-selectLabel, & .MuiTablePagination-displayedRows': {
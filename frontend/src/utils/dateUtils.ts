@@ -99,3 +99,13 @@ export const isValidDDMMYYYYDate = (dateString: string): boolean => {
   const date = new Date(year, month - 1, day);
   return date.getDate() === day && date.getMonth() === month - 1 && date.getFullYear() === year;
 };
+
+/**
+ * Local calendar date (YYYY-MM-DD) for API date params; toISOString() would shift it to UTC
+ */
+export const formatDateForParam = (date: Date | undefined | null): string => {
+  if (!date) return '';
+  const day = String(date.getDate()).padStart(2, '0');
+  const month = String(date.getMonth() + 1).padStart(2, '0');
+  return `${date.getFullYear()}-${month}-${day}`;
+};